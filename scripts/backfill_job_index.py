@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""
+Rebuild the SQLite job index from an existing Surface asset tree.
+
+Usage:
+    python scripts/backfill_job_index.py             # tree under SURFACE_OUTPUT_DIR
+    python scripts/backfill_job_index.py --no-prune  # keep rows whose job folder is gone
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# Ensure /app is importable when running as a script
+APP_ROOT = Path(__file__).resolve().parents[1]  # /app
+sys.path.insert(0, str(APP_ROOT))
+
+from hse.fs.index import backfill, index_path  # noqa: E402
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Backfill the Surface job index")
+    parser.add_argument("--no-prune", action="store_true", help="keep index rows whose job folder is gone")
+    args = parser.parse_args()
+
+    started = time.monotonic()
+    try:
+        stats = backfill(prune=not args.no_prune)
+    except RuntimeError as exc:
+        print(f"ERROR: {exc}")
+        return 2
+    elapsed = time.monotonic() - started
+    print(
+        f"indexed={stats['indexed']} skipped={stats['skipped']} pruned={stats['pruned']} "
+        f"in {elapsed:.1f}s -> {index_path()}"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Measure API latency while many clients poll job status concurrently.
+
+Pollers hit GET /jobs/{id} (and a share of GET /jobs/{id}/manifest) on
+keep-alive connections while writers keep POSTing new jobs, then latency
+percentiles are printed per endpoint.
+
+Usage:
+    python scripts/bench_job_polling.py                      # spawns uvicorn against SURFACE_OUTPUT_DIR
+    python scripts/bench_job_polling.py --clients 64 --duration 30
+    python scripts/bench_job_polling.py --url http://127.0.0.1:8000/api/surface
+"""
+import argparse
+import http.client
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+import urllib.parse
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+APP_ROOT = Path(__file__).resolve().parents[1]
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _spawn_server(port: int) -> subprocess.Popen:
+    env = dict(os.environ)
+    # Run the repo checkout (src/ layout locally, /app in the image).
+    env["PYTHONPATH"] = os.pathsep.join(p for p in (str(APP_ROOT / "src"), str(APP_ROOT), env.get("PYTHONPATH")) if p)
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "hse.main:app", "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        env=env,
+    )
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.5):
+                return proc
+        except OSError:
+            if proc.poll() is not None:
+                raise SystemExit("uvicorn exited during startup")
+            time.sleep(0.1)
+    proc.terminate()
+    raise SystemExit("uvicorn did not start within 30s")
+
+
+class Client:
+    def __init__(self, base: str) -> None:
+        parts = urllib.parse.urlsplit(base)
+        self.host, self.port = parts.hostname or "127.0.0.1", parts.port or 80
+        self.prefix = parts.path.rstrip("/")
+        self.conn = http.client.HTTPConnection(self.host, self.port, timeout=60)
+
+    def request(self, method: str, path: str, body: Optional[dict] = None) -> Tuple[int, bytes, float]:
+        payload = json.dumps(body).encode("utf-8") if body is not None else None
+        headers = {"Content-Type": "application/json"} if payload is not None else {}
+        started = time.perf_counter()
+        try:
+            self.conn.request(method, self.prefix + path, body=payload, headers=headers)
+            resp = self.conn.getresponse()
+            data = resp.read()
+        except (OSError, http.client.HTTPException):
+            self.conn.close()
+            self.conn = http.client.HTTPConnection(self.host, self.port, timeout=60)
+            raise
+        return resp.status, data, time.perf_counter() - started
+
+
+def _create(client: Client) -> str:
+    status, data, _ = client.request("POST", "/jobs", {"target": "tile", "heightmap_url": "file:///dev/null"})
+    if status != 200:
+        raise SystemExit(f"POST /jobs failed: {status} {data[:200]!r}")
+    return json.loads(data)["job_id"]
+
+
+def _percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    k = min(len(sorted_values) - 1, max(0, int(round(pct / 100.0 * len(sorted_values))) - 1))
+    return sorted_values[k]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Concurrent job-status polling benchmark")
+    parser.add_argument("--url", help="API base URL (default: spawn uvicorn locally)")
+    parser.add_argument("--jobs", type=int, default=50, help="jobs created up front and polled")
+    parser.add_argument("--clients", type=int, default=32, help="concurrent polling connections")
+    parser.add_argument("--writers", type=int, default=2, help="connections POSTing new jobs throughout")
+    parser.add_argument("--manifest-share", type=float, default=0.2, help="fraction of polls that fetch the manifest")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds to run")
+    args = parser.parse_args()
+
+    proc = None
+    base = args.url
+    if not base:
+        port = _free_port()
+        proc = _spawn_server(port)
+        base = f"http://127.0.0.1:{port}{os.getenv('ROOT_PATH', '/api/surface')}"
+
+    try:
+        setup = Client(base)
+        job_ids = [_create(setup) for _ in range(args.jobs)]
+
+        samples: Dict[str, List[float]] = {"GET /jobs/{id}": [], "GET /jobs/{id}/manifest": [], "POST /jobs": []}
+        errors = {"count": 0}
+        lock = threading.Lock()
+        stop = time.monotonic() + args.duration
+
+        def poller(seed: int) -> None:
+            rng = random.Random(seed)
+            client = Client(base)
+            while time.monotonic() < stop:
+                job_id = rng.choice(job_ids)
+                manifest = rng.random() < args.manifest_share
+                key = "GET /jobs/{id}/manifest" if manifest else "GET /jobs/{id}"
+                try:
+                    status, _, elapsed = client.request("GET", f"/jobs/{job_id}" + ("/manifest" if manifest else ""))
+                except (OSError, http.client.HTTPException):
+                    status, elapsed = 0, 0.0
+                with lock:
+                    if status == 200:
+                        samples[key].append(elapsed)
+                    else:
+                        errors["count"] += 1
+
+        def writer() -> None:
+            client = Client(base)
+            while time.monotonic() < stop:
+                try:
+                    status, _, elapsed = client.request("POST", "/jobs", {"target": "tile", "heightmap_url": "file:///dev/null"})
+                except (OSError, http.client.HTTPException):
+                    status, elapsed = 0, 0.0
+                with lock:
+                    if status == 200:
+                        samples["POST /jobs"].append(elapsed)
+                    else:
+                        errors["count"] += 1
+
+        threads = [threading.Thread(target=poller, args=(i,)) for i in range(args.clients)]
+        threads += [threading.Thread(target=writer) for _ in range(args.writers)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        print(f"clients={args.clients} writers={args.writers} jobs={args.jobs} duration={args.duration:.0f}s errors={errors['count']}")
+        print(f"{'endpoint':<26}{'count':>8}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'max ms':>9}")
+        for key, values in samples.items():
+            values.sort()
+            ms = [v * 1000.0 for v in values]
+            print(
+                f"{key:<26}{len(ms):>8}{len(ms) / args.duration:>9.0f}"
+                f"{_percentile(ms, 50):>9.1f}{_percentile(ms, 95):>9.1f}{_percentile(ms, 99):>9.1f}{(ms[-1] if ms else 0):>9.1f}"
+            )
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait(timeout=10)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
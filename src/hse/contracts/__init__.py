@@ -1,6 +1,7 @@
-from .schema import load_contract_schema, validate_contract
+from .schema import load_contract_schema, maybe_validate_contract, validate_contract
 
 __all__ = [
 	"load_contract_schema",
+	"maybe_validate_contract",
 	"validate_contract",
 ]
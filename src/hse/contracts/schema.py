@@ -2,34 +2,104 @@ from __future__ import annotations
 
 import json
 import os
+import random
+import threading
 from pathlib import Path
-from typing import Any, Dict
+from typing import Any, Callable, Dict, Optional, Tuple
 
 from hexforge_contracts import load_schema as _load_schema
 from hexforge_contracts import validate_json as _validate_json
 
+try:  # hexforge_contracts validates with jsonschema; use it directly to keep compiled validators.
+    from jsonschema.exceptions import best_match as _best_match
+    from jsonschema.validators import validator_for as _validator_for
+except ImportError:  # pragma: no cover - fall back to the contracts package per call
+    _best_match = None
+    _validator_for = None
+
 
 # Local override directory so we are not dependent on package data files.
 _DEFAULT_ROOT = Path(__file__).resolve().parents[2] / "schemas" / "common"
 _SCHEMAS_ROOT = Path(os.getenv("HEXFORGE_CONTRACTS_ROOT", _DEFAULT_ROOT))
 
+# always: validate every document (default).
+# sample: validate final job writes plus HSE_CONTRACT_SAMPLE_RATE of everything else.
+# final:  validate final job writes only.
+VALIDATION_MODE = os.getenv("HSE_CONTRACT_VALIDATION", "always").strip().lower()
+SAMPLE_RATE = float(os.getenv("HSE_CONTRACT_SAMPLE_RATE", "0.05"))
+
+# name -> (mtime_ns or None for packaged schemas, schema, validate callable)
+_Entry = Tuple[Optional[int], Dict[str, Any], Callable[[Dict[str, Any]], None]]
+_cache: Dict[str, _Entry] = {}
+_lock = threading.Lock()
+
+
+def _compile(schema: Dict[str, Any]) -> Callable[[Dict[str, Any]], None]:
+    if _validator_for is None:
+        return lambda doc: _validate_json(doc, schema)
+    cls = _validator_for(schema)
+    cls.check_schema(schema)
+    validator = cls(schema)
+
+    def validate(doc: Dict[str, Any]) -> None:
+        # Same error jsonschema.validate() would raise, without re-checking the schema each call.
+        error = _best_match(validator.iter_errors(doc))
+        if error is not None:
+            raise error
+
+    return validate
+
+
+def _entry(name: str) -> _Entry:
+    """Parsed schema + compiled validator, reloaded when the local file's mtime changes."""
+    local_path = _SCHEMAS_ROOT / name
+    try:
+        mtime: Optional[int] = local_path.stat().st_mtime_ns
+    except OSError:
+        mtime = None
+    cached = _cache.get(name)
+    if cached is not None and cached[0] == mtime:
+        return cached
+    with _lock:
+        cached = _cache.get(name)
+        if cached is not None and cached[0] == mtime:
+            return cached
+        if mtime is not None:
+            schema = json.loads(local_path.read_text(encoding="utf-8"))
+        else:
+            # Fallback to packaged schema (if/when available)
+            schema = _load_schema(name)
+        entry = (mtime, schema, _compile(schema))
+        _cache[name] = entry
+        return entry
+
 
 def load_contract_schema(name: str) -> Dict[str, Any]:
     """
     Load a contract schema, preferring the repo-local copy under schemas/common.
     Falls back to hexforge_contracts' loader if local file is absent.
+
+    Parsed schemas are cached per process (keyed by name and file mtime) and
+    shared between callers: treat the result as read-only.
     """
-    local_path = _SCHEMAS_ROOT / name
-    if local_path.exists():
-        return json.loads(local_path.read_text(encoding="utf-8"))
-    # Fallback to packaged schema (if/when available)
-    return _load_schema(name)
+    return _entry(name)[1]
 
 
 def validate_contract(doc: Dict[str, Any], name: str) -> None:
     """Validate the given document against a named contract schema."""
-    schema = load_contract_schema(name)
-    _validate_json(doc, schema)
+    _entry(name)[2](doc)
+
+
+def maybe_validate_contract(doc: Dict[str, Any], name: str, *, final: bool = False) -> None:
+    """
+    Validate according to HSE_CONTRACT_VALIDATION. `final` marks a job's last
+    write (complete/failed), which every mode validates.
+    """
+    if VALIDATION_MODE == "final" and not final:
+        return
+    if VALIDATION_MODE == "sample" and not final and random.random() >= SAMPLE_RATE:
+        return
+    validate_contract(doc, name)
 
 
-__all__ = ["load_contract_schema", "validate_contract"]
+__all__ = ["load_contract_schema", "maybe_validate_contract", "validate_contract"]
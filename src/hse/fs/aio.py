@@ -0,0 +1,39 @@
+from __future__ import annotations
+
+import asyncio
+import functools
+import os
+import weakref
+from typing import Any, Callable, TypeVar
+
+import anyio.to_thread
+from anyio import CapacityLimiter
+
+# Max filesystem operations the API runs at once (worker threads doing disk I/O).
+DISK_IO_CONCURRENCY = max(1, int(os.getenv("HSE_DISK_IO_CONCURRENCY", "8")))
+
+T = TypeVar("T")
+
+_limiters: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, CapacityLimiter]" = weakref.WeakKeyDictionary()
+
+
+def _limiter() -> CapacityLimiter:
+    # One limiter per event loop: test clients and reloads each run their own loop.
+    loop = asyncio.get_running_loop()
+    limiter = _limiters.get(loop)
+    if limiter is None:
+        limiter = CapacityLimiter(DISK_IO_CONCURRENCY)
+        _limiters[loop] = limiter
+    return limiter
+
+
+async def run_disk_io(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """
+    Run blocking filesystem work (reads, atomic writes, stats, validation) in a
+    worker thread so a slow disk never stalls the event loop. At most
+    DISK_IO_CONCURRENCY calls run at once; the rest wait without blocking.
+    """
+    return await anyio.to_thread.run_sync(functools.partial(func, *args, **kwargs), limiter=_limiter())
+
+
+__all__ = ["DISK_IO_CONCURRENCY", "run_disk_io"]
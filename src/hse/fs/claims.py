@@ -0,0 +1,148 @@
+from __future__ import annotations
+
+import fcntl
+import json
+import os
+import socket
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional
+
+from hse.contracts.envelopes import now_iso
+from hse.fs.paths import assert_valid_job_id, sanitize_subfolder, state_root
+
+# Claims older than this (seconds since last refresh) are considered abandoned.
+CLAIM_TTL_SECONDS = float(os.getenv("HSE_WORKER_CLAIM_TTL", "900"))
+# Directory name for root-level jobs; "." is not a legal subfolder, so it cannot collide.
+_ROOT_BUCKET = ".root"
+
+
+def claim_path(job_id: str, *, subfolder: Optional[str] = None) -> Path:
+    jid = assert_valid_job_id(job_id)
+    sf = sanitize_subfolder(subfolder) or _ROOT_BUCKET
+    return state_root() / "claims" / sf / f"{jid}.claim"
+
+
+def _create_exclusive(path: Path, tag: Optional[str]) -> bool:
+    try:
+        fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644)
+    except FileExistsError:
+        return False
+    owner: Dict[str, Any] = {"pid": os.getpid(), "host": socket.gethostname(), "claimed_at": now_iso()}
+    if tag is not None:
+        owner["tag"] = tag
+    with os.fdopen(fd, "w", encoding="utf-8") as fh:
+        json.dump(owner, fh)
+    return True
+
+
+def _claim_age(path: Path) -> Optional[float]:
+    try:
+        return time.time() - path.stat().st_mtime
+    except FileNotFoundError:
+        return None
+
+
+@contextmanager
+def _steal_lock(bucket: Path) -> Iterator[None]:
+    """Serialises stale-claim takeover within one claims directory (flock, so across processes)."""
+    with open(bucket / ".steal.lock", "a") as fh:
+        fcntl.flock(fh.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(fh.fileno(), fcntl.LOCK_UN)
+
+
+def _steal_if_stale(path: Path, ttl: float) -> None:
+    age = _claim_age(path)
+    if age is None or age < ttl:
+        return
+    with _steal_lock(path.parent):
+        # Re-check under the lock: another worker may have stolen it since our stat and
+        # created a fresh claim, which must not be removed.
+        age = _claim_age(path)
+        if age is None or age < ttl:
+            return
+        path.unlink(missing_ok=True)
+
+
+def try_claim(
+    job_id: str,
+    *,
+    subfolder: Optional[str] = None,
+    ttl: Optional[float] = None,
+    tag: Optional[str] = None,
+) -> Optional[Path]:
+    """
+    Atomically claim a job for this process (O_CREAT | O_EXCL on a claim file).
+
+    Returns the claim path on success, None when another live worker holds it.
+    Works across processes and containers sharing the state directory. `tag`
+    is stored with the owner so a supervisor can tell its own claims apart
+    (see claim_owner).
+    """
+    path = claim_path(job_id, subfolder=subfolder)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if _create_exclusive(path, tag):
+        return path
+    _steal_if_stale(path, CLAIM_TTL_SECONDS if ttl is None else ttl)
+    if _create_exclusive(path, tag):
+        return path
+    return None
+
+
+def claim_owner(path: Path) -> Optional[Dict[str, Any]]:
+    """The owner record of a claim (pid, host, claimed_at, tag?), or None if unclaimed or unreadable."""
+    try:
+        owner = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    return owner if isinstance(owner, dict) else None
+
+
+def refresh_claim(path: Path) -> None:
+    try:
+        os.utime(path)
+    except FileNotFoundError:
+        pass
+
+
+def release_claim(path: Path) -> None:
+    path.unlink(missing_ok=True)
+
+
+class ClaimKeeper:
+    """Background refresher so long-running jobs never look stale to other workers."""
+
+    def __init__(self, path: Path, interval: Optional[float] = None) -> None:
+        self.path = path
+        self.interval = interval if interval is not None else max(CLAIM_TTL_SECONDS / 3.0, 1.0)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="hse-claim-keeper", daemon=True)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            refresh_claim(self.path)
+
+    def __enter__(self) -> "ClaimKeeper":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self._stop.set()
+        self._thread.join(timeout=1.0)
+        release_claim(self.path)
+
+
+__all__ = [
+    "CLAIM_TTL_SECONDS",
+    "claim_owner",
+    "claim_path",
+    "try_claim",
+    "refresh_claim",
+    "release_claim",
+    "ClaimKeeper",
+]
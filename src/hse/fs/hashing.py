@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+import hashlib
+import io
+import os
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, Optional
+
+from hse.fs.writer import link_or_copy
+
+# Threads used to hash files that were not written through a HashingWriter.
+HASH_THREADS = max(1, int(os.getenv("HSE_HASH_THREADS", "4")))
+# Inside a dedup_scope(), artifacts up to this size are held in memory until closed so a
+# duplicate of one already written in the scope becomes a hardlink without touching the disk.
+DEDUP_BUFFER_BYTES = int(os.getenv("HSE_DEDUP_BUFFER_BYTES", str(16 * 1024 * 1024)))
+
+_CHUNK = 1 << 20
+
+
+@dataclass(frozen=True)
+class FileDigest:
+    path: Path
+    sha256: str
+    size: int
+    linked_from: Optional[Path] = None  # set when deduplicated against an earlier artifact
+
+
+_scope: ContextVar[Optional[Dict[str, Path]]] = ContextVar("hse_dedup_scope", default=None)
+
+
+@contextmanager
+def dedup_scope() -> Iterator[Dict[str, Path]]:
+    """Within the block, HashingWriters link identical artifacts to the first one written (sha256 -> path)."""
+    token = _scope.set({})
+    try:
+        yield _scope.get()  # type: ignore[misc]
+    finally:
+        _scope.reset(token)
+
+
+class HashingWriter(io.RawIOBase):
+    """
+    Binary file writer that computes sha256 and byte size of everything written.
+
+    The destination is unlinked before opening, so an existing hardlink (shared
+    with a cache) is replaced rather than written through. `digest` is available
+    after close. There is deliberately no fileno(): encoders such as Pillow's
+    would otherwise write to the descriptor directly, bypassing the hash.
+
+    Inside a dedup_scope(), output is buffered (up to DEDUP_BUFFER_BYTES) and an
+    artifact identical to one already written in the scope is hardlinked to it.
+    """
+
+    def __init__(self, path: Path) -> None:
+        super().__init__()
+        self.path = path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.unlink(missing_ok=True)
+        self._seen = _scope.get()
+        self._buffer: Optional[bytearray] = bytearray() if self._seen is not None else None
+        self._fh: Optional[io.BufferedWriter] = None if self._buffer is not None else path.open("wb")
+        self._hash = hashlib.sha256()
+        self._size = 0
+        self._digest: Optional[FileDigest] = None
+
+    def writable(self) -> bool:
+        return True
+
+    def _spill(self) -> io.BufferedWriter:
+        """Too big to hold: write what is buffered and stream the rest."""
+        fh = self.path.open("wb")
+        if self._buffer:
+            fh.write(self._buffer)
+        self._buffer = None
+        self._fh = fh
+        return fh
+
+    def write(self, data) -> int:  # type: ignore[override]
+        view = memoryview(data).cast("B")
+        if self._buffer is not None and len(self._buffer) + len(view) <= DEDUP_BUFFER_BYTES:
+            self._buffer += view
+            written = len(view)
+        else:
+            fh = self._fh or self._spill()
+            written = fh.write(view)
+        self._hash.update(view[:written])
+        self._size += written
+        return written
+
+    def tell(self) -> int:
+        return self._size
+
+    def flush(self) -> None:
+        if not self.closed and self._fh is not None:
+            self._fh.flush()
+
+    def close(self) -> None:
+        if self.closed:
+            return
+        super().close()  # flushes first
+        sha = self._hash.hexdigest()
+        linked_from: Optional[Path] = None
+        if self._buffer is not None:
+            first = self._seen.get(sha) if self._seen is not None else None
+            if first is not None and first != self.path and first.is_file():
+                link_or_copy(first, self.path)
+                linked_from = first
+            else:
+                self.path.write_bytes(self._buffer)
+            self._buffer = None
+        if self._fh is not None:
+            self._fh.close()
+        if self._seen is not None:
+            self._seen.setdefault(sha, self.path)
+        self._digest = FileDigest(self.path, sha, self._size, linked_from)
+
+    @property
+    def digest(self) -> FileDigest:
+        if self._digest is None:
+            raise RuntimeError(f"digest requested before close: {self.path}")
+        return self._digest
+
+
+def sha256_file(path: Path) -> str:
+    h = hashlib.sha256()
+    with path.open("rb") as fh:
+        for chunk in iter(lambda: fh.read(_CHUNK), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def hash_files(paths: Iterable[Path], *, max_workers: int = HASH_THREADS) -> Dict[Path, str]:
+    """sha256 of several files in parallel (hashlib releases the GIL on large buffers)."""
+    unique = list(dict.fromkeys(paths))
+    if len(unique) <= 1 or max_workers <= 1:
+        return {p: sha256_file(p) for p in unique}
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(unique)), thread_name_prefix="hse-hash") as pool:
+        return dict(zip(unique, pool.map(sha256_file, unique)))
+
+
+__all__ = [
+    "DEDUP_BUFFER_BYTES",
+    "FileDigest",
+    "HASH_THREADS",
+    "HashingWriter",
+    "dedup_scope",
+    "hash_files",
+    "sha256_file",
+]
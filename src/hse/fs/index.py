@@ -0,0 +1,398 @@
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from hse.contracts.envelopes import now_iso
+from hse.fs.paths import assert_valid_job_id, assets_root, sanitize_subfolder, state_root
+from hse.fs.status import infer_status_from_files, normalized_target
+
+# HSE_JOB_INDEX=0 disables the index (all lookups fall back to the filesystem).
+INDEX_ENABLED = os.getenv("HSE_JOB_INDEX", "1").strip().lower() not in {"0", "false", "no", "off"}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    subfolder  TEXT NOT NULL DEFAULT '',
+    job_id     TEXT NOT NULL,
+    status     TEXT NOT NULL,
+    target     TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    checksum   TEXT,
+    PRIMARY KEY (subfolder, job_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS jobs_status_created ON jobs (status, created_at);
+CREATE INDEX IF NOT EXISTS jobs_job_id ON jobs (job_id);
+CREATE INDEX IF NOT EXISTS jobs_created ON jobs (created_at);
+CREATE INDEX IF NOT EXISTS jobs_subfolder_created ON jobs (subfolder, created_at);
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+# Never let an older view of a job (a late lazy index, a backfill snapshot) overwrite newer
+# worker state. updated_at is a now_iso() UTC string, so text order is time order.
+_UPSERT = """
+INSERT INTO jobs (subfolder, job_id, status, target, created_at, updated_at, checksum)
+VALUES (?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (subfolder, job_id) DO UPDATE SET
+    status = excluded.status,
+    target = excluded.target,
+    created_at = excluded.created_at,
+    updated_at = excluded.updated_at,
+    checksum = COALESCE(excluded.checksum, jobs.checksum)
+WHERE excluded.updated_at >= jobs.updated_at
+"""
+
+
+def index_path() -> Path:
+    override = os.getenv("HSE_JOB_INDEX_PATH")
+    if override:
+        return Path(override)
+    return state_root() / "jobs.sqlite3"
+
+
+@dataclass(frozen=True)
+class JobRecord:
+    job_id: str
+    subfolder: Optional[str]
+    status: str
+    target: str
+    created_at: str
+    updated_at: str
+    checksum: Optional[str] = None
+
+
+def _key(subfolder: Optional[str]) -> str:
+    # SQLite treats NULLs as distinct in primary keys; root-level jobs use ''.
+    return sanitize_subfolder(subfolder) or ""
+
+
+def _record(row: Tuple) -> JobRecord:
+    subfolder, job_id, status, target, created_at, updated_at, checksum = row
+    return JobRecord(
+        job_id=job_id,
+        subfolder=subfolder or None,
+        status=status,
+        target=target,
+        created_at=created_at,
+        updated_at=updated_at,
+        checksum=checksum,
+    )
+
+
+class JobIndex:
+    """
+    Embedded SQLite (WAL) index of Surface jobs, keyed on (subfolder, job_id).
+
+    job.json stays the source of truth; the index mirrors it so discovery and
+    status lookups do not walk the asset tree. Safe to share between the API,
+    the worker and its job processes (one connection per process/thread).
+    """
+
+    _COLUMNS = "subfolder, job_id, status, target, created_at, updated_at, checksum"
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(path), timeout=30.0, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA busy_timeout=30000")
+        self._conn.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def upsert(
+        self,
+        *,
+        job_id: str,
+        subfolder: Optional[str],
+        status: str,
+        target: str,
+        created_at: str,
+        updated_at: str,
+        checksum: Optional[str] = None,
+    ) -> None:
+        self._conn.execute(
+            _UPSERT,
+            (_key(subfolder), job_id, status, target, created_at, updated_at, checksum),
+        )
+
+    def upsert_many(self, records: Iterable[JobRecord]) -> int:
+        rows = [
+            (_key(r.subfolder), r.job_id, r.status, r.target, r.created_at, r.updated_at, r.checksum)
+            for r in records
+        ]
+        if rows:
+            with self._transaction():
+                self._conn.executemany(_UPSERT, rows)
+        return len(rows)
+
+    def get(self, job_id: str, subfolder: Optional[str] = None) -> Optional[JobRecord]:
+        row = self._conn.execute(
+            f"SELECT {self._COLUMNS} FROM jobs WHERE subfolder = ? AND job_id = ?",
+            (_key(subfolder), job_id),
+        ).fetchone()
+        return _record(row) if row else None
+
+    def delete(self, job_id: str, subfolder: Optional[str] = None) -> None:
+        self._conn.execute("DELETE FROM jobs WHERE subfolder = ? AND job_id = ?", (_key(subfolder), job_id))
+
+    def by_status(self, status: str, limit: Optional[int] = None) -> List[JobRecord]:
+        sql = f"SELECT {self._COLUMNS} FROM jobs WHERE status = ? ORDER BY created_at, subfolder, job_id"
+        params: Tuple = (status,)
+        if limit is not None:
+            sql += " LIMIT ?"
+            params = (status, int(limit))
+        return [_record(r) for r in self._conn.execute(sql, params)]
+
+    def page(
+        self,
+        *,
+        subfolder: Optional[str] = None,
+        status: Optional[str] = None,
+        since: Optional[str] = None,
+        after: Optional[Tuple[str, str, str]] = None,
+        limit: int = 50,
+        descending: bool = False,
+    ) -> List[JobRecord]:
+        """
+        One page of jobs in (created_at, subfolder, job_id) order, optionally
+        filtered by subfolder, status and created_at >= `since`. `after` is the
+        sort key of the previous page's last row (keyset pagination, so deep
+        pages cost the same as the first).
+        """
+        where: List[str] = []
+        params: List = []
+        if subfolder is not None:
+            where.append("subfolder = ?")
+            params.append(_key(subfolder))
+        if status is not None:
+            where.append("status = ?")
+            params.append(status)
+        if since is not None:
+            where.append("created_at >= ?")
+            params.append(since)
+        if after is not None:
+            where.append(f"(created_at, subfolder, job_id) {'<' if descending else '>'} (?, ?, ?)")
+            params.extend(after)
+        direction = "DESC" if descending else "ASC"
+        sql = f"SELECT {self._COLUMNS} FROM jobs"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += f" ORDER BY created_at {direction}, subfolder {direction}, job_id {direction} LIMIT ?"
+        params.append(int(limit))
+        return [_record(r) for r in self._conn.execute(sql, params)]
+
+    def keys(self, *, updated_before: Optional[str] = None) -> Iterator[Tuple[str, Optional[str]]]:
+        sql, params = "SELECT subfolder, job_id FROM jobs", ()
+        if updated_before is not None:
+            sql, params = sql + " WHERE updated_at < ?", (updated_before,)
+        for subfolder, job_id in self._conn.execute(sql, params):
+            yield job_id, subfolder or None
+
+    def counts_by_status(self) -> Dict[str, int]:
+        return {status: int(n) for status, n in self._conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status")}
+
+    def count(self) -> int:
+        return int(self._conn.execute("SELECT COUNT(*) FROM jobs").fetchone()[0])
+
+    def get_meta(self, key: str) -> Optional[str]:
+        row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, key: str, value: str) -> None:
+        self._conn.execute(
+            "INSERT INTO meta (key, value) VALUES (?, ?) ON CONFLICT (key) DO UPDATE SET value = excluded.value",
+            (key, value),
+        )
+
+    @contextmanager
+    def _transaction(self) -> Iterator[None]:
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+        self._conn.execute("COMMIT")
+
+
+_local = threading.local()
+
+
+def job_index() -> Optional[JobIndex]:
+    """Per-process, per-thread index handle (None when disabled or unavailable)."""
+    if not INDEX_ENABLED:
+        return None
+    path = index_path()
+    cached = getattr(_local, "index", None)
+    if cached is not None and cached[0] == (os.getpid(), path):
+        return cached[1]
+    try:
+        idx = JobIndex(path)
+    except (sqlite3.Error, OSError) as exc:
+        print(f"[index] job index unavailable at {path}: {exc}")
+        return None
+    _local.index = ((os.getpid(), path), idx)
+    return idx
+
+
+def record_job(
+    *,
+    job_id: str,
+    subfolder: Optional[str],
+    status: str,
+    target: str,
+    created_at: str,
+    updated_at: str,
+    checksum: Optional[str] = None,
+) -> None:
+    """Best-effort upsert; the index is derived state and must never fail a job write."""
+    idx = job_index()
+    if idx is None:
+        return
+    try:
+        idx.upsert(
+            job_id=job_id,
+            subfolder=subfolder,
+            status=status,
+            target=target,
+            created_at=created_at,
+            updated_at=updated_at,
+            checksum=checksum,
+        )
+    except sqlite3.Error as exc:
+        print(f"[index] upsert failed for {job_id}: {exc}")
+
+
+def record_jobs(records: Iterable[JobRecord]) -> int:
+    """Best-effort upsert of many jobs in one transaction (see record_job)."""
+    idx = job_index()
+    if idx is None:
+        return 0
+    try:
+        return idx.upsert_many(records)
+    except sqlite3.Error as exc:
+        print(f"[index] batch upsert failed: {exc}")
+        return 0
+
+
+def _iter_job_jsons(root: Path) -> Iterator[Path]:
+    """Job folders at /surface/<job_id>/ and /surface/<subfolder>/<job_id>/ (scandir, no glob)."""
+    try:
+        top = list(os.scandir(root))
+    except OSError:
+        return
+    for entry in top:
+        if not entry.is_dir(follow_symlinks=False) or entry.name.startswith("."):
+            continue
+        first = Path(entry.path)
+        if (first / "job.json").is_file():
+            yield first / "job.json"
+            continue
+        try:
+            children = list(os.scandir(first))
+        except OSError:
+            continue
+        for child in children:
+            if child.is_dir(follow_symlinks=False) and not child.name.startswith("."):
+                candidate = Path(child.path) / "job.json"
+                if candidate.is_file():
+                    yield candidate
+
+
+def _input_checksum(job_root: Path) -> Optional[str]:
+    try:
+        doc = json.loads((job_root / "job_manifest.json").read_text(encoding="utf-8"))
+    except Exception:
+        return None
+    for entry in doc.get("outputs") or []:
+        if isinstance(entry, dict) and entry.get("path") == "inputs/input_heightmap.png":
+            return entry.get("checksum")
+    return None
+
+
+def backfill(root: Optional[Path] = None, *, prune: bool = True, batch_size: int = 1000) -> Dict[str, int]:
+    """Rebuild the index from an asset tree; statuses are inferred exactly like GET /jobs/{id}."""
+    idx = job_index()
+    if idx is None:
+        raise RuntimeError("job index disabled (HSE_JOB_INDEX=0)")
+
+    root = root or assets_root()
+    # Jobs written while the walk runs may be missing from it; only older rows are pruned.
+    started = now_iso()
+    seen: set = set()
+    batch: List[JobRecord] = []
+    stats = {"indexed": 0, "skipped": 0, "pruned": 0}
+
+    for job_json in _iter_job_jsons(root):
+        job_root = job_json.parent
+        try:
+            job_id = assert_valid_job_id(job_root.name)
+            doc = json.loads(job_json.read_text(encoding="utf-8"))
+        except Exception:
+            stats["skipped"] += 1
+            continue
+        subfolder = sanitize_subfolder(job_root.parent.name) if job_root.parent != root else None
+        if not isinstance(doc, dict):
+            stats["skipped"] += 1
+            continue
+        created = str(doc.get("created_at") or doc.get("updated_at") or now_iso())
+        batch.append(
+            JobRecord(
+                job_id=job_id,
+                subfolder=subfolder,
+                status=infer_status_from_files(job_id, subfolder=subfolder, doc=doc),
+                target=normalized_target((doc.get("params") or {}).get("target")),
+                created_at=created,
+                updated_at=str(doc.get("updated_at") or created),
+                checksum=_input_checksum(job_root),
+            )
+        )
+        seen.add((job_id, subfolder))
+        if len(batch) >= batch_size:
+            stats["indexed"] += idx.upsert_many(batch)
+            batch = []
+    stats["indexed"] += idx.upsert_many(batch)
+
+    if prune:
+        for job_id, subfolder in list(idx.keys(updated_before=started)):
+            if (job_id, subfolder) not in seen:
+                idx.delete(job_id, subfolder)
+                stats["pruned"] += 1
+
+    idx.set_meta("backfilled_at", now_iso())
+    return stats
+
+
+def ensure_backfilled(root: Optional[Path] = None) -> bool:
+    """One-time backfill for trees that predate the index. Returns True if it ran."""
+    idx = job_index()
+    if idx is None or idx.get_meta("backfilled_at"):
+        return False
+    stats = backfill(root)
+    print(f"[index] initial backfill: {stats}")
+    return True
+
+
+__all__ = [
+    "INDEX_ENABLED",
+    "JobIndex",
+    "JobRecord",
+    "index_path",
+    "job_index",
+    "record_job",
+    "record_jobs",
+    "backfill",
+    "ensure_backfilled",
+]
@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import weakref
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator
+
+from hse.fs.watch import DirWatcher
+
+# HSE_EVENTS_WATCH=0 disables inotify for SSE/long-poll; changes are then found by re-checking on a timer.
+EVENTS_WATCH_ENABLED = os.getenv("HSE_EVENTS_WATCH", "1").strip().lower() not in {"0", "false", "no", "off"}
+# Re-check interval while following a job (the notification latency without inotify).
+EVENTS_POLL_SECONDS = max(0.05, float(os.getenv("HSE_EVENTS_POLL_INTERVAL", "0.5")))
+
+
+class JobEventHub:
+    """
+    Wakes coroutines following job folders as soon as a file lands in them.
+
+    One inotify instance per event loop is shared by every follower; each
+    followed folder holds a single watch however many clients follow it.
+    `changed(root)` returns an asyncio.Event that is set on the next write in
+    `root` (grab it before reading state, then wait on it, so no write is
+    missed). Without inotify the event never fires and followers fall back to
+    re-checking every EVENTS_POLL_SECONDS.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, *, use_inotify: bool = EVENTS_WATCH_ENABLED) -> None:
+        self._watcher = DirWatcher(use_inotify=use_inotify)
+        self._events: Dict[Path, asyncio.Event] = {}
+        self._followers: Dict[Path, int] = {}
+        if self._watcher.available:
+            loop.add_reader(self._watcher.fileno(), self._on_readable)
+            weakref.finalize(loop, self._watcher.close)
+
+    def _on_readable(self) -> None:
+        for root in self._watcher.drain():
+            event = self._events.pop(root, None)
+            if event is not None:
+                event.set()
+
+    @contextmanager
+    def follow(self, root: Path) -> Iterator[None]:
+        self._watcher.add(root)
+        self._followers[root] = self._followers.get(root, 0) + 1
+        try:
+            yield
+        finally:
+            self._watcher.discard(root)
+            left = self._followers.pop(root) - 1
+            if left:
+                self._followers[root] = left
+            else:
+                self._events.pop(root, None)
+
+    def changed(self, root: Path) -> asyncio.Event:
+        event = self._events.get(root)
+        if event is None:
+            event = self._events[root] = asyncio.Event()
+        return event
+
+    async def wait(self, event: asyncio.Event, timeout: float) -> bool:
+        """True when `event` fired, False after min(timeout, EVENTS_POLL_SECONDS)."""
+        try:
+            await asyncio.wait_for(event.wait(), timeout=max(0.0, min(timeout, EVENTS_POLL_SECONDS)))
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+
+_hubs: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, JobEventHub]" = weakref.WeakKeyDictionary()
+
+
+def job_event_hub() -> JobEventHub:
+    """The running loop's hub (test clients and reloads each run their own loop)."""
+    loop = asyncio.get_running_loop()
+    hub = _hubs.get(loop)
+    if hub is None:
+        hub = _hubs[loop] = JobEventHub(loop)
+    return hub
+
+
+__all__ = ["EVENTS_POLL_SECONDS", "EVENTS_WATCH_ENABLED", "JobEventHub", "job_event_hub"]
@@ -44,6 +44,19 @@ def assets_root() -> Path:
     return base
 
 
+def state_root() -> Path:
+    """
+    Internal worker state (claims, indexes, caches). Never under the public assets root;
+    defaults to a sibling of it so hardlinks into job folders stay on one filesystem.
+    That sibling shares the assets volume, so only surface/ may be served, never the
+    volume root (FILESYSTEM.md, "Internal-only").
+    """
+    override = os.getenv("HSE_STATE_DIR")
+    if override:
+        return Path(override).resolve()
+    return assets_root().parent / ".surface_state"
+
+
 def public_prefix() -> str:
     """
     URL prefix where the public files are served from (nginx or media_api).
@@ -85,6 +98,7 @@ __all__ = [
     "assert_valid_job_id",
     "sanitize_subfolder",
     "assets_root",
+    "state_root",
     "public_prefix",
     "public_root",
     "job_dir",
@@ -0,0 +1,171 @@
+from __future__ import annotations
+
+import json
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+from hse.contracts.envelopes import now_iso
+from hse.fs.writer import write_json_atomic
+
+# Sidecars next to job.json; not part of any contract and never validated.
+PROGRESS_FILE = "progress.json"
+TIMINGS_FILE = "timings.json"
+
+# Worker stages in order, with the fraction of a typical job done when each starts
+# (preview rendering dominates; meshing and export are quick).
+STAGES: Dict[str, float] = {
+    "download": 0.0,
+    "decode": 0.05,
+    "mesh": 0.1,
+    "export": 0.2,
+    "render": 0.3,
+    "hash": 0.9,
+    "geometry_check": 0.95,
+    "complete": 1.0,
+}
+
+
+def progress_path(root: Path) -> Path:
+    return root / PROGRESS_FILE
+
+
+def _peak_rss_bytes() -> Optional[int]:
+    """High-water resident set size of this process (VmHWM; resettable per stage on Linux)."""
+    try:
+        with open("/proc/self/status", "rb") as fh:
+            for line in fh:
+                if line.startswith(b"VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    # ru_maxrss is KiB on Linux and cannot be reset: a lifetime peak.
+    return int(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss) * 1024
+
+
+def _reset_peak_rss() -> None:
+    try:
+        with open("/proc/self/clear_refs", "w") as fh:
+            fh.write("5")
+    except OSError:
+        pass
+
+
+class JobProgress:
+    """
+    Stage-level progress of one running job, written to <job>/progress.json.
+
+    Each report replaces the small sidecar atomically; job.json, the manifest
+    and the index are left alone, so progress costs no contract validation.
+    Every stage is also timed (wall, process CPU, peak RSS); see `finish()`.
+    """
+
+    def __init__(self, root: Path) -> None:
+        self.root = root
+        self.path = progress_path(root)
+        self.stage: Optional[str] = None
+        self._history: List[Dict[str, str]] = []
+        self.timings: List[Dict[str, Any]] = []
+        self._started = (time.perf_counter(), time.process_time())
+
+    def _close_stage(self) -> None:
+        if self.stage is None:
+            return
+        wall0, cpu0 = self._started
+        self.timings.append(
+            {
+                "stage": self.stage,
+                "wall_s": round(time.perf_counter() - wall0, 6),
+                "cpu_s": round(time.process_time() - cpu0, 6),
+                "peak_rss_bytes": _peak_rss_bytes(),
+            }
+        )
+
+    def _open_stage(self, stage: str) -> None:
+        _reset_peak_rss()
+        self.stage = stage
+        self._started = (time.perf_counter(), time.process_time())
+
+    def finish(self) -> List[Dict[str, Any]]:
+        """Close the running stage; per-stage wall_s, cpu_s and peak_rss_bytes in order."""
+        self._close_stage()
+        self.stage = None
+        return self.timings
+
+    def report(self, stage: str) -> None:
+        if stage not in STAGES:
+            raise ValueError(f"unknown stage: {stage}")
+        if stage == self.stage:
+            return
+        at = now_iso()
+        self._close_stage()
+        self._open_stage(stage)
+        self._history.append({"stage": stage, "started_at": at})
+        doc = {
+            "stage": stage,
+            "progress": STAGES[stage],
+            "updated_at": at,
+            "stages": self._history,
+        }
+        try:
+            write_json_atomic(self.path, doc)
+        except OSError as exc:
+            # Progress is informational; it must never fail the job.
+            print(f"[worker] progress write failed for {self.path.parent.name}: {exc}")
+
+
+_current: ContextVar[Optional[JobProgress]] = ContextVar("hse_job_progress", default=None)
+
+
+@contextmanager
+def progress_scope(root: Path) -> Iterator[JobProgress]:
+    """Within the block, report_stage() records progress for the job at `root`."""
+    tracker = JobProgress(root)
+    token = _current.set(tracker)
+    try:
+        yield tracker
+    finally:
+        _current.reset(token)
+
+
+def report_stage(stage: str) -> None:
+    """Mark the start of `stage` for the job in scope (no-op outside a progress_scope)."""
+    tracker = _current.get()
+    if tracker is not None:
+        tracker.report(stage)
+
+
+def write_timings(root: Path, doc: Dict[str, Any]) -> None:
+    """Best-effort <job>/timings.json (the job contracts do not allow extra fields)."""
+    try:
+        write_json_atomic(root / TIMINGS_FILE, doc)
+    except OSError as exc:
+        print(f"[worker] timings write failed for {root.name}: {exc}")
+
+
+def read_progress(root: Path) -> Optional[Dict[str, Any]]:
+    """The job's last progress report, or None when there is none (or it is unreadable)."""
+    try:
+        doc = json.loads(progress_path(root).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    return doc if isinstance(doc, dict) and doc.get("stage") in STAGES else None
+
+
+__all__ = [
+    "JobProgress",
+    "PROGRESS_FILE",
+    "STAGES",
+    "TIMINGS_FILE",
+    "progress_path",
+    "progress_scope",
+    "read_progress",
+    "report_stage",
+    "write_timings",
+]
@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from hse.fs.paths import job_dir
+
+
+def _nonempty(p: Path) -> bool:
+    return p.exists() and p.is_file() and p.stat().st_size > 0
+
+
+def normalized_target(value: Optional[str]) -> str:
+    val = (value or "tile").strip().lower()
+    if val == "board_case":
+        return "board_case"
+    if val == "pi4b_case":
+        return "pi4b_case"
+    return "tile"
+
+
+def normalized_emboss_mode(value: Optional[str], *, target: str) -> str:
+    val = (value or "").strip().lower()
+    if target in {"pi4b_case", "board_case"}:
+        if val in {"panel", "lid", "both"}:
+            return val
+        return "lid"
+    return "tile"
+
+
+def infer_status_from_files(
+    job_id: str,
+    *,
+    subfolder: Optional[str] = None,
+    doc: Optional[Dict[str, Any]] = None,
+) -> str:
+    """Status from job.json + output files; pass `doc` when job.json is already parsed."""
+    root = job_dir(job_id, subfolder=subfolder)
+
+    hero = root / "previews" / "hero.png"
+    stl  = root / "enclosure" / "enclosure.stl"
+    tex  = root / "textures" / "texture.png"
+    hmap = root / "textures" / "heightmap.png"
+    job_json = root / "job.json"
+
+    job_status_hint: Optional[str] = None
+    params: Dict[str, Any] = {}
+    if doc is None and job_json.exists():
+        try:
+            doc = json.loads(job_json.read_text(encoding="utf-8"))
+        except Exception:
+            doc = None
+    if isinstance(doc, dict):
+        job_status_hint = doc.get("status")
+        params = doc.get("params") or {}
+
+    target = normalized_target((params or {}).get("target"))
+    emboss_mode = normalized_emboss_mode((params or {}).get("emboss_mode"), target=target)
+
+    # 🚫 Respect explicit failure recorded in job.json
+    if job_status_hint == "failed":
+        return "failed"
+
+    # ✅ COMPLETE only when required outputs exist AND are non-empty
+    required_files = [hero, tex, hmap]
+    if target in {"pi4b_case", "board_case"}:
+        required_files.append(root / "pi4b_case_base.stl")
+        required_files.append(root / "pi4b_case_lid.stl")
+        if emboss_mode in {"panel", "both"}:
+            required_files.append(root / "pi4b_case_panel.stl")
+    else:
+        required_files.append(stl)
+
+    if all(_nonempty(p) for p in required_files):
+        return "complete"
+
+    # If someone wrote "complete" prematurely, downgrade to failed to avoid
+    # falsely advertising downloadable assets that do not exist yet.
+    if job_status_hint == "complete":
+        return "failed"
+
+    # 🔄 RUNNING once work has visibly started
+    if (
+        (root / "textures").exists()
+        or (root / "enclosure").exists()
+        or job_status_hint == "running"
+    ):
+        return "running"
+
+    # ⏳ Otherwise still queued (or defer to hint)
+    if job_status_hint in {"queued", "failed"}:
+        return job_status_hint
+    return "queued"
+
+
+__all__ = ["infer_status_from_files", "normalized_emboss_mode", "normalized_target"]
@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+from hse.fs.progress import progress_path
+
+# HSE_STATUS_CACHE=0 disables the in-process GET /jobs/{job_id} envelope cache.
+STATUS_CACHE_ENABLED = os.getenv("HSE_STATUS_CACHE", "1").strip().lower() not in {"0", "false", "no", "off"}
+# Job envelopes kept in memory (least recently polled are dropped first).
+STATUS_CACHE_SIZE = max(1, int(os.getenv("HSE_STATUS_CACHE_SIZE", "4096")))
+
+# (inode, mtime_ns, size) of job.json, the manifest and progress.json (None while missing).
+_FileStamp = Tuple[int, int, int]
+Stamp = Tuple[_FileStamp, Optional[_FileStamp], Optional[_FileStamp]]
+
+
+def _file_stamp(path: Path) -> Optional[_FileStamp]:
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+    return st.st_ino, st.st_mtime_ns, st.st_size
+
+
+def status_stamp(root: Path) -> Optional[Stamp]:
+    """
+    Validator for a job folder's cached status: job.json, the manifest and the
+    progress sidecar are replaced atomically on every change, so a new
+    inode/mtime/size means a new status. None when job.json is missing
+    (nothing is cached for such jobs).
+    """
+    job_json = _file_stamp(root / "job.json")
+    if job_json is None:
+        return None
+    return job_json, _file_stamp(root / "job_manifest.json"), _file_stamp(progress_path(root))
+
+
+class StatusCache:
+    """Thread-safe LRU of status envelopes keyed by job folder and validated by status_stamp()."""
+
+    def __init__(self, max_entries: int = STATUS_CACHE_SIZE) -> None:
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Path, Tuple[Stamp, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, root: Path, stamp: Stamp) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(root)
+            if entry is None:
+                return None
+            if entry[0] != stamp:
+                del self._entries[root]
+                return None
+            self._entries.move_to_end(root)
+            return entry[1]
+
+    def put(self, root: Path, stamp: Stamp, envelope: Dict[str, Any]) -> None:
+        with self._lock:
+            self._entries[root] = (stamp, envelope)
+            self._entries.move_to_end(root)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def discard(self, root: Path) -> None:
+        with self._lock:
+            self._entries.pop(root, None)
+
+
+_cache: Optional[StatusCache] = None
+_cache_lock = threading.Lock()
+
+
+def status_cache() -> Optional[StatusCache]:
+    """Process-wide cache, or None when HSE_STATUS_CACHE=0."""
+    global _cache
+    if not STATUS_CACHE_ENABLED:
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = StatusCache()
+    return _cache
+
+
+__all__ = [
+    "STATUS_CACHE_ENABLED",
+    "STATUS_CACHE_SIZE",
+    "StatusCache",
+    "status_cache",
+    "status_stamp",
+]
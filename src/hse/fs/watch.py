@@ -0,0 +1,391 @@
+from __future__ import annotations
+
+import ctypes
+import ctypes.util
+import errno
+import os
+import select
+import struct
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Protocol, Set, Tuple
+
+from hse.fs.paths import job_dir
+
+# Set HSE_WORKER_WATCH=0 to force the polling fallback.
+WATCH_ENABLED = os.getenv("HSE_WORKER_WATCH", "1").strip().lower() not in {"0", "false", "no", "off"}
+# Full rescan safety net even when inotify is healthy (seconds, 0 = only at startup/overflow).
+RESCAN_SECONDS = float(os.getenv("HSE_WORKER_RESCAN_INTERVAL", "300"))
+
+# <sys/inotify.h>
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_DELETE_SELF = 0x00000400
+_IN_MOVE_SELF = 0x00000800
+_IN_Q_OVERFLOW = 0x00004000
+_IN_IGNORED = 0x00008000
+_IN_ONLYDIR = 0x01000000
+_IN_ISDIR = 0x40000000
+_IN_NONBLOCK = os.O_NONBLOCK
+_IN_CLOEXEC = getattr(os, "O_CLOEXEC", 0o2000000)
+_EVENT = struct.Struct("iIII")
+_DIR_MASK = _IN_CREATE | _IN_MOVED_TO | _IN_CLOSE_WRITE | _IN_DELETE_SELF | _IN_MOVE_SELF | _IN_ONLYDIR
+
+_JOB_JSON = "job.json"
+
+
+def _load_inotify():
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        init1 = libc.inotify_init1
+        add_watch = libc.inotify_add_watch
+        rm_watch = libc.inotify_rm_watch
+    except (OSError, AttributeError):
+        return None
+    init1.argtypes = [ctypes.c_int]
+    add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+    rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+    return init1, add_watch, rm_watch
+
+
+def _read_inotify(fd: int) -> List[Tuple[int, int, str]]:
+    """Every pending inotify event on a non-blocking fd as (wd, mask, name)."""
+    chunks: List[bytes] = []
+    while True:
+        try:
+            chunk = os.read(fd, 64 * 1024)
+        except BlockingIOError:
+            break
+        if not chunk:
+            break
+        chunks.append(chunk)
+    buf = b"".join(chunks)
+    events: List[Tuple[int, int, str]] = []
+    offset = 0
+    while offset + _EVENT.size <= len(buf):
+        wd, mask, _cookie, length = _EVENT.unpack_from(buf, offset)
+        raw = buf[offset + _EVENT.size: offset + _EVENT.size + length]
+        offset += _EVENT.size + length
+        events.append((wd, mask, raw.rstrip(b"\0").decode("utf-8", "surrogateescape")))
+    return events
+
+
+class HintSource(Protocol):
+    """Anything selectable that yields (job_id, subfolder) hints, e.g. utils.notify.NotifyListener."""
+
+    def fileno(self) -> int: ...
+
+    def drain(self) -> List[Tuple[str, Optional[str]]]: ...
+
+
+class JobWatcher:
+    """
+    Reports job folders whose job.json was written, without globbing the asset root.
+
+    Only the root, subfolders and freshly created job folders (until their job.json
+    lands) are watched, so the watch count does not grow with job history.
+
+    `poll(timeout)` returns:
+      - None: the caller should scan for queued jobs. `full_scan` is True when
+        the tree itself must be walked (first call, periodic rescan, inotify
+        queue overflow) and False for a polling-fallback tick, which may use a
+        cheaper source such as the job index;
+      - a set of job folders to evaluate (empty on timeout or `wake()`).
+    """
+
+    def __init__(
+        self,
+        root: Path,
+        *,
+        use_inotify: bool = WATCH_ENABLED,
+        rescan_seconds: float = RESCAN_SECONDS,
+        listener: Optional[HintSource] = None,
+    ) -> None:
+        self.root = root
+        self.listener = listener
+        self.rescan_seconds = rescan_seconds
+        self._fd: Optional[int] = None
+        self._api = _load_inotify() if use_inotify else None
+        self._watches: Dict[int, Path] = {}
+        self._by_path: Dict[Path, int] = {}
+        self._changed: Set[Path] = set()
+        self._needs_scan = True
+        self._last_scan = 0.0
+        self.full_scan = False
+        self._wake_r, self._wake_w = os.pipe()
+        os.set_blocking(self._wake_r, False)
+        os.set_blocking(self._wake_w, False)
+        if self._api is not None:
+            fd = self._api[0](_IN_NONBLOCK | _IN_CLOEXEC)
+            if fd >= 0:
+                self._fd = fd
+                self._sync_watches()
+            else:
+                self._api = None
+
+    @property
+    def mode(self) -> str:
+        return "inotify" if self._fd is not None else "poll"
+
+    def wake(self) -> None:
+        """Interrupt a blocking poll() from another thread."""
+        try:
+            os.write(self._wake_w, b"\0")
+        except BlockingIOError:
+            pass
+
+    def close(self) -> None:
+        for fd in (self._fd, self._wake_r, self._wake_w):
+            if fd is not None:
+                try:
+                    os.close(fd)
+                except OSError:
+                    pass
+        self._fd = None
+
+    # -- watch bookkeeping -------------------------------------------------
+
+    def _add(self, path: Path) -> bool:
+        if self._fd is None or path in self._by_path:
+            return path in self._by_path
+        wd = self._api[1](self._fd, os.fsencode(str(path)), _DIR_MASK)
+        if wd < 0:
+            err = ctypes.get_errno()
+            if err == errno.ENOSPC:
+                # Out of watches: degrade to scanning rather than missing jobs.
+                self._needs_scan = True
+            return False
+        self._watches[wd] = path
+        self._by_path[path] = wd
+        return True
+
+    def _remove(self, path: Path) -> None:
+        wd = self._by_path.pop(path, None)
+        if wd is None:
+            return
+        self._watches.pop(wd, None)
+        if self._fd is not None:
+            self._api[2](self._fd, wd)
+
+    def _track_new_dir(self, path: Path) -> None:
+        """Watch a new folder until it shows up as a job (job.json) or stays a subfolder."""
+        self._add(path)
+        # job.json may already exist if it landed before the watch was placed.
+        if (path / _JOB_JSON).is_file():
+            self._changed.add(path)
+            self._remove(path)
+            return
+        # A subfolder created with its first job already inside.
+        if path.parent == self.root:
+            try:
+                children = [c for c in path.iterdir() if c.is_dir()]
+            except OSError:
+                children = []
+            for child in children:
+                self._track_new_dir(child)
+
+    def _sync_watches(self) -> None:
+        """Watch the root and every subfolder (root-level folders without job.json)."""
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._add(self.root)
+        try:
+            entries = list(os.scandir(self.root))
+        except OSError:
+            return
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False) and not entry.name.startswith("."):
+                path = Path(entry.path)
+                if not (path / _JOB_JSON).exists():
+                    self._add(path)
+
+    # -- event loop --------------------------------------------------------
+
+    def _drain_wake(self) -> bool:
+        woke = False
+        try:
+            while os.read(self._wake_r, 512):
+                woke = True
+        except BlockingIOError:
+            pass
+        return woke
+
+    def _read_events(self) -> None:
+        new_dirs: List[Path] = []
+        for wd, mask, name in _read_inotify(self._fd):
+            if mask & _IN_Q_OVERFLOW:
+                self._needs_scan = True
+                continue
+            parent = self._watches.get(wd)
+            if parent is None:
+                continue
+            if mask & _IN_IGNORED or mask & (_IN_DELETE_SELF | _IN_MOVE_SELF):
+                self._watches.pop(wd, None)
+                self._by_path.pop(parent, None)
+                continue
+            if mask & _IN_ISDIR:
+                # New folders matter only in the root (job or subfolder) or in a subfolder (job).
+                in_layout = parent == self.root or parent.parent == self.root
+                if in_layout and not name.startswith(".") and mask & (_IN_CREATE | _IN_MOVED_TO):
+                    new_dirs.append(parent / name)
+                continue
+            if name == _JOB_JSON and parent != self.root:
+                self._changed.add(parent)
+                # Job folders are watched only until their job.json lands.
+                self._remove(parent)
+
+        for path in new_dirs:
+            self._track_new_dir(path)
+
+    def _drain_hints(self) -> bool:
+        if self.listener is None:
+            return False
+        found = False
+        for job_id, subfolder in self.listener.drain():
+            try:
+                self._changed.add(job_dir(job_id, subfolder=subfolder))
+                found = True
+            except ValueError:
+                continue
+        return found
+
+    def _wait_fds(self) -> List[int]:
+        fds = [self._wake_r]
+        if self._fd is not None:
+            fds.append(self._fd)
+        if self.listener is not None:
+            fds.append(self.listener.fileno())
+        return fds
+
+    def poll(self, timeout: float) -> Optional[Set[Path]]:
+        now = time.monotonic()
+        if self.rescan_seconds > 0 and now - self._last_scan >= self.rescan_seconds:
+            self._needs_scan = True
+
+        if self._fd is None:
+            if not self._needs_scan:
+                select.select(self._wait_fds(), [], [], max(timeout, 0.0))
+                woke = self._drain_wake()
+                if self._drain_hints() or woke:
+                    changed, self._changed = self._changed, set()
+                    return changed
+            # Polling fallback: every timeout is a scan; startup and rescans walk the tree.
+            self.full_scan = self._needs_scan
+            if self._needs_scan:
+                self._last_scan = time.monotonic()
+            self._needs_scan = False
+            self._changed.clear()
+            return None
+
+        if not self._needs_scan and not self._changed:
+            select.select(self._wait_fds(), [], [], max(timeout, 0.0))
+        self._drain_wake()
+        self._drain_hints()
+        self._read_events()
+
+        if self._needs_scan:
+            self._needs_scan = False
+            self._changed.clear()
+            self._sync_watches()
+            self._last_scan = time.monotonic()
+            self.full_scan = True
+            return None
+
+        changed, self._changed = self._changed, set()
+        return changed
+
+
+class DirWatcher:
+    """
+    inotify on an explicit, changing set of directories (e.g. the job folders
+    API clients are following). `drain()` returns the folders in which a file
+    was written or renamed into place since the last call, plus folders that
+    were deleted or moved away. Watches are reference counted.
+
+    Without inotify `available` is False and nothing is ever reported; callers
+    must keep re-checking on a timer.
+    """
+
+    _MASK = _IN_CLOSE_WRITE | _IN_MOVED_TO | _IN_DELETE_SELF | _IN_MOVE_SELF | _IN_ONLYDIR
+
+    def __init__(self, *, use_inotify: bool = WATCH_ENABLED) -> None:
+        self._api = _load_inotify() if use_inotify else None
+        self._fd: Optional[int] = None
+        self._watches: Dict[int, Path] = {}
+        self._by_path: Dict[Path, Tuple[int, int]] = {}  # path -> (wd, refs)
+        if self._api is not None:
+            fd = self._api[0](_IN_NONBLOCK | _IN_CLOEXEC)
+            if fd >= 0:
+                self._fd = fd
+
+    @property
+    def available(self) -> bool:
+        return self._fd is not None
+
+    def fileno(self) -> int:
+        if self._fd is None:
+            raise ValueError("inotify unavailable")
+        return self._fd
+
+    def add(self, path: Path) -> bool:
+        """Start (or share) a watch on `path`; False when it cannot be watched."""
+        if self._fd is None:
+            return False
+        held = self._by_path.get(path)
+        if held is not None:
+            self._by_path[path] = (held[0], held[1] + 1)
+            return True
+        wd = self._api[1](self._fd, os.fsencode(str(path)), self._MASK)
+        if wd < 0:
+            return False
+        self._watches[wd] = path
+        self._by_path[path] = (wd, 1)
+        return True
+
+    def discard(self, path: Path) -> None:
+        held = self._by_path.get(path)
+        if held is None:
+            return
+        wd, refs = held
+        if refs > 1:
+            self._by_path[path] = (wd, refs - 1)
+            return
+        del self._by_path[path]
+        self._watches.pop(wd, None)
+        if self._fd is not None:
+            self._api[2](self._fd, wd)
+
+    def drain(self) -> Set[Path]:
+        if self._fd is None:
+            return set()
+        changed: Set[Path] = set()
+        for wd, mask, _name in _read_inotify(self._fd):
+            if mask & _IN_Q_OVERFLOW:
+                # Lost events: report everything so every waiter re-checks.
+                changed.update(self._by_path)
+                continue
+            path = self._watches.get(wd)
+            if path is None:
+                continue
+            changed.add(path)
+            if mask & _IN_IGNORED:
+                # The kernel dropped the watch (folder deleted/unmounted).
+                self._watches.pop(wd, None)
+                self._by_path.pop(path, None)
+        return changed
+
+    def close(self) -> None:
+        if self._fd is not None:
+            try:
+                os.close(self._fd)
+            except OSError:
+                pass
+        self._fd = None
+        self._watches.clear()
+        self._by_path.clear()
+
+
+__all__ = ["WATCH_ENABLED", "RESCAN_SECONDS", "DirWatcher", "HintSource", "JobWatcher"]
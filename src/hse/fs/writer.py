@@ -1,33 +1,19 @@
 from __future__ import annotations
 
 import json
+import os
+import shutil
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple
 
-from hse.contracts import validate_contract
+from hse.contracts import maybe_validate_contract
 from hse.contracts.envelopes import job_manifest_v1, now_iso
+from hse.fs.index import record_job
 from hse.fs.paths import job_dir, job_json_path, manifest_path, public_root, sanitize_subfolder
+from hse.fs.status import normalized_emboss_mode, normalized_target
 from hse.utils.boards import default_board_case_id, load_board_def
 
 
-def _normalized_target(value: Optional[str]) -> str:
-    val = (value or "tile").strip().lower()
-    if val == "board_case":
-        return "board_case"
-    if val == "pi4b_case":
-        return "pi4b_case"
-    return "tile"
-
-
-def _normalized_emboss_mode(value: Optional[str], *, target: str) -> str:
-    val = (value or "").strip().lower()
-    if target in {"pi4b_case", "board_case"}:
-        if val in {"panel", "lid", "both"}:
-            return val
-        return "lid"
-    return "tile"
-
-
 def _normalized_board_id(value: Optional[str]) -> str:
     try:
         board_id = (value or "").strip().lower()
@@ -45,6 +31,48 @@ def write_json_atomic(path: Path, obj: Any) -> None:
     tmp.replace(path)
 
 
+# FICLONE ioctl (linux/fs.h): share extents copy-on-write on btrfs/XFS/overlayfs.
+_FICLONE = 0x40049409
+
+
+def _reflink(src: Path, dest: Path) -> bool:
+    try:
+        import fcntl
+    except ImportError:
+        return False
+    try:
+        with src.open("rb") as s, dest.open("wb") as d:
+            fcntl.ioctl(d.fileno(), _FICLONE, s.fileno())
+        return True
+    except OSError:
+        dest.unlink(missing_ok=True)
+        return False
+
+
+def link_or_copy(src: Path, dest: Path) -> str:
+    """
+    Materialize `src` at `dest` without rewriting bytes when possible.
+
+    Hardlinks share the inode, so `dest` is unlinked first rather than written
+    through (which would mutate the shared source). Where links are not
+    permitted a reflink (copy-on-write clone) is tried, then a plain copy.
+    Returns "link", "reflink" or "copy".
+    """
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    dest.unlink(missing_ok=True)
+    try:
+        os.link(src, dest)
+        return "link"
+    except OSError:
+        pass
+    tmp = dest.with_name(f".{dest.name}.{os.getpid()}.tmp")
+    mode = "reflink" if _reflink(src, tmp) else "copy"
+    if mode == "copy":
+        shutil.copyfile(src, tmp)
+    tmp.replace(dest)
+    return mode
+
+
 def _default_public_manifest(public_base: str, *, target: str = "tile", emboss_mode: str = "tile", board_id: Optional[str] = None) -> Dict[str, Any]:
     """
     Build a contract-shaped `public` object for job_manifest.schema.json.
@@ -259,8 +287,8 @@ def write_manifest(
         )
 
     job_root = job_dir(job_id, subfolder=subfolder)
-    target = _normalized_target(target)
-    emboss_mode = _normalized_emboss_mode(emboss_mode, target=target)
+    target = normalized_target(target)
+    emboss_mode = normalized_emboss_mode(emboss_mode, target=target)
     board_id = _normalized_board_id(board_id)
     if target in {"board_case"}:
         load_board_def(board_id)
@@ -293,7 +321,8 @@ def write_manifest(
 
     p = manifest_path(job_id, subfolder=subfolder)
 
-    validate_contract(doc, "job_manifest.schema.json")
+    # The finished manifest (complete or failed) is always validated; drafts may be sampled.
+    maybe_validate_contract(doc, "job_manifest.schema.json", final=finished_at is not None)
 
     write_json_atomic(p, doc)
     return p
@@ -311,18 +340,22 @@ def write_surface_job_json(
     params: Dict[str, Any],
     artifacts: Optional[Dict[str, Any]] = None,
     error: Optional[Dict[str, Any]] = None,
+    checksum: Optional[str] = None,
+    index: bool = True,
 ) -> Path:
     """
-    Writes job.json (Surface v1 job document).
+    Writes job.json (Surface v1 job document) and mirrors it into the job index.
 
     NOTE: This intentionally keeps URLs relative and uses the canonical
-    /assets/surface/<subfolder?>/<job_id> base.
+    /assets/surface/<subfolder?>/<job_id> base. `checksum` (input heightmap
+    sha256) is recorded in the index only; job.json's shape is unchanged.
+    `index=False` skips the index upsert for callers that batch it (record_jobs).
     """
     subfolder = sanitize_subfolder(subfolder)
     updated_at = updated_at or now_iso()
 
-    target = _normalized_target((params or {}).get("target"))
-    emboss_mode = _normalized_emboss_mode((params or {}).get("emboss_mode"), target=target)
+    target = normalized_target((params or {}).get("target"))
+    emboss_mode = normalized_emboss_mode((params or {}).get("emboss_mode"), target=target)
     board_id = _normalized_board_id((params or {}).get("board")) if target in {"board_case"} else None
     if target == "board_case":
         load_board_def(board_id)
@@ -348,13 +381,25 @@ def write_surface_job_json(
 
     p = job_json_path(job_id, subfolder=subfolder)
 
-    validate_contract(doc, "job_json.schema.json")
+    maybe_validate_contract(doc, "job_json.schema.json", final=status in {"complete", "failed"})
 
     write_json_atomic(p, doc)
+    if not index:
+        return p
+    record_job(
+        job_id=job_id,
+        subfolder=subfolder,
+        status=status,
+        target=target,
+        created_at=created_at,
+        updated_at=updated_at,
+        checksum=checksum,
+    )
     return p
 
 
 __all__ = [
+    "link_or_copy",
     "write_json_atomic",
     "write_manifest",
     "write_surface_job_json",
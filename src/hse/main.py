@@ -1,9 +1,10 @@
 from __future__ import annotations
 
 import os
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 
 from hse.fs.paths import assets_root
+from hse.metrics import CONTENT_TYPE, render_metrics
 
 ROOT_PATH = os.getenv("ROOT_PATH", "/api/surface")
 
@@ -22,6 +23,11 @@ def health():
     return {"ok": True, "service": "hexforge-glyphengine"}
 
 
+@app.get(f"{ROOT_PATH}/metrics", include_in_schema=False)
+def metrics():
+    return Response(render_metrics(), media_type=CONTENT_TYPE)
+
+
 # Mount job routes (contracts-v1)
 from hse.routes.jobs import router as jobs_router  # noqa: E402
 
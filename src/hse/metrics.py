@@ -0,0 +1,276 @@
+from __future__ import annotations
+
+import bisect
+import math
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from hse.fs.index import job_index
+
+# Port of the worker's /metrics listener (0 disables it). The API serves /metrics itself.
+WORKER_METRICS_PORT = int(os.getenv("HSE_WORKER_METRICS_PORT", "9464"))
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+_Labels = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if value == int(value) and abs(value) < 1e15:
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, object]) -> _Labels:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {sorted(labels)}")
+        return tuple(str(labels[n]) for n in self.labelnames)
+
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self.samples())
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()) -> None:
+        super().__init__(name, help, labelnames)
+        self._values: Dict[_Labels, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: object) -> None:
+        if amount < 0:
+            raise ValueError("counters only go up")
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, k)} {_format_value(v)}" for k, v in items]
+
+
+class Gauge(_Metric):
+    """Set directly, or computed at scrape time by `collect` ({label values: value})."""
+
+    kind = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: Sequence[str] = (),
+        *,
+        collect: Optional[Callable[[], Dict[_Labels, float]]] = None,
+    ) -> None:
+        super().__init__(name, help, labelnames)
+        self._values: Dict[_Labels, float] = {}
+        self._collect = collect
+
+    def set(self, value: float, **labels: object) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+    def inc(self, amount: float = 1.0, **labels: object) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels: object) -> None:
+        self.inc(-amount, **labels)
+
+    def samples(self) -> List[str]:
+        if self._collect is not None:
+            try:
+                values = self._collect()
+            except Exception as exc:
+                print(f"[metrics] {self.name} collection failed: {exc}")
+                values = {}
+        else:
+            with self._lock:
+                values = dict(self._values)
+        return [f"{self.name}{_format_labels(self.labelnames, k)} {_format_value(v)}" for k, v in sorted(values.items())]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), *, buckets: Iterable[float]) -> None:
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(float(b) for b in buckets))
+        # label values -> (per-bucket counts incl. +Inf, sum)
+        self._values: Dict[_Labels, Tuple[List[int], float]] = {}
+
+    def observe(self, value: float, **labels: object) -> None:
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts, total = self._values.get(key) or ([0] * (len(self.buckets) + 1), 0.0)
+            counts[index] += 1
+            self._values[key] = (counts, total + value)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = sorted((k, (list(c), s)) for k, (c, s) in self._values.items())
+        lines: List[str] = []
+        for key, (counts, total) in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                le = 'le="' + _format_value(bound) + '"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {cumulative}")
+        return lines
+
+
+class Registry:
+    def __init__(self) -> None:
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"duplicate metric: {metric.name}")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        """Prometheus text exposition format (0.0.4)."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return "\n".join(m.render() for m in metrics) + "\n"
+
+
+REGISTRY = Registry()
+
+_STAGE_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+_JOB_BUCKETS = (0.1, 0.25, 0.5, 1, 2, 5, 10, 20, 30, 60, 120, 300, 600)
+_RSS_BUCKETS = tuple(mib * 1024 * 1024 for mib in (64, 128, 256, 512, 768, 1024, 1536, 2048, 4096, 8192))
+
+
+def _index_counts() -> Dict[_Labels, float]:
+    idx = job_index()
+    if idx is None:
+        return {}
+    counts = idx.counts_by_status()
+    return {(status,): float(counts.get(status, 0)) for status in ("queued", "running", "complete", "failed")}
+
+
+def _queue_depth() -> Dict[_Labels, float]:
+    counts = _index_counts()
+    return {(): counts[("queued",)]} if counts else {}
+
+
+JOBS = REGISTRY.register(Gauge("hse_jobs", "Jobs in the job index by status.", ("status",), collect=_index_counts))
+QUEUE_DEPTH = REGISTRY.register(Gauge("hse_job_queue_depth", "Queued jobs waiting for a worker.", collect=_queue_depth))
+JOBS_CREATED = REGISTRY.register(Counter("hse_jobs_created_total", "Jobs accepted by the API (POST /jobs and /jobs:batch)."))
+JOBS_FINISHED = REGISTRY.register(
+    Counter("hse_jobs_finished_total", "Jobs finished by this worker.", ("target", "emboss_mode", "status"))
+)
+JOB_FAILURES = REGISTRY.register(
+    Counter("hse_job_failures_total", "Failed jobs by error code.", ("code",))
+)
+JOBS_IN_FLIGHT = REGISTRY.register(Gauge("hse_worker_jobs_in_flight", "Jobs this worker is running now."))
+DOWNLOAD_BYTES = REGISTRY.register(Counter("hse_download_bytes_total", "Heightmap bytes received over the network."))
+JOB_SECONDS = REGISTRY.register(
+    Histogram("hse_job_duration_seconds", "Wall time of a whole job.", ("target", "emboss_mode", "status"), buckets=_JOB_BUCKETS)
+)
+STAGE_SECONDS = REGISTRY.register(
+    Histogram("hse_job_stage_seconds", "Wall time per job stage.", ("stage", "target", "emboss_mode"), buckets=_STAGE_BUCKETS)
+)
+STAGE_CPU_SECONDS = REGISTRY.register(
+    Histogram("hse_job_stage_cpu_seconds", "Process CPU time per job stage.", ("stage", "target", "emboss_mode"), buckets=_STAGE_BUCKETS)
+)
+JOB_PEAK_RSS = REGISTRY.register(
+    Histogram("hse_job_peak_rss_bytes", "Peak resident memory of the job process during a job.", ("target", "emboss_mode"), buckets=_RSS_BUCKETS)
+)
+
+
+def render_metrics() -> str:
+    return REGISTRY.render()
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self) -> None:  # noqa: N802 - http.server naming
+        if self.path.split("?", 1)[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = render_metrics().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: object) -> None:
+        return  # scrapes every few seconds would flood the worker log
+
+
+def start_metrics_server(port: int = WORKER_METRICS_PORT, host: str = "0.0.0.0") -> Optional[ThreadingHTTPServer]:
+    """Serve GET /metrics from a daemon thread; None when disabled or the port is taken."""
+    if port <= 0:
+        return None
+    try:
+        server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    except OSError as exc:
+        print(f"[metrics] cannot listen on {host}:{port} ({exc}); worker metrics disabled")
+        return None
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="hse-metrics", daemon=True).start()
+    return server
+
+
+__all__ = [
+    "CONTENT_TYPE",
+    "Counter",
+    "DOWNLOAD_BYTES",
+    "Gauge",
+    "Histogram",
+    "JOBS",
+    "JOBS_CREATED",
+    "JOBS_FINISHED",
+    "JOBS_IN_FLIGHT",
+    "JOB_FAILURES",
+    "JOB_PEAK_RSS",
+    "JOB_SECONDS",
+    "QUEUE_DEPTH",
+    "REGISTRY",
+    "Registry",
+    "STAGE_CPU_SECONDS",
+    "STAGE_SECONDS",
+    "WORKER_METRICS_PORT",
+    "render_metrics",
+    "start_metrics_server",
+]
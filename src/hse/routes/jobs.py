@@ -1,43 +1,51 @@
 from __future__ import annotations
 
+import base64
+import hashlib
 import json
+import os
 import secrets
-from typing import Any, Dict, Optional
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
 
-from fastapi import APIRouter, HTTPException, Request
+from fastapi import APIRouter, HTTPException, Request, Response
 
 from hse.contracts.envelopes import job_status, now_iso
-from hse.contracts import validate_contract
+from hse.contracts import maybe_validate_contract
+from hse.fs.aio import run_disk_io
+from hse.fs.index import JobRecord, job_index, record_job, record_jobs
+from hse.fs.job_events import job_event_hub
 from hse.fs.paths import assert_valid_job_id, job_dir, manifest_path, public_root, sanitize_subfolder
+from hse.fs.progress import read_progress
+from hse.fs.status import infer_status_from_files, normalized_emboss_mode, normalized_target
+from hse.fs.status_cache import status_cache, status_stamp
 from hse.fs.writer import write_manifest, write_surface_job_json
-from hse.utils.boards import default_board_case_id
-from fastapi.responses import JSONResponse
+from hse.metrics import JOBS_CREATED
+from hse.utils.boards import default_board_case_id, load_board_def
+from hse.utils.notify import notify_job_queued, notify_jobs_queued
+from fastapi.responses import JSONResponse, StreamingResponse
 
 
 
 router = APIRouter(tags=["surface"])
 
+# Most jobs accepted by one POST /jobs:batch request.
+BATCH_MAX_JOBS = max(1, int(os.getenv("HSE_BATCH_MAX_JOBS", "100")))
+# GET /jobs page size: default and the most a client may ask for.
+LIST_DEFAULT_LIMIT = 50
+LIST_MAX_LIMIT = max(1, int(os.getenv("HSE_LIST_MAX_LIMIT", "500")))
 
-def _nonempty(p):
-    return p.exists() and p.is_file() and p.stat().st_size > 0
+# Longest a GET /jobs/{job_id}?wait= request is held.
+LONGPOLL_MAX_SECONDS = float(os.getenv("HSE_LONGPOLL_MAX_SECONDS", "60"))
+# SSE: idle keep-alive comment interval, and how long one stream lives before the client reconnects.
+EVENTS_HEARTBEAT_SECONDS = float(os.getenv("HSE_EVENTS_HEARTBEAT_SECONDS", "15"))
+EVENTS_MAX_SECONDS = float(os.getenv("HSE_EVENTS_MAX_SECONDS", "3600"))
 
-
-def _normalized_target(value):
-    val = (value or "tile").strip().lower()
-    if val == "board_case":
-        return "board_case"
-    if val == "pi4b_case":
-        return "pi4b_case"
-    return "tile"
-
-
-def _normalized_emboss_mode(value, *, target: str):
-    val = (value or "").strip().lower()
-    if target in {"pi4b_case", "board_case"}:
-        if val in {"panel", "lid", "both"}:
-            return val
-        return "lid"
-    return "tile"
+_JOB_STATUSES = {"queued", "running", "complete", "failed"}
+_TERMINAL_STATUSES = {"complete", "failed"}
 
 
 def _normalized_board_id(value):
@@ -50,65 +58,6 @@ def _normalized_board_id(value):
     return bid
 
 
-def infer_status_from_files(job_id: str, *, subfolder: Optional[str] = None) -> str:
-    root = job_dir(job_id, subfolder=subfolder)
-
-    hero = root / "previews" / "hero.png"
-    stl  = root / "enclosure" / "enclosure.stl"
-    tex  = root / "textures" / "texture.png"
-    hmap = root / "textures" / "heightmap.png"
-    job_json = root / "job.json"
-
-    job_status_hint: Optional[str] = None
-    params: Dict[str, Any] = {}
-    if job_json.exists():
-        try:
-            doc = json.loads(job_json.read_text(encoding="utf-8"))
-            job_status_hint = doc.get("status") if isinstance(doc, dict) else None
-            params = doc.get("params") if isinstance(doc, dict) else {}
-        except Exception:
-            job_status_hint = None
-            params = {}
-
-    target = _normalized_target((params or {}).get("target"))
-    emboss_mode = _normalized_emboss_mode((params or {}).get("emboss_mode"), target=target)
-
-    # 🚫 Respect explicit failure recorded in job.json
-    if job_status_hint == "failed":
-        return "failed"
-
-    # ✅ COMPLETE only when required outputs exist AND are non-empty
-    required_files = [hero, tex, hmap]
-    if target in {"pi4b_case", "board_case"}:
-        required_files.append(root / "pi4b_case_base.stl")
-        required_files.append(root / "pi4b_case_lid.stl")
-        if emboss_mode in {"panel", "both"}:
-            required_files.append(root / "pi4b_case_panel.stl")
-    else:
-        required_files.append(stl)
-
-    if all(_nonempty(p) for p in required_files):
-        return "complete"
-
-    # If someone wrote "complete" prematurely, downgrade to failed to avoid
-    # falsely advertising downloadable assets that do not exist yet.
-    if job_status_hint == "complete":
-        return "failed"
-
-    # 🔄 RUNNING once work has visibly started
-    if (
-        (root / "textures").exists()
-        or (root / "enclosure").exists()
-        or job_status_hint == "running"
-    ):
-        return "running"
-
-    # ⏳ Otherwise still queued (or defer to hint)
-    if job_status_hint in {"queued", "failed"}:
-        return job_status_hint
-    return "queued"
-
-
 @router.post("/jobs")
 async def create_job(req: Request) -> Dict[str, Any]:
     """
@@ -121,64 +70,396 @@ async def create_job(req: Request) -> Dict[str, Any]:
       - job_manifest.json (contract-valid manifest)    [no status inside]
     """
     body = await req.json()
+    return await run_disk_io(_create_job, body)
+
+
+@dataclass(frozen=True)
+class _NewJob:
+    job_id: str
+    subfolder: Optional[str]
+    created_at: str
+    target: str
+    emboss_mode: str
+    board_id: Optional[str]
+    params: Dict[str, Any]
+
+
+def _new_job(body: Dict[str, Any]) -> _NewJob:
+    target = normalized_target(body.get("target"))
+    return _NewJob(
+        job_id=secrets.token_hex(8),
+        subfolder=sanitize_subfolder(body.get("subfolder", None)),
+        created_at=now_iso(),
+        target=target,
+        emboss_mode=normalized_emboss_mode(body.get("emboss_mode"), target=target),
+        board_id=_normalized_board_id(body.get("board")) if target == "board_case" else None,
+        params=body or {},
+    )
 
-    job_id = secrets.token_hex(8)
-    subfolder = sanitize_subfolder(body.get("subfolder", None))
-    created_at = now_iso()
-    target = _normalized_target(body.get("target"))
-    emboss_mode = _normalized_emboss_mode(body.get("emboss_mode"), target=target)
-    board_id = _normalized_board_id(body.get("board")) if target == "board_case" else None
 
+def _write_new_job(job: _NewJob, *, index: bool = True) -> None:
     # Write Surface v1 job.json immediately (public doc exists from creation)
     write_surface_job_json(
-        job_id=job_id,
-        subfolder=subfolder,
+        job_id=job.job_id,
+        subfolder=job.subfolder,
         status="queued",
-        created_at=created_at,
-        updated_at=created_at,
-        params=body or {},
+        created_at=job.created_at,
+        updated_at=job.created_at,
+        params=job.params,
         artifacts=None,
+        index=index,
     )
 
     # Write contract-valid manifest immediately
     # IMPORTANT: do NOT pass public={} (schema requires full public object)
     write_manifest(
-        job_id=job_id,
-        subfolder=subfolder,
-        updated_at=created_at,
-        created_at=created_at,
-        target=target,
-        emboss_mode=emboss_mode,
-        board_id=board_id,
+        job_id=job.job_id,
+        subfolder=job.subfolder,
+        updated_at=job.created_at,
+        created_at=job.created_at,
+        target=job.target,
+        emboss_mode=job.emboss_mode,
+        board_id=job.board_id,
         # public=None -> writer builds the default contract-shaped public object
     )
 
-    pub_root = public_root(job_id, subfolder=subfolder)
 
+def _queued_envelope(job: _NewJob) -> Dict[str, Any]:
+    pub_root = public_root(job.job_id, subfolder=job.subfolder)
+    return _status_envelope(job.job_id, "queued", job.created_at, pub_root)
+
+
+def _create_job(body: Dict[str, Any]) -> Dict[str, Any]:
+    job = _new_job(body)
+    _write_new_job(job)
+    # Wake idle workers now instead of waiting for their next watch/poll cycle.
+    JOBS_CREATED.inc()
+    notify_job_queued(job.job_id, job.subfolder)
+    return _queued_envelope(job)
+
+
+@router.post("/jobs:batch")
+async def create_jobs_batch(req: Request) -> List[Dict[str, Any]]:
+    """
+    Create several jobs in one request.
+
+    Body is a JSON array of POST /jobs bodies (at most HSE_BATCH_MAX_JOBS).
+    Every entry is checked before anything is written, so a bad entry rejects
+    the whole batch with 400. Returns the job_status envelopes in input order.
+    """
+    body = await req.json()
+    return await run_disk_io(_create_jobs_batch, body)
+
+
+def _create_jobs_batch(bodies: Any) -> List[Dict[str, Any]]:
+    if not isinstance(bodies, list):
+        raise HTTPException(status_code=400, detail="batch body must be a JSON array of job bodies")
+    if len(bodies) > BATCH_MAX_JOBS:
+        raise HTTPException(status_code=413, detail=f"batch holds {len(bodies)} jobs; the limit is {BATCH_MAX_JOBS}")
+
+    jobs: List[_NewJob] = []
+    boards: Dict[str, Optional[str]] = {}
+    for i, body in enumerate(bodies):
+        if not isinstance(body, dict):
+            raise HTTPException(status_code=400, detail=f"jobs[{i}] must be a JSON object")
+        job = _new_job(body)
+        if job.board_id is not None:
+            # Each distinct board definition is loaded and validated once per batch.
+            if job.board_id not in boards:
+                try:
+                    load_board_def(job.board_id)
+                    boards[job.board_id] = None
+                except (OSError, ValueError) as exc:
+                    boards[job.board_id] = str(exc)
+            if boards[job.board_id] is not None:
+                raise HTTPException(status_code=400, detail=f"jobs[{i}]: {boards[job.board_id]}")
+        jobs.append(job)
+
+    for job in jobs:
+        _write_new_job(job, index=False)
+    record_jobs(
+        JobRecord(
+            job_id=job.job_id,
+            subfolder=job.subfolder,
+            status="queued",
+            target=job.target,
+            created_at=job.created_at,
+            updated_at=job.created_at,
+        )
+        for job in jobs
+    )
+    JOBS_CREATED.inc(len(jobs))
+    notify_jobs_queued((job.job_id, job.subfolder) for job in jobs)
+    return [_queued_envelope(job) for job in jobs]
+
+
+def _progress(root: Path, status: str) -> Tuple[Optional[float], Optional[str]]:
+    """(progress, stage) from the worker's progress.json: the current stage while running, the last one if failed."""
+    if status == "complete":
+        return 1.0, "complete"
+    if status not in {"running", "failed"}:
+        return None, None
+    doc = read_progress(root)
+    if doc is None:
+        return None, None
+    try:
+        progress = min(1.0, max(0.0, float(doc.get("progress", 0.0))))
+    except (TypeError, ValueError):
+        progress = None
+    return progress, str(doc["stage"])
+
+
+def _status_envelope(
+    job_id: str,
+    status: str,
+    updated_at: str,
+    pub_root: str,
+    root: Optional[Path] = None,
+) -> Dict[str, Any]:
+    progress, stage = _progress(root, status) if root is not None else (None, None)
     envelope = job_status(
         job_id=job_id,
-        status="queued",
+        status=status,
         service="hexforge-glyphengine",
-        updated_at=created_at,
+        updated_at=updated_at,
+        progress=progress,
+        message=stage,
         result={
             "public_root": pub_root,
             "job_manifest": f"{pub_root}/job_manifest.json",
             "job_json": f"{pub_root}/job.json",
         },
     )
-    validate_contract(envelope, "job_status.schema.json")
+    maybe_validate_contract(envelope, "job_status.schema.json")
     return envelope
 
 
+@router.get("/jobs")
+async def list_jobs(
+    subfolder: Optional[str] = None,
+    status: Optional[str] = None,
+    since: Optional[str] = None,
+    limit: int = LIST_DEFAULT_LIMIT,
+    cursor: Optional[str] = None,
+    order: str = "asc",
+) -> Dict[str, Any]:
+    """
+    List jobs from the job index, oldest first (`order=desc` for newest first).
+
+    Filters: `subfolder`, `status` (queued|running|complete|failed) and `since`
+    (ISO 8601; jobs created at or after it). Returns
+    { jobs: [...], next_cursor } where `next_cursor` (null on the last page) is
+    passed back as `cursor` with the same filters to fetch the next page.
+    """
+    return await run_disk_io(_list_jobs, subfolder, status, since, limit, cursor, order)
+
+
+def _encode_cursor(rec: JobRecord) -> str:
+    raw = json.dumps([rec.created_at, rec.subfolder or "", rec.job_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> Tuple[str, str, str]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, subfolder, job_id = json.loads(raw.decode("utf-8"))
+        return str(created_at), str(subfolder), str(job_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="invalid cursor")
+
+
+def _normalized_since(value: str) -> str:
+    """ISO 8601 -> the UTC isoformat() used for created_at, so comparisons are lexicographic."""
+    try:
+        parsed = datetime.fromisoformat(value.strip().replace("Z", "+00:00"))
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"invalid since timestamp: {value}")
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc).isoformat()
+
+
+def _list_jobs(
+    subfolder: Optional[str],
+    status: Optional[str],
+    since: Optional[str],
+    limit: int,
+    cursor: Optional[str],
+    order: str,
+) -> Dict[str, Any]:
+    sub_filter = None
+    if subfolder:
+        sub_filter = sanitize_subfolder(subfolder)
+        if sub_filter is None:
+            raise HTTPException(status_code=400, detail=f"invalid subfolder: {subfolder}")
+    if status is not None and status not in _JOB_STATUSES:
+        raise HTTPException(status_code=400, detail=f"status must be one of {sorted(_JOB_STATUSES)}")
+    if order not in {"asc", "desc"}:
+        raise HTTPException(status_code=400, detail="order must be asc or desc")
+    limit = max(1, min(int(limit), LIST_MAX_LIMIT))
+
+    idx = job_index()
+    if idx is None:
+        raise HTTPException(status_code=503, detail="job index is disabled")
+
+    # One extra row tells us whether another page exists.
+    records = idx.page(
+        subfolder=sub_filter,
+        status=status,
+        since=_normalized_since(since) if since else None,
+        after=_decode_cursor(cursor) if cursor else None,
+        limit=limit + 1,
+        descending=order == "desc",
+    )
+    more = len(records) > limit
+    records = records[:limit]
+    return {
+        "jobs": [_listed_job(rec) for rec in records],
+        "next_cursor": _encode_cursor(records[-1]) if more else None,
+    }
+
+
+def _listed_job(rec: JobRecord) -> Dict[str, Any]:
+    item: Dict[str, Any] = {
+        "job_id": rec.job_id,
+        "subfolder": rec.subfolder,
+        "status": rec.status,
+        "target": rec.target,
+        "created_at": rec.created_at,
+        "updated_at": rec.updated_at,
+        "public_root": public_root(rec.job_id, subfolder=rec.subfolder),
+    }
+    # Only running jobs have a moving stage; their sidecars are the one per-item read.
+    if rec.status == "running":
+        item["progress"], item["stage"] = _progress(job_dir(rec.job_id, subfolder=rec.subfolder), rec.status)
+    return item
+
+
 @router.get("/jobs/{job_id}")
-async def get_job(job_id: str, subfolder: Optional[str] = None) -> Dict[str, Any]:
+async def get_job(
+    job_id: str,
+    request: Request,
+    response: Response,
+    subfolder: Optional[str] = None,
+    wait: Optional[float] = None,
+) -> Dict[str, Any]:
     """
     Surface v1 contract:
       GET returns job_status envelope.
 
     Deterministic lookup requires the correct subfolder if the job was created
     under one: /assets/surface/<subfolder>/<job_id>/...
+
+    Status comes from the job index when the job is indexed; otherwise it is
+    inferred from files and the result is indexed for the next lookup. The
+    envelope is then kept in memory until job.json or the manifest changes.
+
+    Long-poll: with `wait=<seconds>` the request is held until the envelope
+    differs from the one identified by `If-None-Match` (the ETag of a previous
+    response; without it, the envelope at request time), the job finishes, or
+    the wait (capped at HSE_LONGPOLL_MAX_SECONDS) runs out.
     """
+    if not wait or wait <= 0:
+        envelope = await run_disk_io(_get_job, job_id, subfolder)
+    else:
+        job_id, subfolder, root = _job_root(job_id, subfolder)
+        previous = (request.headers.get("if-none-match") or "").strip() or None
+        envelope, _ = await _next_envelope(job_id, subfolder, root, previous, min(wait, LONGPOLL_MAX_SECONDS))
+    response.headers["ETag"] = _etag(envelope)
+    return envelope
+
+
+@router.get("/jobs/{job_id}/events")
+async def job_events(job_id: str, request: Request, subfolder: Optional[str] = None) -> StreamingResponse:
+    """
+    Server-Sent Events stream of a job's job_status envelope.
+
+    Sends the current envelope, then one `status` event per change (pushed
+    when the worker writes, via inotify where available), and closes after the
+    job completes or fails. Event ids are envelope ETags: a reconnect with
+    `Last-Event-ID` skips the envelope it already has. Comment lines keep idle
+    connections open every HSE_EVENTS_HEARTBEAT_SECONDS.
+    """
+    job_id, subfolder, root = _job_root(job_id, subfolder)
+    # Unknown job: plain 404 before the stream starts.
+    envelope = await run_disk_io(_get_job, job_id, subfolder)
+    last_event_id = (request.headers.get("last-event-id") or "").strip() or None
+
+    async def stream():
+        previous = last_event_id
+        current = envelope
+        deadline = time.monotonic() + EVENTS_MAX_SECONDS
+        while True:
+            etag = _etag(current)
+            if etag != previous:
+                data = json.dumps(current, separators=(",", ":"))
+                yield f"id: {etag}\nevent: status\ndata: {data}\n\n"
+                previous = etag
+            if current.get("status") in _TERMINAL_STATUSES:
+                return
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or await request.is_disconnected():
+                return
+            try:
+                current, _ = await _next_envelope(
+                    job_id, subfolder, root, previous, min(remaining, EVENTS_HEARTBEAT_SECONDS)
+                )
+            except HTTPException:
+                # Job folder removed while streaming.
+                return
+            if _etag(current) == previous:
+                yield ": keepalive\n\n"
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def _job_root(job_id: str, subfolder: Optional[str]) -> Tuple[str, Optional[str], Path]:
+    try:
+        job_id = assert_valid_job_id(job_id)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    subfolder = sanitize_subfolder(subfolder)
+    return job_id, subfolder, job_dir(job_id, subfolder=subfolder)
+
+
+def _etag(envelope: Dict[str, Any]) -> str:
+    raw = json.dumps(envelope, sort_keys=True, separators=(",", ":")).encode("utf-8")
+    return '"' + hashlib.sha1(raw).hexdigest()[:20] + '"'
+
+
+async def _next_envelope(
+    job_id: str,
+    subfolder: Optional[str],
+    root: Path,
+    previous_etag: Optional[str],
+    timeout: float,
+) -> Tuple[Dict[str, Any], str]:
+    """
+    The job's envelope once its ETag differs from `previous_etag` (None: from
+    the first envelope read), or the current one when the job is finished or
+    `timeout` elapses.
+    """
+    hub = job_event_hub()
+    deadline = time.monotonic() + timeout
+    with hub.follow(root):
+        while True:
+            # Take the change event before reading so a write in between still wakes us.
+            changed = hub.changed(root)
+            envelope = await run_disk_io(_get_job, job_id, subfolder)
+            etag = _etag(envelope)
+            if previous_etag is None:
+                previous_etag = etag
+            remaining = deadline - time.monotonic()
+            if etag != previous_etag or remaining <= 0 or envelope.get("status") in _TERMINAL_STATUSES:
+                return envelope, etag
+            await hub.wait(changed, remaining)
+
+
+def _get_job(job_id: str, subfolder: Optional[str]) -> Dict[str, Any]:
     try:
         job_id = assert_valid_job_id(job_id)
     except ValueError as exc:
@@ -187,53 +468,94 @@ async def get_job(job_id: str, subfolder: Optional[str] = None) -> Dict[str, Any
     subfolder = sanitize_subfolder(subfolder)
 
     root = job_dir(job_id, subfolder=subfolder)
+    cache = status_cache()
+    stamp = status_stamp(root) if cache is not None else None
+    if stamp is not None:
+        cached = cache.get(root, stamp)
+        if cached is not None:
+            return cached
+
+    envelope = _lookup_job(job_id, subfolder, root)
+    if stamp is not None:
+        # Stamped before the lookup: a change made meanwhile only causes a recompute.
+        cache.put(root, stamp, envelope)
+    return envelope
+
+
+def _index_current(root: Path, rec: JobRecord) -> Optional[Dict[str, Any]]:
+    """
+    job.json when the index row reflects it (rows are upserted just after each
+    write, so a row may briefly lag the file); None otherwise.
+    """
+    try:
+        doc = json.loads((root / "job.json").read_text(encoding="utf-8"))
+    except Exception:
+        return None
+    return doc if isinstance(doc, dict) and doc.get("updated_at") == rec.updated_at else None
+
+
+def _lookup_job(job_id: str, subfolder: Optional[str], root: Path) -> Dict[str, Any]:
+    """
+    Status envelope from the index row when it is current, else from the files.
+    Either way the status is inferred from job.json and the outputs, so both
+    paths answer the same for the same job.
+    """
+    idx = job_index()
     if not root.exists():
+        if idx is not None:
+            idx.delete(job_id, subfolder)
+        cache = status_cache()
+        if cache is not None:
+            cache.discard(root)
         raise HTTPException(status_code=404, detail="job not found")
 
-    mpath = manifest_path(job_id, subfolder=subfolder)
     pub_root = public_root(job_id, subfolder=subfolder)
 
+    rec = idx.get(job_id, subfolder) if idx is not None else None
+    doc = _index_current(root, rec) if rec is not None else None
+    if doc is not None:
+        status = infer_status_from_files(job_id, subfolder=subfolder, doc=doc)
+        if status != rec.status:
+            # e.g. "complete" written before its outputs: keep listings and discovery in line.
+            _index_from_files(job_id, subfolder, status, rec.updated_at)
+        return _status_envelope(job_id, status, rec.updated_at, pub_root, root)
+
+    mpath = manifest_path(job_id, subfolder=subfolder)
+    updated_at = None
     # Prefer manifest (for updated_at + authoritative public_root)
     if mpath.exists():
         doc = json.loads(mpath.read_text(encoding="utf-8"))
-        updated_at = doc.get("updated_at") or now_iso()
+        updated_at = doc.get("updated_at")
         pub_root = doc.get("public_root") or pub_root
 
-        status = infer_status_from_files(job_id, subfolder=subfolder)
-
-        envelope = job_status(
-            job_id=job_id,
-            status=status,
-            service="hexforge-glyphengine",
-            updated_at=updated_at,
-            result={
-                "public_root": pub_root,
-                "job_manifest": f"{pub_root}/job_manifest.json",
-                "job_json": f"{pub_root}/job.json",
-            },
-        )
-        validate_contract(envelope, "job_status.schema.json")
-        return envelope
-
-    # Fallback if manifest missing
     status = infer_status_from_files(job_id, subfolder=subfolder)
-    envelope = job_status(
+    updated_at = updated_at or now_iso()
+    _index_from_files(job_id, subfolder, status, updated_at)
+    return _status_envelope(job_id, status, updated_at, pub_root, root)
+
+
+def _index_from_files(job_id: str, subfolder: Optional[str], status: str, updated_at: str) -> None:
+    """Lazily index jobs that predate the index (or were written without it)."""
+    try:
+        doc = json.loads(job_dir(job_id, subfolder=subfolder).joinpath("job.json").read_text(encoding="utf-8"))
+    except Exception:
+        return
+    record_job(
         job_id=job_id,
+        subfolder=subfolder,
         status=status,
-        service="hexforge-glyphengine",
-        updated_at=now_iso(),
-        result={
-            "public_root": pub_root,
-            "job_manifest": f"{pub_root}/job_manifest.json",
-            "job_json": f"{pub_root}/job.json",
-        },
+        target=normalized_target((doc.get("params") or {}).get("target")),
+        created_at=str(doc.get("created_at") or updated_at),
+        updated_at=str(doc.get("updated_at") or updated_at),
     )
-    validate_contract(envelope, "job_status.schema.json")
-    return envelope
 
 
 @router.get("/jobs/{job_id}/manifest")
 async def get_manifest(job_id: str, subfolder: Optional[str] = None) -> JSONResponse:
+    return await run_disk_io(_get_manifest, job_id, subfolder)
+
+
+def _get_manifest(job_id: str, subfolder: Optional[str]) -> JSONResponse:
     try:
         job_id = assert_valid_job_id(job_id)
     except ValueError as exc:
@@ -251,6 +573,6 @@ async def get_manifest(job_id: str, subfolder: Optional[str] = None) -> JSONResp
 
     doc = json.loads(mpath.read_text(encoding="utf-8"))
 
-    validate_contract(doc, "job_manifest.schema.json")
+    maybe_validate_contract(doc, "job_manifest.schema.json")
 
     return JSONResponse(content=doc)
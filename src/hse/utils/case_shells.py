@@ -0,0 +1,260 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Mapping, Optional, Tuple
+
+import numpy as np
+import trimesh
+
+from hse.fs.paths import state_root
+
+# Bump whenever CaseLayout or shell construction changes, so stale on-disk shells are ignored.
+SHELL_VERSION = 1
+# Boards whose hand-tuned case predates board-def-driven dimensions; kept so published geometry is unchanged.
+_LEGACY_LAYOUT_BOARDS = {"pi4b", "pi5"}
+
+
+def cache_root() -> Path:
+    override = os.getenv("HSE_SHELL_CACHE_DIR")
+    if override:
+        return Path(override)
+    return state_root() / "cache" / "shells"
+
+
+@dataclass(frozen=True)
+class CaseLayout:
+    """Case dimensions in mm; derived values mirror how the parts are assembled."""
+
+    outer_x: float
+    outer_y: float
+    base_height: float
+    wall_th: float
+    rail_height: float
+    floor_th: float = 2.4
+    lid_th: float = 2.6
+    lid_gap: float = 0.4  # clearance between base and lid
+    rail_width: float = 1.6
+    panel_th: float = 2.2
+    panel_clearance: float = 0.35
+
+    @property
+    def inner_x(self) -> float:
+        return self.outer_x - 2 * self.wall_th
+
+    @property
+    def inner_y(self) -> float:
+        return self.outer_y - 2 * self.wall_th
+
+    @property
+    def rail_len(self) -> float:
+        return self.inner_x - 6.0
+
+    @property
+    def rail_base_z(self) -> float:
+        return self.floor_th + 3.0
+
+    @property
+    def slot_width(self) -> float:
+        return self.panel_th + 2 * self.panel_clearance
+
+    @property
+    def lid_z0(self) -> float:
+        return self.base_height + self.lid_gap
+
+    @property
+    def panel_width(self) -> float:
+        return self.rail_len - 6.0
+
+    @property
+    def panel_height(self) -> float:
+        return self.rail_height - 2.0
+
+    @property
+    def panel_center(self) -> Tuple[float, float]:
+        """(x, z) of the panel; it sits towards -x to leave room for the end stop."""
+        return -self.rail_len / 2.0 + 4.0, self.rail_base_z + self.panel_height / 2.0
+
+
+def case_layout(board_def: Mapping[str, object]) -> CaseLayout:
+    """Case dimensions for a board definition (see schemas/boards/*.json)."""
+    if board_def.get("id") in _LEGACY_LAYOUT_BOARDS:
+        return CaseLayout(outer_x=96.0, outer_y=66.0, base_height=24.0, wall_th=2.2, rail_height=12.0)
+
+    board_x, board_y = (float(v) for v in board_def["board_mm"])  # type: ignore[union-attr]
+    defaults = board_def.get("defaults") or {}
+    wall = float(defaults["wall_mm"])  # type: ignore[index]
+    clearance = float(defaults["clearance_mm"])  # type: ignore[index]
+    # 2 mm of cable/finger room per side on top of the board clearance.
+    outer_x = board_x + 2 * (clearance + 2.0 + wall)
+    outer_y = board_y + 2 * (clearance + 2.0 + wall)
+    # Wall height follows the footprint, clamped to the 12-24 mm range of the stock cases.
+    base_height = max(12.0, min(24.0, round(0.4 * outer_y, 1)))
+    layout = CaseLayout(outer_x=outer_x, outer_y=outer_y, base_height=base_height, wall_th=wall, rail_height=12.0)
+    # Rails stop 2 mm below the rim.
+    rail_height = min(12.0, base_height - layout.rail_base_z - 2.0)
+    if rail_height <= 2.0:
+        raise RuntimeError(f"board_case_too_small:{board_def.get('id')}")
+    return CaseLayout(outer_x=outer_x, outer_y=outer_y, base_height=base_height, wall_th=wall, rail_height=rail_height)
+
+
+def _box_mesh(extents: Tuple[float, float, float], center: Tuple[float, float, float]) -> trimesh.Trimesh:
+    mesh = trimesh.creation.box(extents=extents)
+    mesh.apply_translation(center)
+    return mesh
+
+
+def _build_base(layout: CaseLayout) -> trimesh.Trimesh:
+    """Open box with two rails forming a slot for the sliding panel, plus an end stop."""
+    wall, outer_x, outer_y, height = layout.wall_th, layout.outer_x, layout.outer_y, layout.base_height
+    rail_y = layout.slot_width / 2.0 + layout.rail_width / 2.0
+    rail_z = layout.rail_base_z + layout.rail_height / 2.0
+    end_stop = wall * 1.3
+    parts = [
+        _box_mesh((layout.inner_x, layout.inner_y, layout.floor_th), (0.0, 0.0, layout.floor_th / 2.0)),
+        _box_mesh((outer_x, wall, height), (0.0, -(outer_y / 2.0 - wall / 2.0), height / 2.0)),
+        _box_mesh((outer_x, wall, height), (0.0, outer_y / 2.0 - wall / 2.0, height / 2.0)),
+        _box_mesh((wall, layout.inner_y, height), (-(outer_x / 2.0 - wall / 2.0), 0.0, height / 2.0)),
+        _box_mesh((wall, layout.inner_y, height), ((outer_x / 2.0 - wall / 2.0), 0.0, height / 2.0)),
+        _box_mesh((layout.rail_len, layout.rail_width, layout.rail_height), (0.0, -rail_y, rail_z)),
+        _box_mesh((layout.rail_len, layout.rail_width, layout.rail_height), (0.0, rail_y, rail_z)),
+        _box_mesh((end_stop, layout.slot_width, layout.rail_height), (layout.rail_len / 2.0 - end_stop / 2.0, 0.0, rail_z)),
+    ]
+    return trimesh.util.concatenate(parts)
+
+
+def _build_lid_slab(layout: CaseLayout) -> trimesh.Trimesh:
+    return _box_mesh((layout.outer_x, layout.outer_y, layout.lid_th), (0.0, 0.0, layout.lid_z0 + layout.lid_th / 2.0))
+
+
+def _build_panel_blank(layout: CaseLayout) -> trimesh.Trimesh:
+    cx, cz = layout.panel_center
+    return _box_mesh((layout.panel_width, layout.panel_th, layout.panel_height), (cx, 0.0, cz))
+
+
+@dataclass(frozen=True)
+class CaseShells:
+    """
+    Heightmap-independent case geometry for one board definition.
+
+    The meshes are shared between jobs: merge/concatenate them, never mutate them.
+    `base_stl` is a finished STL that jobs hardlink instead of re-exporting (never write through it).
+    """
+
+    key: str
+    layout: CaseLayout
+    base: trimesh.Trimesh
+    lid_slab: trimesh.Trimesh
+    panel_blank: trimesh.Trimesh
+    base_stl: Path
+    base_sha256: str
+    board_def: Mapping[str, object]
+
+
+def shell_key(board_def: Mapping[str, object]) -> str:
+    canonical = json.dumps({"version": SHELL_VERSION, "board": board_def}, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def _mesh(arrays: Mapping[str, np.ndarray], name: str) -> trimesh.Trimesh:
+    # Stored normals keep exports byte-identical to freshly built meshes (no recompute noise).
+    return trimesh.Trimesh(
+        vertices=arrays[f"{name}_v"],
+        faces=arrays[f"{name}_f"],
+        face_normals=arrays[f"{name}_n"],
+        process=False,
+    )
+
+
+def _load(entry: Path, key: str, board_def: Mapping[str, object], layout: CaseLayout) -> Optional[CaseShells]:
+    try:
+        meta = json.loads((entry / "meta.json").read_text(encoding="utf-8"))
+        if meta.get("key") != key or not (entry / "base.stl").is_file():
+            return None
+        with np.load(entry / "shells.npz") as arrays:
+            meshes = {name: _mesh(arrays, name) for name in ("base", "lid", "panel")}
+    except (OSError, ValueError, KeyError):
+        return None
+    return CaseShells(
+        key=key,
+        layout=layout,
+        base=meshes["base"],
+        lid_slab=meshes["lid"],
+        panel_blank=meshes["panel"],
+        base_stl=entry / "base.stl",
+        base_sha256=str(meta["base_sha256"]),
+        board_def=board_def,
+    )
+
+
+def _build(root: Path, key: str, board_def: Mapping[str, object], layout: CaseLayout) -> None:
+    """Build every shell once and publish the entry with an atomic directory rename."""
+    staging = root / f".staging.{os.getpid()}.{threading.get_ident()}.{time.monotonic_ns()}"
+    try:
+        staging.mkdir(parents=True)
+        base, lid, panel = _build_base(layout), _build_lid_slab(layout), _build_panel_blank(layout)
+        base.export(staging / "base.stl")
+        arrays: Dict[str, np.ndarray] = {}
+        for name, mesh in (("base", base), ("lid", lid), ("panel", panel)):
+            arrays[f"{name}_v"] = np.asarray(mesh.vertices)
+            arrays[f"{name}_f"] = np.asarray(mesh.faces)
+            arrays[f"{name}_n"] = np.asarray(mesh.face_normals)
+        np.savez(staging / "shells.npz", **arrays)
+        digest = hashlib.sha256((staging / "base.stl").read_bytes()).hexdigest()
+        (staging / "meta.json").write_text(
+            json.dumps({"key": key, "board_id": board_def.get("id"), "base_sha256": digest}, sort_keys=True),
+            encoding="utf-8",
+        )
+        try:
+            os.rename(staging, root / key)
+        except OSError:
+            # Another process published the same shells first.
+            pass
+    finally:
+        if staging.exists():
+            shutil.rmtree(staging, ignore_errors=True)
+
+
+_memo: Dict[str, CaseShells] = {}
+_memo_lock = threading.Lock()
+
+
+def board_shells(board_def: Mapping[str, object], *, refresh: bool = False) -> CaseShells:
+    """
+    Shells for `board_def`: in-process memo, then the on-disk cache, then a one-off build.
+    `refresh` skips the memo, for when its files were removed by another process.
+    """
+    key = shell_key(board_def)
+    cached = None if refresh else _memo.get(key)
+    if cached is not None:
+        return cached
+    with _memo_lock:
+        cached = None if refresh else _memo.get(key)
+        if cached is not None:
+            return cached
+        layout = case_layout(board_def)
+        root = cache_root()
+        entry = root / key
+        shells = _load(entry, key, board_def, layout)
+        if shells is None and entry.exists():
+            # Another process may have published the entry since we looked; re-read before
+            # treating it as an unreadable leftover (which would block the rename below).
+            shells = _load(entry, key, board_def, layout)
+            if shells is None:
+                shutil.rmtree(entry, ignore_errors=True)
+        if shells is None:
+            _build(root, key, board_def, layout)
+            shells = _load(entry, key, board_def, layout)
+        if shells is None:
+            raise RuntimeError(f"board_case_shells_unavailable:{board_def.get('id')}")
+        _memo[key] = shells
+        return shells
+
+
+__all__ = ["CaseLayout", "CaseShells", "board_shells", "cache_root", "case_layout", "shell_key"]
@@ -0,0 +1,248 @@
+from __future__ import annotations
+
+import base64
+import hashlib
+import http.client
+import os
+import threading
+import time
+import urllib.parse
+import urllib.request
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Mapping, Optional, Tuple
+
+# Downloads larger than this are aborted (Content-Length up front, byte count while streaming).
+MAX_BYTES = int(os.getenv("HSE_DOWNLOAD_MAX_BYTES", str(32 * 1024 * 1024)))
+# Per-operation socket timeout (connect / each read).
+TIMEOUT_SECONDS = float(os.getenv("HSE_DOWNLOAD_TIMEOUT", "30"))
+# Wall-clock cap for one attempt, so a slow trickle cannot hold a worker indefinitely.
+DEADLINE_SECONDS = float(os.getenv("HSE_DOWNLOAD_DEADLINE", "120"))
+# Extra attempts after connection errors, timeouts, 429 and 5xx; backoff doubles each time.
+RETRIES = max(0, int(os.getenv("HSE_DOWNLOAD_RETRIES", "3")))
+BACKOFF_SECONDS = float(os.getenv("HSE_DOWNLOAD_BACKOFF_SECONDS", "0.5"))
+
+_CHUNK = 1 << 16
+_MAX_REDIRECTS = 5
+_USER_AGENT = "hexforge-glyphengine"
+
+
+class DownloadError(RuntimeError):
+    """A download that failed for good (after retries, or not retryable)."""
+
+    def __init__(self, message: str, *, status: Optional[int] = None, retryable: bool = False) -> None:
+        super().__init__(message)
+        self.status = status
+        self.retryable = retryable
+
+
+@dataclass(frozen=True)
+class Download:
+    status: int  # 200, or 304 when a conditional request matched (nothing written)
+    sha256: Optional[str] = None
+    size: int = 0
+    headers: Mapping[str, str] = field(default_factory=dict)  # lower-cased names
+
+
+_local = threading.local()
+_PoolKey = Tuple[str, str, int]
+
+
+def _pool() -> Dict[_PoolKey, http.client.HTTPConnection]:
+    """Per-thread keep-alive connections, dropped after a fork."""
+    pool = getattr(_local, "pool", None)
+    if pool is None or pool[0] != os.getpid():
+        pool = (os.getpid(), {})
+        _local.pool = pool
+    return pool[1]
+
+
+@dataclass(frozen=True)
+class _Proxy:
+    host: str
+    port: int
+    auth: Optional[str] = None  # Proxy-Authorization value
+
+
+def _proxy_for(scheme: str, host: str) -> Optional[_Proxy]:
+    """The *_PROXY proxy for `scheme`, unless NO_PROXY bypasses `host` (the same rules as urlopen)."""
+    proxy = urllib.request.getproxies().get(scheme)
+    if not proxy or urllib.request.proxy_bypass(host):
+        return None
+    parts = urllib.parse.urlsplit(proxy if "://" in proxy else f"http://{proxy}")
+    if not parts.hostname:
+        return None
+    auth = None
+    if parts.username:
+        creds = f"{urllib.parse.unquote(parts.username)}:{urllib.parse.unquote(parts.password or '')}"
+        auth = "Basic " + base64.b64encode(creds.encode("utf-8")).decode("ascii")
+    return _Proxy(parts.hostname, parts.port or 80, auth)
+
+
+def _connection(key: _PoolKey, timeout: float, proxy: Optional[_Proxy] = None) -> http.client.HTTPConnection:
+    pool = _pool()
+    conn = pool.get(key)
+    if conn is None:
+        scheme, host, port = key
+        if proxy is None:
+            cls = http.client.HTTPSConnection if scheme == "https" else http.client.HTTPConnection
+            conn = cls(host, port, timeout=timeout)
+        elif scheme == "https":
+            # TLS to the origin through a CONNECT tunnel.
+            conn = http.client.HTTPSConnection(proxy.host, proxy.port, timeout=timeout)
+            conn.set_tunnel(host, port, headers={"Proxy-Authorization": proxy.auth} if proxy.auth else None)
+        else:
+            # Plain HTTP is forwarded: absolute-form request target (see _attempt).
+            conn = http.client.HTTPConnection(proxy.host, proxy.port, timeout=timeout)
+        pool[key] = conn
+    conn.timeout = timeout
+    return conn
+
+
+def _discard(key: _PoolKey) -> None:
+    conn = _pool().pop(key, None)
+    if conn is not None:
+        conn.close()
+
+
+def received_bytes() -> int:
+    """Body bytes this thread has read from the network so far (failed attempts included)."""
+    return getattr(_local, "received", 0)
+
+
+def _headers(resp: http.client.HTTPResponse) -> Dict[str, str]:
+    return {name.lower(): value for name, value in resp.getheaders()}
+
+
+def _stream_to_file(resp, dest: Path, *, max_bytes: int, deadline: float) -> Tuple[str, int]:
+    """Write the body to a temp file beside `dest`, hashing as it goes; rename on success."""
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    tmp = dest.with_name(f".{dest.name}.{os.getpid()}.{threading.get_ident()}.part")
+    h = hashlib.sha256()
+    size = 0
+    try:
+        with tmp.open("wb") as fh:
+            for chunk in iter(lambda: resp.read(_CHUNK), b""):
+                size += len(chunk)
+                if size > max_bytes:
+                    raise DownloadError(f"download exceeds {max_bytes} bytes")
+                if time.monotonic() > deadline:
+                    raise DownloadError("download deadline exceeded", retryable=True)
+                h.update(chunk)
+                fh.write(chunk)
+        if size == 0:
+            raise DownloadError("empty download")
+        # Never write through an existing file: it may be a hardlink shared with a cache.
+        tmp.replace(dest)
+        return h.hexdigest(), size
+    finally:
+        _local.received = received_bytes() + size
+        tmp.unlink(missing_ok=True)
+
+
+def _attempt(url: str, dest: Path, headers: Mapping[str, str], *, max_bytes: int, timeout: float) -> Download:
+    deadline = time.monotonic() + DEADLINE_SECONDS
+    for _ in range(_MAX_REDIRECTS + 1):
+        parts = urllib.parse.urlsplit(url)
+        scheme = parts.scheme.lower()
+        if scheme not in {"http", "https"}:
+            raise DownloadError(f"unsupported redirect target: {url}")
+        port = parts.port or (443 if scheme == "https" else 80)
+        key = (scheme, parts.hostname or "", port)
+        target = urllib.parse.urlunsplit(("", "", parts.path or "/", parts.query, ""))
+        request_headers = {"User-Agent": _USER_AGENT, **headers}
+        proxy = _proxy_for(scheme, parts.hostname or "")
+        if proxy is not None and scheme == "http":
+            target = urllib.parse.urlunsplit((scheme, parts.netloc, parts.path or "/", parts.query, ""))
+            if proxy.auth:
+                request_headers["Proxy-Authorization"] = proxy.auth
+        conn = _connection(key, timeout, proxy)
+        try:
+            conn.request("GET", target, headers=request_headers)
+            resp = conn.getresponse()
+        except (OSError, http.client.HTTPException) as exc:
+            # Includes servers closing an idle keep-alive connection.
+            _discard(key)
+            raise DownloadError(f"request failed: {exc}", retryable=True) from exc
+
+        try:
+            if resp.status in {301, 302, 303, 307, 308} and resp.getheader("Location"):
+                resp.read()
+                url = urllib.parse.urljoin(url, resp.getheader("Location"))
+                continue
+            if resp.status == 304:
+                resp.read()
+                return Download(status=304, headers=_headers(resp))
+            if resp.status != 200:
+                resp.read()
+                raise DownloadError(
+                    f"HTTP {resp.status} for {url}",
+                    status=resp.status,
+                    retryable=resp.status == 429 or resp.status >= 500,
+                )
+            length = resp.getheader("Content-Length")
+            if length and length.isdigit() and int(length) > max_bytes:
+                raise DownloadError(f"download exceeds {max_bytes} bytes (Content-Length {length})", status=200)
+            digest, size = _stream_to_file(resp, dest, max_bytes=max_bytes, deadline=deadline)
+            return Download(status=200, sha256=digest, size=size, headers=_headers(resp))
+        except DownloadError:
+            _discard(key)
+            raise
+        except (OSError, http.client.HTTPException) as exc:
+            _discard(key)
+            raise DownloadError(f"download interrupted: {exc}", retryable=True) from exc
+        finally:
+            if resp.will_close:
+                _discard(key)
+    raise DownloadError(f"too many redirects for {url}")
+
+
+def _fetch_other(url: str, dest: Path, *, max_bytes: int, timeout: float) -> Download:
+    """Non-HTTP URLs (file:, data:, ...) go through urllib, with the same limits and hashing."""
+    with urllib.request.urlopen(url, timeout=timeout) as resp:
+        digest, size = _stream_to_file(resp, dest, max_bytes=max_bytes, deadline=time.monotonic() + DEADLINE_SECONDS)
+    return Download(status=200, sha256=digest, size=size)
+
+
+def fetch_to_file(
+    url: str,
+    dest: Path,
+    *,
+    headers: Optional[Mapping[str, str]] = None,
+    max_bytes: int = MAX_BYTES,
+    timeout: float = TIMEOUT_SECONDS,
+    retries: int = RETRIES,
+) -> Download:
+    """
+    Stream `url` into `dest` (atomically, sha256 computed inline) over a pooled
+    keep-alive connection, through HTTP_PROXY/HTTPS_PROXY unless NO_PROXY
+    matches. Conditional `headers` may yield a 304 Download, in which case
+    `dest` is untouched.
+    """
+    if not url.lower().startswith(("http://", "https://")):
+        return _fetch_other(url, dest, max_bytes=max_bytes, timeout=timeout)
+
+    attempt = 0
+    while True:
+        try:
+            return _attempt(url, dest, headers or {}, max_bytes=max_bytes, timeout=timeout)
+        except DownloadError as exc:
+            if not exc.retryable or attempt >= retries:
+                raise
+            delay = BACKOFF_SECONDS * (2 ** attempt)
+            print(f"[download] {url}: {exc}; retrying in {delay:.1f}s ({attempt + 1}/{retries})")
+            time.sleep(delay)
+            attempt += 1
+
+
+__all__ = [
+    "BACKOFF_SECONDS",
+    "DEADLINE_SECONDS",
+    "Download",
+    "DownloadError",
+    "MAX_BYTES",
+    "RETRIES",
+    "TIMEOUT_SECONDS",
+    "fetch_to_file",
+    "received_bytes",
+]
@@ -1,12 +1,16 @@
 from __future__ import annotations
 
 import math
-import struct
+import mmap
+import re
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, Iterable, List, Optional, Tuple
+from typing import Dict, Optional, Tuple
 
-from PIL import Image
+import numpy as np
+
+from hse.utils.heightmap import HeightmapContext
+from hse.utils.stl import STL_HEADER_BYTES, STL_RECORD_DTYPE
 
 
 @dataclass
@@ -27,82 +31,58 @@ class STLMetadata:
         }
 
 
-def _init_bbox() -> List[float]:
-    return [math.inf, math.inf, math.inf], [-math.inf, -math.inf, -math.inf]
+# Matches the three coordinates of an ASCII STL "vertex x y z" line.
+_FLOAT = rb"([-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)"
+_ASCII_VERTEX_RE = re.compile(rb"^\s*vertex\s+" + _FLOAT + rb"\s+" + _FLOAT + rb"\s+" + _FLOAT, re.MULTILINE)
+_ASCII_FACET_RE = re.compile(rb"^\s*facet\b", re.MULTILINE)
 
 
-def _update_bbox(bmin: List[float], bmax: List[float], pts: Iterable[Tuple[float, float, float]]) -> None:
-    for x, y, z in pts:
-        if x < bmin[0]:
-            bmin[0] = x
-        if y < bmin[1]:
-            bmin[1] = y
-        if z < bmin[2]:
-            bmin[2] = z
-        if x > bmax[0]:
-            bmax[0] = x
-        if y > bmax[1]:
-            bmax[1] = y
-        if z > bmax[2]:
-            bmax[2] = z
+def _bbox(points: np.ndarray) -> Tuple[Tuple[float, float, float], Tuple[float, float, float]]:
+    pts = points.reshape(-1, 3)
+    bmin = pts.min(axis=0).astype(np.float64)
+    bmax = pts.max(axis=0).astype(np.float64)
+    return tuple(bmin.tolist()), tuple(bmax.tolist())
 
 
 def _parse_binary_stl(path: Path) -> STLMetadata:
+    size = path.stat().st_size
+    if size < STL_HEADER_BYTES + 4:
+        raise ValueError("invalid STL: missing triangle count")
     with path.open("rb") as fh:
-        head = fh.read(80)
-        _ = head  # unused header
-        tri_bytes = fh.read(4)
-        if len(tri_bytes) != 4:
-            raise ValueError("invalid STL: missing triangle count")
-        tri_count = struct.unpack("<I", tri_bytes)[0]
-
-        bmin, bmax = _init_bbox()
-        actual = 0
-        for _ in range(tri_count):
-            data = fh.read(50)
-            if len(data) < 50:
-                break
-            actual += 1
-            floats = struct.unpack("<12fH", data)[:12]
-            pts = [
-                (floats[3], floats[4], floats[5]),
-                (floats[6], floats[7], floats[8]),
-                (floats[9], floats[10], floats[11]),
-            ]
-            _update_bbox(bmin, bmax, pts)
-
-    if actual == 0:
+        fh.seek(STL_HEADER_BYTES)
+        tri_count = int(np.frombuffer(fh.read(4), dtype="<u4")[0])
+
+    # Tolerate truncated files the same way a streaming reader would: count whole records only.
+    actual = min(tri_count, (size - STL_HEADER_BYTES - 4) // STL_RECORD_DTYPE.itemsize)
+    if actual <= 0:
         raise ValueError("invalid STL: zero triangles")
 
-    return STLMetadata(actual, tuple(bmin), tuple(bmax))
+    records = np.memmap(path, dtype=STL_RECORD_DTYPE, mode="r", offset=STL_HEADER_BYTES + 4, shape=(actual,))
+    bmin, bmax = _bbox(records["vertices"])
+    del records
+
+    return STLMetadata(actual, bmin, bmax)
 
 
 def _parse_ascii_stl(path: Path) -> STLMetadata:
-    bmin, bmax = _init_bbox()
-    tri_count = 0
-
-    with path.open("r", encoding="utf-8", errors="ignore") as fh:
-        for line in fh:
-            stripped = line.lstrip()
-            if stripped.startswith("facet"):
-                tri_count += 1
-            if stripped.startswith("vertex"):
-                parts = stripped.split()
-                if len(parts) >= 4:
-                    try:
-                        x, y, z = float(parts[1]), float(parts[2]), float(parts[3])
-                        _update_bbox(bmin, bmax, [(x, y, z)])
-                    except ValueError:
-                        continue
-
-    if tri_count == 0:
+    if path.stat().st_size == 0:
         raise ValueError("invalid STL: zero triangles")
+    with path.open("rb") as fh, mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        tri_count = len(_ASCII_FACET_RE.findall(data))
+        if tri_count == 0:
+            raise ValueError("invalid STL: zero triangles")
+        coords = _ASCII_VERTEX_RE.findall(data)
 
-    return STLMetadata(tri_count, tuple(bmin), tuple(bmax))
+    if not coords:
+        inf = (math.inf, math.inf, math.inf)
+        return STLMetadata(tri_count, inf, tuple(-v for v in inf))
+    bmin, bmax = _bbox(np.asarray(coords, dtype="S").astype(np.float64))
+    return STLMetadata(tri_count, bmin, bmax)
 
 
 def parse_stl_metadata(path: Path) -> STLMetadata:
-    head = path.read_bytes()[:256]
+    with path.open("rb") as fh:
+        head = fh.read(256)
     looks_ascii = head.startswith(b"solid") and b"facet" in head
 
     try:
@@ -116,27 +96,55 @@ def parse_stl_metadata(path: Path) -> STLMetadata:
         return _parse_ascii_stl(path)
 
 
-def sample_heightmap_range(path: Path, sample_px: int = 128) -> Optional[Tuple[float, float]]:
-    if not path.exists():
-        return None
-    img = Image.open(path).convert("L")
-    img = img.resize((sample_px, sample_px))
-    pixels = list(img.getdata())
-    if not pixels:
+def mesh_metadata(vertices: np.ndarray, faces: np.ndarray) -> STLMetadata:
+    """Metadata for an in-memory mesh, at the float32 precision it will have once exported."""
+    idx = np.asarray(faces, dtype=np.int64)
+    if idx.size == 0:
+        raise ValueError("invalid mesh: zero triangles")
+    pts = np.asarray(vertices, dtype=np.float32)[np.unique(idx)]
+    bmin, bmax = _bbox(pts)
+    return STLMetadata(len(idx), bmin, bmax)
+
+
+def sample_heightmap_range(
+    path: Path,
+    sample_px: int = 128,
+    *,
+    heightmap: Optional[HeightmapContext] = None,
+) -> Optional[Tuple[float, float]]:
+    """(min, max) 8-bit values of the heightmap sampled on a `sample_px` grid; reuses `heightmap` if given."""
+    if heightmap is None:
+        if not path.exists():
+            return None
+        heightmap = HeightmapContext(path)
+    samples = heightmap.resized(sample_px)
+    if samples.size == 0:
         return None
-    min_v = min(pixels)
-    max_v = max(pixels)
-    return float(min_v), float(max_v)
+    return float(np.rint(samples.min() * 255.0)), float(np.rint(samples.max() * 255.0))
 
 
 def evaluate_geometry(
     *,
-    stl_path: Path,
-    heightmap_range: Optional[Tuple[float, float]],
+    stl_path: Optional[Path] = None,
+    metadata: Optional[STLMetadata] = None,
+    heightmap_range: Optional[Tuple[float, float]] = None,
+    expected_z_range_mm: Optional[float] = None,
     min_displacement_mm: float = 0.2,
     non_uniform_threshold: float = 1.0,
 ) -> Dict[str, object]:
-    meta = parse_stl_metadata(stl_path).as_dict()
+    """
+    Geometry sanity check for a generated mesh.
+
+    Pass `metadata` for an in-memory mesh, or `stl_path` to parse an exported file.
+    `expected_z_range_mm` (heightmap spread times displacement scale) flags a flat mesh
+    when the heightmap should have displaced it by at least `min_displacement_mm`;
+    `heightmap_range` keeps the older pixel-spread heuristic.
+    """
+    if metadata is None:
+        if stl_path is None:
+            raise ValueError("evaluate_geometry needs stl_path or metadata")
+        metadata = parse_stl_metadata(stl_path)
+    meta = metadata.as_dict()
     reason: Optional[str] = None
     passed = True
 
@@ -151,5 +159,10 @@ def evaluate_geometry(
             passed = False
             reason = "stl_flat_no_displacement"
 
+    if expected_z_range_mm is not None:
+        if expected_z_range_mm >= min_displacement_mm and meta["z_range_mm"] < min_displacement_mm:
+            passed = False
+            reason = "stl_flat_no_displacement"
+
     meta.update({"passed": passed, "reason": reason})
     return meta
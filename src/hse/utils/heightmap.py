@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+# Resample from a pyramid level only while it keeps this many source pixels per output pixel,
+# which Pillow documents as indistinguishable from resampling the full image.
+_REDUCING_GAP = 3
+
+
+class HeightmapContext:
+    """
+    One heightmap shared by every job stage.
+
+    Opening reads only the PNG header (size, format). Pixels are decoded once,
+    on first use, to 8-bit grayscale; stage-specific resolutions come from a
+    lazily built 2x pyramid and are memoized, as are the histogram and range.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        with Image.open(path) as img:
+            self.size: Tuple[int, int] = img.size
+        self._levels: List[Image.Image] = []
+        self._resized: Dict[int, np.ndarray] = {}
+        self._histogram: Optional[np.ndarray] = None
+
+    @property
+    def width(self) -> int:
+        return self.size[0]
+
+    @property
+    def height(self) -> int:
+        return self.size[1]
+
+    @property
+    def image(self) -> Image.Image:
+        """Full-resolution grayscale ("L") image; decoded on first access only."""
+        if not self._levels:
+            with Image.open(self.path) as img:
+                self._levels.append(img.convert("L"))
+        return self._levels[0]
+
+    def _level_for(self, samples: int) -> Image.Image:
+        """Smallest pyramid level that still has `_REDUCING_GAP` pixels per sample."""
+        level, index = self.image, 0
+        while min(level.size) // 2 >= samples * _REDUCING_GAP:
+            index += 1
+            if index == len(self._levels):
+                self._levels.append(level.reduce(2))
+            level = self._levels[index]
+        return level
+
+    def resized(self, samples: int) -> np.ndarray:
+        """Normalised [0, 1] float32 heights on a `samples` x `samples` grid."""
+        cached = self._resized.get(samples)
+        if cached is None:
+            img = self._level_for(samples).resize((samples, samples))
+            cached = np.asarray(img, dtype=np.float32) / 255.0
+            cached.setflags(write=False)
+            self._resized[samples] = cached
+        return cached
+
+    @property
+    def histogram(self) -> np.ndarray:
+        """256-bin histogram of the full-resolution pixels."""
+        if self._histogram is None:
+            self._histogram = np.asarray(self.image.histogram(), dtype=np.int64)
+        return self._histogram
+
+    @property
+    def pixel_range(self) -> Tuple[int, int]:
+        """(min, max) 8-bit pixel values of the full-resolution image."""
+        used = np.flatnonzero(self.histogram)
+        if used.size == 0:
+            return 0, 0
+        return int(used[0]), int(used[-1])
+
+    @property
+    def is_uniform(self) -> bool:
+        lo, hi = self.pixel_range
+        return lo == hi
+
+
+__all__ = ["HeightmapContext"]
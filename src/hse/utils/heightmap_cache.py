@@ -0,0 +1,205 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from hse.fs.paths import state_root
+from hse.fs.writer import link_or_copy
+from hse.utils.download import TIMEOUT_SECONDS, fetch_to_file
+
+# HSE_HEIGHTMAP_CACHE=0 disables the cache (every job downloads its heightmap).
+CACHE_ENABLED = os.getenv("HSE_HEIGHTMAP_CACHE", "1").strip().lower() not in {"0", "false", "no", "off"}
+# Total bytes of cached objects kept before least-recently-used eviction.
+CACHE_MAX_BYTES = int(os.getenv("HSE_HEIGHTMAP_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+# Seconds a cached URL is served without revalidating (0 = always send a conditional request).
+CACHE_FRESH_SECONDS = float(os.getenv("HSE_HEIGHTMAP_CACHE_FRESH_SECONDS", "0"))
+
+
+def cache_root() -> Path:
+    override = os.getenv("HSE_HEIGHTMAP_CACHE_DIR")
+    if override:
+        return Path(override)
+    return state_root() / "cache" / "heightmaps"
+
+
+@dataclass(frozen=True)
+class CachedHeightmap:
+    path: Path
+    sha256: str
+    size: int
+    source: str  # "hit" (fresh, no request), "revalidated" (304) or "downloaded"
+
+
+def _url_key(url: str) -> str:
+    return hashlib.sha256(url.encode("utf-8")).hexdigest()
+
+
+def _write_json(path: Path, obj: Dict[str, object]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    tmp.write_text(json.dumps(obj, sort_keys=True), encoding="utf-8")
+    tmp.replace(path)
+
+
+class HeightmapCache:
+    """
+    Content-addressed store for remote heightmaps.
+
+    objects/<sha[:2]>/<sha> hold the bytes (hardlinked into job folders, so
+    never written through and their mode is left alone); urls/<sha256(url)>.json
+    records the object plus ETag/Last-Modified for conditional revalidation and
+    a last-used time for LRU eviction.
+    """
+
+    def __init__(self, root: Optional[Path] = None, *, max_bytes: int = CACHE_MAX_BYTES) -> None:
+        self.root = root or cache_root()
+        self.max_bytes = max_bytes
+        self.objects = self.root / "objects"
+        self.urls = self.root / "urls"
+
+    def _object_path(self, sha256: str) -> Path:
+        return self.objects / sha256[:2] / sha256
+
+    def _meta_path(self, url: str) -> Path:
+        return self.urls / f"{_url_key(url)}.json"
+
+    def _load_meta(self, url: str) -> Optional[Dict[str, object]]:
+        try:
+            meta = json.loads(self._meta_path(url).read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        if meta.get("url") != url or not self._object_path(str(meta.get("sha256"))).is_file():
+            return None
+        return meta
+
+    def _store(self, incoming: Path, digest: str) -> None:
+        """Move a freshly downloaded (already hashed) file into the object store."""
+        final = self._object_path(digest)
+        final.parent.mkdir(parents=True, exist_ok=True)
+        # Same digest means same bytes, so racing writers can replace each other freely.
+        incoming.replace(final)
+
+    def fetch(self, url: str, *, dest: Optional[Path] = None, timeout: float = TIMEOUT_SECONDS) -> CachedHeightmap:
+        """
+        The cached object for `url`, downloaded or revalidated as needed.
+
+        With `dest`, the object is also linked there before returning. Until
+        then another process's eviction may unlink it, so an object that
+        vanishes before the link is downloaded again (once).
+        """
+        try:
+            return self._fetch(url, dest, timeout, revalidate=True)
+        except FileNotFoundError:
+            if dest is None:
+                raise
+            return self._fetch(url, dest, timeout, revalidate=False)
+
+    def _fetch(self, url: str, dest: Optional[Path], timeout: float, *, revalidate: bool) -> CachedHeightmap:
+        meta = self._load_meta(url) if revalidate else None
+        now = time.time()
+
+        if meta is not None and CACHE_FRESH_SECONDS > 0 and now - float(meta.get("validated_at", 0)) < CACHE_FRESH_SECONDS:
+            return self._deliver(self._touch(url, meta, "hit"), dest)
+
+        headers: Dict[str, str] = {}
+        if meta is not None:
+            if meta.get("etag"):
+                headers["If-None-Match"] = str(meta["etag"])
+            if meta.get("last_modified"):
+                headers["If-Modified-Since"] = str(meta["last_modified"])
+
+        incoming = self.objects / f".incoming.{os.getpid()}.{time.monotonic_ns()}"
+        try:
+            result = fetch_to_file(url, incoming, headers=headers, timeout=timeout)
+            if result.status == 304 and meta is not None:
+                meta["validated_at"] = now
+                return self._deliver(self._touch(url, meta, "revalidated"), dest)
+            if result.sha256 is None:
+                raise RuntimeError(f"unexpected HTTP {result.status} for {url}")
+            digest, size = result.sha256, result.size
+            self._store(incoming, digest)
+        finally:
+            incoming.unlink(missing_ok=True)
+
+        meta = {
+            "url": url,
+            "sha256": digest,
+            "size": size,
+            "etag": result.headers.get("etag"),
+            "last_modified": result.headers.get("last-modified"),
+            "validated_at": now,
+        }
+        # Linked before evicting, so our own eviction pass cannot take it from under the job.
+        entry = self._deliver(self._touch(url, meta, "downloaded"), dest)
+        self.evict(keep=(digest,))
+        return entry
+
+    def _deliver(self, entry: CachedHeightmap, dest: Optional[Path]) -> CachedHeightmap:
+        if dest is not None:
+            link_or_copy(entry.path, dest)
+        return entry
+
+    def _touch(self, url: str, meta: Dict[str, object], source: str) -> CachedHeightmap:
+        meta["last_used"] = time.time()
+        _write_json(self._meta_path(url), meta)
+        sha = str(meta["sha256"])
+        return CachedHeightmap(path=self._object_path(sha), sha256=sha, size=int(meta["size"]), source=source)
+
+    def evict(self, keep: Tuple[str, ...] = ()) -> int:
+        """Drop least-recently-used objects (and their URL records) until under max_bytes."""
+        last_used: Dict[str, float] = {}
+        metas: Dict[str, List[Path]] = {}
+        for meta_path in self.urls.glob("*.json"):
+            try:
+                meta = json.loads(meta_path.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                meta_path.unlink(missing_ok=True)
+                continue
+            sha = str(meta.get("sha256"))
+            last_used[sha] = max(last_used.get(sha, 0.0), float(meta.get("last_used", 0.0)))
+            metas.setdefault(sha, []).append(meta_path)
+
+        objects: List[Tuple[float, int, Path, str]] = []
+        total = 0
+        for obj in self.objects.glob("??/*"):
+            try:
+                size = obj.stat().st_size
+            except OSError:
+                continue
+            total += size
+            # Objects no URL points at anymore go first.
+            objects.append((last_used.get(obj.name, -1.0), size, obj, obj.name))
+
+        removed = 0
+        for _, size, obj, sha in sorted(objects):
+            if total <= self.max_bytes:
+                break
+            if sha in keep:
+                continue
+            # Jobs link the object before fetch() returns and retry if it vanished first,
+            # so unlinking here never breaks a job.
+            obj.unlink(missing_ok=True)
+            for meta_path in metas.get(sha, []):
+                meta_path.unlink(missing_ok=True)
+            total -= size
+            removed += 1
+        return removed
+
+
+def is_cacheable(url: str) -> bool:
+    return CACHE_ENABLED and url.lower().startswith(("http://", "https://"))
+
+
+__all__ = [
+    "CACHE_ENABLED",
+    "CACHE_MAX_BYTES",
+    "CachedHeightmap",
+    "HeightmapCache",
+    "cache_root",
+    "is_cacheable",
+]
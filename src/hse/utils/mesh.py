@@ -0,0 +1,205 @@
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass
+from functools import cached_property
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from hse.utils.geometry import STLMetadata, mesh_metadata
+
+
+@dataclass
+class MeshData:
+    """Vertex/face arrays of a generated mesh, carried through validation and rendering."""
+
+    vertices: np.ndarray
+    faces: np.ndarray
+    path: Optional[Path] = None
+    checksum: Optional[str] = None  # sha256 of the file at `path`, when known from writing it
+
+    @cached_property
+    def metadata(self) -> STLMetadata:
+        return mesh_metadata(self.vertices, self.faces)
+
+
+def _as_heights(heights: np.ndarray) -> np.ndarray:
+    arr = np.asarray(heights, dtype=np.float64)
+    if arr.ndim != 2 or arr.shape[0] < 2 or arr.shape[1] < 2:
+        raise ValueError("heights must be a 2-D array of at least 2x2 samples")
+    return arr
+
+
+def grid_heightfield(heights: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Triangulate a height array on its regular sample grid.
+
+    Vertices are (u, v, height) with u (columns) and v (rows) normalised to [0, 1];
+    callers scale them to physical size. Faces wind counter-clockwise seen from +height.
+    """
+    arr = _as_heights(heights)
+    h, w = arr.shape
+
+    v, u = np.meshgrid(
+        np.linspace(0.0, 1.0, h),
+        np.linspace(0.0, 1.0, w),
+        indexing="ij",
+    )
+    vertices = np.column_stack([u.ravel(), v.ravel(), arr.ravel()])
+
+    idx = np.arange(h * w, dtype=np.int64).reshape(h, w)
+    c00 = idx[:-1, :-1].ravel()
+    c10 = idx[:-1, 1:].ravel()
+    c01 = idx[1:, :-1].ravel()
+    c11 = idx[1:, 1:].ravel()
+    faces = np.concatenate(
+        [
+            np.column_stack([c00, c10, c11]),
+            np.column_stack([c00, c11, c01]),
+        ]
+    )
+    return vertices, faces
+
+
+def adaptive_size(samples: int) -> int:
+    """Smallest 2**k + 1 grid edge that holds `samples` (the quadtree's extent)."""
+    n = max(2, int(samples))
+    return (1 << max(1, math.ceil(math.log2(n - 1)))) + 1
+
+
+def _block_errors(arr: np.ndarray, size: int) -> np.ndarray:
+    """Max deviation of every size x size block from its two-triangle fit (diagonal c00 -> c11)."""
+    win = sliding_window_view(arr, (size + 1, size + 1))[::size, ::size]
+    z00 = win[..., 0, 0, None, None]
+    z10 = win[..., 0, size, None, None]
+    z01 = win[..., size, 0, None, None]
+    z11 = win[..., size, size, None, None]
+
+    t = np.linspace(0.0, 1.0, size + 1)
+    v = t[:, None]
+    u = t[None, :]
+    fit = np.where(
+        u >= v,
+        z00 + u * (z10 - z00) + v * (z11 - z10),
+        z00 + v * (z01 - z00) + u * (z11 - z01),
+    )
+    return np.abs(win - fit).max(axis=(-2, -1))
+
+
+def _quadtree_leaves(arr: np.ndarray, tolerance: float, shape: Tuple[int, int]) -> List[Tuple[int, np.ndarray, np.ndarray]]:
+    """
+    Top-down split of the square grid `arr` into (size, row0, col0) leaf blocks within
+    `tolerance`. Samples beyond `shape` are NaN padding: blocks reaching into it always
+    split (their error is NaN) and blocks entirely inside it are dropped.
+    """
+    n = arr.shape[0]
+    h, w = shape
+    leaves: List[Tuple[int, np.ndarray, np.ndarray]] = []
+    active = np.ones((1, 1), dtype=bool)
+    size = n - 1
+    while size >= 1:
+        starts = np.arange(active.shape[0]) * size
+        active = active & (starts < h - 1)[:, None] & (starts < w - 1)[None, :]
+        if size == 1:
+            # A single cell is reproduced exactly by its two triangles.
+            leaf = active
+        else:
+            with np.errstate(invalid="ignore"):
+                leaf = active & (_block_errors(arr, size) <= tolerance)
+        rows, cols = np.nonzero(leaf)
+        if len(rows):
+            leaves.append((size, rows * size, cols * size))
+        split = active & ~leaf
+        if not split.any():
+            break
+        active = split.repeat(2, axis=0).repeat(2, axis=1)
+        size //= 2
+    return leaves
+
+
+def adaptive_heightfield(heights: np.ndarray, *, max_error: float) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Error-bounded quadtree triangulation of a height array on its own sample grid.
+
+    Flat or planar regions collapse into large blocks; blocks are refined until their
+    triangles stay within `max_error` (same units as `heights`) of every sample. Blocks
+    that border finer neighbours are fan-triangulated so the surface has no T-junction
+    cracks. Output matches `grid_heightfield`: (u, v, height) vertices, CCW faces.
+    Any shape works: the quadtree spans the next 2**k + 1 square and the padding
+    beyond the samples is never meshed.
+    """
+    native = _as_heights(heights)
+    h, w = native.shape
+    n = adaptive_size(max(h, w))
+    arr = np.full((n, n), np.nan)
+    arr[:h, :w] = native
+
+    # Fanned blocks can deviate by the block fit error plus the edge-vertex error,
+    # so refine against half the budget to keep the overall bound.
+    leaves = _quadtree_leaves(arr, max(float(max_error), 0.0) / 2.0, (h, w))
+
+    used = np.zeros(arr.shape, dtype=bool)
+    for size, r0, c0 in leaves:
+        used[r0, c0] = used[r0, c0 + size] = True
+        used[r0 + size, c0] = used[r0 + size, c0 + size] = True
+
+    index = np.full(arr.shape, -1, dtype=np.int64)
+    rows, cols = np.nonzero(used)
+    index[rows, cols] = np.arange(len(rows))
+    grid_vertices = np.column_stack([cols / (w - 1), rows / (h - 1), arr[rows, cols]])
+
+    faces: List[np.ndarray] = []
+    centers: List[Tuple[float, float, float]] = []
+    for size, r0, c0 in leaves:
+        c00 = index[r0, c0]
+        c10 = index[r0, c0 + size]
+        c01 = index[r0 + size, c0]
+        c11 = index[r0 + size, c0 + size]
+
+        fanned = np.zeros(len(r0), dtype=bool)
+        if size > 1:
+            t = np.arange(1, size)
+            fanned = (
+                used[r0[:, None], c0[:, None] + t].any(axis=1)
+                | used[r0[:, None] + t, c0[:, None] + size].any(axis=1)
+                | used[r0[:, None] + size, c0[:, None] + t].any(axis=1)
+                | used[r0[:, None] + t, c0[:, None]].any(axis=1)
+            )
+
+        plain = ~fanned
+        faces.append(np.column_stack([c00[plain], c10[plain], c11[plain]]))
+        faces.append(np.column_stack([c00[plain], c11[plain], c01[plain]]))
+
+        for i0, j0 in zip(r0[fanned].tolist(), c0[fanned].tolist()):
+            t = np.arange(size)
+            ring_r = np.concatenate([np.full(size, i0), i0 + t, np.full(size, i0 + size), i0 + size - t])
+            ring_c = np.concatenate([j0 + t, np.full(size, j0 + size), j0 + size - t, np.full(size, j0)])
+            keep = used[ring_r, ring_c]
+            ring = index[ring_r[keep], ring_c[keep]]
+
+            center = len(grid_vertices) + len(centers)
+            half = size / 2.0
+            centers.append((
+                (j0 + half) / (w - 1),
+                (i0 + half) / (h - 1),
+                (arr[i0, j0] + arr[i0 + size, j0 + size]) / 2.0,
+            ))
+            faces.append(np.column_stack([np.full(len(ring), center), ring, np.roll(ring, -1)]))
+
+    vertices = grid_vertices
+    if centers:
+        vertices = np.vstack([grid_vertices, np.asarray(centers, dtype=np.float64)])
+    return vertices, np.concatenate(faces).astype(np.int64)
+
+
+def heightfield_mesh(heights: np.ndarray, *, max_error: float = 0.0) -> Tuple[np.ndarray, np.ndarray]:
+    """Adaptive triangulation when `max_error` > 0, otherwise the full regular grid."""
+    if max_error > 0:
+        return adaptive_heightfield(heights, max_error=max_error)
+    return grid_heightfield(heights)
+
+
+__all__ = ["MeshData", "grid_heightfield", "adaptive_heightfield", "adaptive_size", "heightfield_mesh"]
@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+import json
+import os
+import socket
+from pathlib import Path
+from typing import Iterable, List, Optional, Tuple
+
+from hse.fs.paths import sanitize_subfolder, state_root
+
+# HSE_WORKER_NOTIFY=0 disables the API -> worker wake-up channel (workers then rely on watching/polling).
+NOTIFY_ENABLED = os.getenv("HSE_WORKER_NOTIFY", "1").strip().lower() not in {"0", "false", "no", "off"}
+# Unix socket paths are limited to ~108 bytes; keep names short.
+_SOCKET_SUFFIX = ".sock"
+# Listeners read datagrams into a 4 KiB buffer; multi-job hints are split to fit.
+_MAX_DATAGRAM = 4096
+
+
+def notify_dir() -> Path:
+    override = os.getenv("HSE_WORKER_NOTIFY_DIR")
+    if override:
+        return Path(override)
+    return state_root() / "notify"
+
+
+class NotifyListener:
+    """
+    Worker side: a non-blocking Unix datagram socket that receives "job queued" hints.
+
+    Every worker binds its own socket in `notify_dir()` so several worker
+    processes/containers sharing the state dir all get woken.
+    """
+
+    def __init__(self, name: Optional[str] = None) -> None:
+        directory = notify_dir()
+        directory.mkdir(parents=True, exist_ok=True)
+        self.path = directory / f"{name or f'{socket.gethostname()[:24]}-{os.getpid()}'}{_SOCKET_SUFFIX}"
+        self.path.unlink(missing_ok=True)
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self._sock.setblocking(False)
+        self._sock.bind(str(self.path))
+
+    def fileno(self) -> int:
+        return self._sock.fileno()
+
+    def drain(self) -> List[Tuple[str, Optional[str]]]:
+        """Read every pending hint as (job_id, subfolder); malformed datagrams are dropped."""
+        jobs: List[Tuple[str, Optional[str]]] = []
+        while True:
+            try:
+                data = self._sock.recv(4096)
+            except (BlockingIOError, InterruptedError):
+                break
+            try:
+                msg = json.loads(data.decode("utf-8"))
+                if "jobs" in msg:
+                    # Batch hint: {"jobs": [[job_id, subfolder], ...]}
+                    jobs.extend((str(job_id), sanitize_subfolder(sub)) for job_id, sub in msg["jobs"])
+                else:
+                    jobs.append((str(msg["job_id"]), sanitize_subfolder(msg.get("subfolder"))))
+            except Exception:
+                continue
+        return jobs
+
+    def close(self) -> None:
+        self._sock.close()
+        self.path.unlink(missing_ok=True)
+
+
+_client: Optional[Tuple[int, socket.socket]] = None
+
+
+def _client_socket() -> socket.socket:
+    global _client
+    if _client is None or _client[0] != os.getpid():
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        sock.setblocking(False)
+        _client = (os.getpid(), sock)
+    return _client[1]
+
+
+def _payloads(jobs: List[Tuple[str, Optional[str]]]) -> List[bytes]:
+    """One datagram per single job; batches are packed into as few datagrams as fit."""
+    if len(jobs) == 1:
+        job_id, subfolder = jobs[0]
+        return [json.dumps({"job_id": job_id, "subfolder": subfolder}).encode("utf-8")]
+    payloads: List[bytes] = []
+    chunk: List[List[Optional[str]]] = []
+    for job_id, subfolder in jobs:
+        chunk.append([job_id, subfolder])
+        if len(chunk) > 1 and len(json.dumps({"jobs": chunk})) > _MAX_DATAGRAM:
+            payloads.append(json.dumps({"jobs": chunk[:-1]}).encode("utf-8"))
+            chunk = chunk[-1:]
+    if chunk:
+        payloads.append(json.dumps({"jobs": chunk}).encode("utf-8"))
+    return payloads
+
+
+def notify_jobs_queued(jobs: Iterable[Tuple[str, Optional[str]]]) -> int:
+    """
+    API side: wake every listening worker once for a set of (job_id, subfolder).
+    Never raises and never blocks; returns the number of workers reached (0 just
+    means they will find the jobs through watching/polling instead).
+    """
+    if not NOTIFY_ENABLED:
+        return 0
+    pending = [(job_id, sanitize_subfolder(subfolder)) for job_id, subfolder in jobs]
+    if not pending:
+        return 0
+    try:
+        entries = list(os.scandir(notify_dir()))
+    except OSError:
+        return 0
+
+    payloads = _payloads(pending)
+    sock = _client_socket()
+    reached = 0
+    for entry in entries:
+        if not entry.name.endswith(_SOCKET_SUFFIX):
+            continue
+        try:
+            for payload in payloads:
+                sock.sendto(payload, entry.path)
+            reached += 1
+        except (ConnectionRefusedError, FileNotFoundError):
+            # Socket file left behind by a worker that exited without cleanup.
+            Path(entry.path).unlink(missing_ok=True)
+        except OSError:
+            # Receiver queue full (it is already awake) or transient error.
+            continue
+    return reached
+
+
+def notify_job_queued(job_id: str, subfolder: Optional[str] = None) -> int:
+    """API side: wake every listening worker for one job (see notify_jobs_queued)."""
+    return notify_jobs_queued([(job_id, subfolder)])
+
+
+__all__ = ["NOTIFY_ENABLED", "NotifyListener", "notify_dir", "notify_job_queued", "notify_jobs_queued"]
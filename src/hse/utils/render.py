@@ -1,16 +1,39 @@
 from __future__ import annotations
 
+import math
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Mapping, Optional, Tuple
+
 import numpy as np
-import matplotlib
+import trimesh
+from PIL import Image
+
+from hse.fs.hashing import FileDigest, HashingWriter
+from hse.utils.stl import face_normals
+
+BACKGROUND = np.array([0x0B, 0x10, 0x20], dtype=np.uint8)  # "#0b1020"
+# Max candidate pixels evaluated per rasterizer batch (bounds temporary memory).
+_FRAGMENT_BUDGET = 1 << 22
+
+
+@dataclass(frozen=True)
+class Camera:
+    """Orbit camera looking at the mesh centre; angles in degrees, matplotlib view_init style."""
 
-# Force headless backend for containers
-matplotlib.use("Agg")
+    elev: float = 30.0
+    azim: float = 35.0
+    fov: float = 30.0
 
-import matplotlib.pyplot as plt  # noqa: E402
-from mpl_toolkits.mplot3d.art3d import Poly3DCollection  # noqa: E402
-from pathlib import Path  # noqa: E402
-import trimesh  # noqa: E402
-from PIL import Image  # noqa: E402
+
+HERO_CAMERA = Camera()
+# Standard preview set; iso uses the true isometric elevation atan(1/sqrt(2)).
+PREVIEW_CAMERAS: Dict[str, Camera] = {
+    "hero": HERO_CAMERA,
+    "iso": Camera(elev=35.264, azim=45.0),
+    "top": Camera(elev=90.0, azim=-90.0),
+    "side": Camera(elev=0.0, azim=90.0),
+}
 
 
 def _shaded_colors(normals: np.ndarray) -> np.ndarray:
@@ -23,65 +46,234 @@ def _shaded_colors(normals: np.ndarray) -> np.ndarray:
     return np.clip(colors, 0.0, 1.0)
 
 
-def render_hero_from_stl(stl_path: Path, out_path: Path, size_px: int = 640) -> dict:
-    if not stl_path.exists():
-        raise FileNotFoundError(f"stl missing: {stl_path}")
+def _surface_centroid(tris: np.ndarray) -> np.ndarray:
+    areas = np.linalg.norm(np.cross(tris[:, 1] - tris[:, 0], tris[:, 2] - tris[:, 0]), axis=1)
+    total = areas.sum()
+    centers = tris.mean(axis=1)
+    if total <= 0:
+        return centers.mean(axis=0)
+    return (centers * areas[:, None]).sum(axis=0) / total
 
-    mesh = trimesh.load(stl_path, force="mesh", skip_materials=True)
-    if mesh.is_empty or mesh.vertices.size == 0 or mesh.faces.size == 0:
+
+def _project(verts: np.ndarray, camera: Camera, size: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Perspective-project centred vertices to pixel coordinates and inverse depth."""
+    radius = float(np.linalg.norm(verts, axis=1).max()) or 1.0
+    half_fov = math.radians(camera.fov) / 2.0
+    distance = radius / math.sin(half_fov) * 1.05
+    focal = (size / 2.0) / math.tan(half_fov)
+
+    el, az = math.radians(camera.elev), math.radians(camera.azim)
+    toward_eye = np.array([math.cos(el) * math.cos(az), math.cos(el) * math.sin(az), math.sin(el)])
+    forward = -toward_eye
+    up_hint = np.array([0.0, 0.0, 1.0]) if abs(toward_eye[2]) < 0.999 else np.array([0.0, 1.0, 0.0])
+    right = np.cross(forward, up_hint)
+    right /= np.linalg.norm(right)
+    up = np.cross(right, forward)
+
+    rel = verts - toward_eye * distance
+    depth = np.maximum(rel @ forward, 1e-6)
+    xy = np.column_stack([
+        size / 2.0 + focal * (rel @ right) / depth,
+        size / 2.0 - focal * (rel @ up) / depth,
+    ])
+    return xy, 1.0 / depth
+
+
+def _rasterize(xy: np.ndarray, inv_depth: np.ndarray, faces: np.ndarray, size: int) -> np.ndarray:
+    """Z-buffered coverage: returns the visible face index per pixel (-1 for background)."""
+    tri = xy[faces]
+    tri_w = inv_depth[faces]
+    ax, ay = tri[:, 0, 0], tri[:, 0, 1]
+    bx, by = tri[:, 1, 0], tri[:, 1, 1]
+    cx, cy = tri[:, 2, 0], tri[:, 2, 1]
+    area = (bx - ax) * (cy - ay) - (by - ay) * (cx - ax)
+
+    # Pixel i is sampled at its centre i + 0.5.
+    lo_x = np.maximum(np.ceil(tri[..., 0].min(axis=1) - 0.5), 0).astype(np.int64)
+    hi_x = np.minimum(np.floor(tri[..., 0].max(axis=1) - 0.5), size - 1).astype(np.int64)
+    lo_y = np.maximum(np.ceil(tri[..., 1].min(axis=1) - 0.5), 0).astype(np.int64)
+    hi_y = np.minimum(np.floor(tri[..., 1].max(axis=1) - 0.5), size - 1).astype(np.int64)
+    tris = np.nonzero((np.abs(area) > 1e-12) & (hi_x >= lo_x) & (hi_y >= lo_y))[0]
+
+    # 1/z is affine in screen space: near = dz_dx * x + dz_dy * y + z0 per triangle.
+    wa, wb, wc = tri_w[:, 0], tri_w[:, 1], tri_w[:, 2]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        dz_dx = ((wb - wa) * (cy - ay) - (wc - wa) * (by - ay)) / area
+        dz_dy = ((wc - wa) * (bx - ax) - (wb - wa) * (cx - ax)) / area
+    z0 = wa - dz_dx * ax - dz_dy * ay
+
+    # One scanline row per (triangle, covered y); each row is clipped to a pixel run.
+    row_counts = hi_y[tris] - lo_y[tris] + 1
+    row_tri = np.repeat(tris, row_counts)
+    row_start = np.cumsum(row_counts) - row_counts
+    row_y = lo_y[row_tri] + (np.arange(len(row_tri)) - np.repeat(row_start, row_counts))
+    sy = row_y + 0.5
+
+    sign = np.sign(area[row_tri])
+    x_lo = np.full(len(row_tri), -np.inf)
+    x_hi = np.full(len(row_tri), np.inf)
+    empty = np.zeros(len(row_tri), dtype=bool)
+    for px_, py_, qx_, qy_ in ((ax, ay, bx, by), (bx, by, cx, cy), (cx, cy, ax, ay)):
+        px, py, qx, qy = px_[row_tri], py_[row_tri], qx_[row_tri], qy_[row_tri]
+        # Inside half-plane: sign * edge(p, q, (x, sy)) >= 0, i.e. slope * x + offset >= 0.
+        slope = -sign * (qy - py)
+        offset = sign * ((qx - px) * (sy - py) + (qy - py) * px)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            bound = -offset / slope
+        x_lo = np.where(slope > 0, np.maximum(x_lo, bound), x_lo)
+        x_hi = np.where(slope < 0, np.minimum(x_hi, bound), x_hi)
+        empty |= (slope == 0) & (offset < 0)
+
+    eps = 1e-7
+    run_lo = np.maximum(np.ceil(x_lo - 0.5 - eps), lo_x[row_tri])
+    run_hi = np.minimum(np.floor(x_hi - 0.5 + eps), hi_x[row_tri])
+    run_len = np.where(empty, 0, np.maximum(run_hi - run_lo + 1, 0)).astype(np.int64)
+    run_lo = run_lo.astype(np.int64)
+    row_dz = dz_dx[row_tri]
+    row_near = z0[row_tri] + dz_dy[row_tri] * sy + row_dz * (run_lo + 0.5)
+
+    zbuf = np.full(size * size, -np.inf)
+    fbuf = np.full(size * size, -1, dtype=np.int64)
+    ends = np.cumsum(run_len)
+    first_row = 0
+    while first_row < len(run_len):
+        # Batch whole rows so each batch expands to at most _FRAGMENT_BUDGET pixels.
+        base = ends[first_row] - run_len[first_row]
+        last_row = max(int(np.searchsorted(ends, base + _FRAGMENT_BUDGET, side="right")), first_row + 1)
+        rows = slice(first_row, last_row)
+        first_row = last_row
+
+        lens = run_len[rows]
+        total = int(lens.sum())
+        if total == 0:
+            continue
+        frag_row = np.repeat(np.arange(rows.start, rows.stop), lens)
+        frag_start = np.cumsum(lens) - lens
+        step = np.arange(total) - np.repeat(frag_start, lens)
+        frag_x = run_lo[frag_row] + step
+        near = row_near[frag_row] + row_dz[frag_row] * step
+        pix = row_y[frag_row] * size + frag_x
+        face = row_tri[frag_row]
+
+        np.maximum.at(zbuf, pix, near)
+        win = near >= zbuf[pix]
+        fbuf[pix[win]] = face[win]
+
+    return fbuf.reshape(size, size)
+
+
+@dataclass
+class _Scene:
+    """Mesh state shared by every view: centred vertices, faces and per-face colours."""
+
+    vertices: np.ndarray
+    faces: np.ndarray
+    colors: np.ndarray
+    bbox_diag: float
+
+
+def _prepare_scene(vertices: np.ndarray, faces: np.ndarray) -> _Scene:
+    verts = np.asarray(vertices, dtype=np.float64)
+    idx = np.asarray(faces, dtype=np.int64)
+    if verts.size == 0 or idx.size == 0:
         raise ValueError("invalid or empty mesh")
 
-    diag = float(np.linalg.norm(mesh.extents))
+    diag = float(np.linalg.norm(verts.max(axis=0) - verts.min(axis=0)))
     if diag < 1e-3:
         raise ValueError("stl_bbox_degenerate")
 
-    verts = mesh.vertices - mesh.centroid
-    faces = mesh.faces
-    normals = mesh.face_normals
+    tris = verts[idx]
+    centered = verts - _surface_centroid(tris)
+    colors = (_shaded_colors(face_normals(tris)) * 255.0).astype(np.float32)
+    return _Scene(vertices=centered, faces=idx, colors=colors, bbox_diag=diag)
 
-    colors = _shaded_colors(normals)
-    tris = verts[faces]
 
-    fig = plt.figure(figsize=(size_px / 100.0, size_px / 100.0), dpi=100)
-    ax = fig.add_subplot(111, projection="3d")
+def _render_pixels(scene: _Scene, camera: Camera, size_px: int, supersample: int) -> np.ndarray:
+    ss = max(1, int(supersample))
+    size = int(size_px) * ss
+    xy, inv_depth = _project(scene.vertices, camera, size)
+    face_ids = _rasterize(xy, inv_depth, scene.faces, size)
 
-    coll = Poly3DCollection(tris, facecolors=colors, edgecolor=(0.05, 0.12, 0.20), linewidths=0.1)
-    ax.add_collection3d(coll)
+    img = np.empty((size, size, 3), dtype=np.float32)
+    img[:] = BACKGROUND
+    covered = face_ids >= 0
+    img[covered] = scene.colors[face_ids[covered]]
+    if ss > 1:
+        img = sum(img[dy::ss, dx::ss] for dy in range(ss) for dx in range(ss)) / float(ss * ss)
+    return np.clip(np.rint(img), 0, 255).astype(np.uint8)
 
-    extent = (verts.max(axis=0) - verts.min(axis=0)).max() or 1.0
-    limit = extent * 0.65
-    ax.set_xlim(-limit, limit)
-    ax.set_ylim(-limit, limit)
-    ax.set_zlim(-limit, limit)
 
-    ax.view_init(elev=30, azim=35)
-    ax.set_proj_type("persp")
-    ax.axis("off")
+def _save_png(pixels: np.ndarray, out_path: Path, label: str) -> FileDigest:
+    with HashingWriter(out_path) as fh:
+        Image.fromarray(pixels, mode="RGB").save(fh, format="PNG")
+    if fh.digest.size == 0:
+        raise RuntimeError(f"{label}_render_failed: empty output")
+    return fh.digest
 
-    background = "#0b1020"
-    ax.set_facecolor(background)
-    fig.patch.set_facecolor(background)
 
-    out_path.parent.mkdir(parents=True, exist_ok=True)
-    fig.savefig(
-        out_path,
-        facecolor=background,
-        bbox_inches="tight",
-        pad_inches=0,
-        transparent=False,
+def render_views(
+    vertices: np.ndarray,
+    faces: np.ndarray,
+    outputs: Mapping[str, Path],
+    size_px: int = 640,
+    *,
+    cameras: Optional[Mapping[str, Camera]] = None,
+    supersample: int = 2,
+    require_variance: Tuple[str, ...] = ("hero",),
+) -> Dict[str, dict]:
+    """
+    Render several named views of one mesh in a single pass.
+
+    The mesh is centred, shaded and validated once; each view only re-projects and
+    rasterizes. `outputs` maps view name -> PNG path, `cameras` maps view name -> Camera
+    (defaults to PREVIEW_CAMERAS). Views listed in `require_variance` fail when flat.
+    Per-view stats include the PNG's sha256 (`checksum`), computed while it is written.
+    """
+    scene = _prepare_scene(vertices, faces)
+    cams = PREVIEW_CAMERAS if cameras is None else cameras
+    stats: Dict[str, dict] = {}
+    for name, out_path in outputs.items():
+        camera = cams.get(name)
+        if camera is None:
+            raise ValueError(f"no camera for view: {name}")
+        pixels = _render_pixels(scene, camera, size_px, supersample)
+        variance = float(pixels.astype(np.float32).var())
+        if name in require_variance and variance < 2.0:
+            raise RuntimeError(f"{name}_render_failed: flat preview")
+        digest = _save_png(pixels, out_path, name)
+        stats[name] = {"variance": variance, "bbox_diag": scene.bbox_diag, "checksum": digest.sha256}
+    return stats
+
+
+def render_mesh(
+    vertices: np.ndarray,
+    faces: np.ndarray,
+    out_path: Path,
+    size_px: int = 640,
+    *,
+    camera: Camera = HERO_CAMERA,
+    supersample: int = 2,
+) -> dict:
+    """Render a flat-shaded preview PNG with a NumPy z-buffer rasterizer."""
+    stats = render_views(
+        vertices,
+        faces,
+        {"hero": out_path},
+        size_px,
+        cameras={"hero": camera},
+        supersample=supersample,
     )
-    plt.close(fig)
+    return stats["hero"]
 
-    if not out_path.exists() or out_path.stat().st_size == 0:
-        raise RuntimeError("hero_render_failed: empty output")
 
-    img = Image.open(out_path).convert("RGB")
-    arr = np.asarray(img, dtype=np.float32)
-    variance = float(arr.var())
-    if variance < 2.0:
-        raise RuntimeError("hero_render_failed: flat preview")
+def render_hero_from_stl(stl_path: Path, out_path: Path, size_px: int = 640) -> dict:
+    if not stl_path.exists():
+        raise FileNotFoundError(f"stl missing: {stl_path}")
 
-    return {"variance": variance, "bbox_diag": diag}
+    mesh = trimesh.load(stl_path, force="mesh", skip_materials=True)
+    if mesh.is_empty or mesh.vertices.size == 0 or mesh.faces.size == 0:
+        raise ValueError("invalid or empty mesh")
+    return render_mesh(mesh.vertices, mesh.faces, out_path, size_px)
 
 
-__all__ = ["render_hero_from_stl"]
+__all__ = ["Camera", "HERO_CAMERA", "PREVIEW_CAMERAS", "render_views", "render_mesh", "render_hero_from_stl"]
@@ -0,0 +1,175 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+from hse.fs.paths import state_root
+from hse.fs.writer import link_or_copy
+
+# HSE_RESULT_CACHE=0 disables whole-job memoization.
+CACHE_ENABLED = os.getenv("HSE_RESULT_CACHE", "1").strip().lower() not in {"0", "false", "no", "off"}
+# Total bytes of cached job outputs kept before least-recently-used eviction.
+CACHE_MAX_BYTES = int(os.getenv("HSE_RESULT_CACHE_MAX_BYTES", str(2 * 1024 * 1024 * 1024)))
+
+
+def cache_root() -> Path:
+    override = os.getenv("HSE_RESULT_CACHE_DIR")
+    if override:
+        return Path(override)
+    return state_root() / "cache" / "results"
+
+
+def result_key(input_checksum: str, params: Dict[str, Any]) -> str:
+    """Canonical sha256 over the input checksum and normalized generation params."""
+    doc = {"input": input_checksum, "params": params}
+    canonical = json.dumps(doc, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+@dataclass(frozen=True)
+class CachedResult:
+    key: str
+    overrides: Dict[str, Dict[str, Any]]
+    geometry_check: Dict[str, Any]
+    files: List[str]
+
+
+class ResultCache:
+    """
+    Memoized job outputs: <root>/<key>/ holds hardlinks of a finished job's files
+    plus meta.json (per-file manifest overrides and the geometry check). The
+    inodes are shared with published job folders, so their mode is left alone;
+    nothing writes through them (writers unlink first).
+
+    Entries are published with an atomic directory rename, so concurrent workers
+    finishing the same job never expose a partial entry.
+    """
+
+    def __init__(self, root: Optional[Path] = None, *, max_bytes: int = CACHE_MAX_BYTES) -> None:
+        self.root = root or cache_root()
+        self.max_bytes = max_bytes
+
+    def _entry(self, key: str) -> Path:
+        return self.root / key
+
+    def _load_meta(self, key: str) -> Optional[Dict[str, Any]]:
+        try:
+            meta = json.loads((self._entry(key) / "meta.json").read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        return meta if meta.get("key") == key else None
+
+    def materialize(self, key: str, job_root: Path) -> Optional[CachedResult]:
+        """Hardlink a cached result into `job_root`; None on a miss or an incomplete entry."""
+        meta = self._load_meta(key)
+        if meta is None:
+            return None
+        entry = self._entry(key)
+        files: List[str] = list(meta.get("files") or [])
+        if not files or not all((entry / rel).is_file() for rel in files):
+            return None
+
+        for rel in files:
+            link_or_copy(entry / rel, job_root / rel)
+
+        meta["last_used"] = time.time()
+        self._write_meta(entry, meta)
+        return CachedResult(
+            key=key,
+            overrides=dict(meta.get("overrides") or {}),
+            geometry_check=dict(meta.get("geometry_check") or {}),
+            files=files,
+        )
+
+    def store(
+        self,
+        key: str,
+        job_root: Path,
+        files: Iterable[str],
+        *,
+        overrides: Dict[str, Dict[str, Any]],
+        geometry_check: Dict[str, Any],
+    ) -> bool:
+        """Publish a finished job's outputs under `key`. Returns False if already cached."""
+        entry = self._entry(key)
+        if (entry / "meta.json").is_file():
+            return False
+
+        rels = [rel for rel in files if (job_root / rel).is_file()]
+        staging = self.root / f".staging.{os.getpid()}.{time.monotonic_ns()}"
+        try:
+            size = 0
+            for rel in rels:
+                dest = staging / rel
+                link_or_copy(job_root / rel, dest)
+                size += dest.stat().st_size
+            now = time.time()
+            self._write_meta(
+                staging,
+                {
+                    "key": key,
+                    "files": rels,
+                    "overrides": {rel: overrides[rel] for rel in rels if rel in overrides},
+                    "geometry_check": geometry_check,
+                    "size_bytes": size,
+                    "created_at": now,
+                    "last_used": now,
+                },
+            )
+            try:
+                os.rename(staging, entry)
+            except OSError:
+                # Another worker published the same key first.
+                return False
+        finally:
+            if staging.exists():
+                shutil.rmtree(staging, ignore_errors=True)
+        self.evict(keep=(key,))
+        return True
+
+    @staticmethod
+    def _write_meta(entry: Path, meta: Dict[str, Any]) -> None:
+        entry.mkdir(parents=True, exist_ok=True)
+        tmp = entry / f".meta.{os.getpid()}.tmp"
+        tmp.write_text(json.dumps(meta, sort_keys=True), encoding="utf-8")
+        tmp.replace(entry / "meta.json")
+
+    def evict(self, keep: Iterable[str] = ()) -> int:
+        """Drop least-recently-used entries until the cache fits in max_bytes."""
+        keep = set(keep)
+        entries = []
+        total = 0
+        try:
+            candidates = [p for p in self.root.iterdir() if p.is_dir() and not p.name.startswith(".")]
+        except OSError:
+            return 0
+        for path in candidates:
+            meta = self._load_meta(path.name)
+            if meta is None:
+                # Half-written or foreign directory: nothing can hit it.
+                shutil.rmtree(path, ignore_errors=True)
+                continue
+            size = int(meta.get("size_bytes") or 0)
+            total += size
+            entries.append((float(meta.get("last_used") or 0.0), size, path))
+
+        removed = 0
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if path.name in keep:
+                continue
+            # Jobs hold their own hardlinks; dropping the entry never breaks them.
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
+            removed += 1
+        return removed
+
+
+__all__ = ["CACHE_ENABLED", "CACHE_MAX_BYTES", "CachedResult", "ResultCache", "cache_root", "result_key"]
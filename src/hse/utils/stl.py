@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+import io
+from pathlib import Path
+
+import numpy as np
+
+from hse.fs.hashing import FileDigest, HashingWriter
+
+# Binary STL record layout: normal, three vertices, attribute byte count (50 bytes).
+STL_RECORD_DTYPE = np.dtype(
+    [
+        ("normal", "<f4", (3,)),
+        ("vertices", "<f4", (3, 3)),
+        ("attr", "<u2"),
+    ]
+)
+STL_HEADER_BYTES = 80
+
+
+def face_normals(triangles: np.ndarray) -> np.ndarray:
+    """Unit normals for an (N, 3, 3) triangle array; degenerate faces get a zero normal."""
+    tris = np.asarray(triangles, dtype=np.float64)
+    normals = np.cross(tris[:, 1] - tris[:, 0], tris[:, 2] - tris[:, 0])
+    lengths = np.linalg.norm(normals, axis=1, keepdims=True)
+    np.divide(normals, lengths, out=normals, where=lengths > 0)
+    return normals
+
+
+def _triangles(vertices: np.ndarray, faces: np.ndarray) -> np.ndarray:
+    verts = np.asarray(vertices, dtype=np.float64)
+    idx = np.asarray(faces, dtype=np.int64)
+    if verts.ndim != 2 or verts.shape[1] != 3:
+        raise ValueError("vertices must be an (N, 3) array")
+    if idx.ndim != 2 or idx.shape[1] != 3:
+        raise ValueError("faces must be an (M, 3) array")
+    return verts[idx]
+
+
+def stl_records(vertices: np.ndarray, faces: np.ndarray) -> np.ndarray:
+    """Pack a mesh into binary STL records (one structured row per face)."""
+    tris = _triangles(vertices, faces)
+    records = np.zeros(len(tris), dtype=STL_RECORD_DTYPE)
+    records["normal"] = face_normals(tris)
+    records["vertices"] = tris
+    return records
+
+
+def write_binary_stl(path: Path, vertices: np.ndarray, faces: np.ndarray, *, name: str = "relief") -> FileDigest:
+    records = stl_records(vertices, faces)
+    header = name.encode("ascii", errors="ignore")[:STL_HEADER_BYTES].ljust(STL_HEADER_BYTES, b" ")
+
+    with HashingWriter(path) as fh:
+        fh.write(header)
+        fh.write(np.uint32(len(records)).tobytes())
+        fh.write(records.tobytes())
+    return fh.digest
+
+
+def write_ascii_stl(path: Path, vertices: np.ndarray, faces: np.ndarray, *, name: str = "relief") -> FileDigest:
+    tris = _triangles(vertices, faces)
+    normals = face_normals(tris)
+    # One row per facet: normal followed by its three vertices.
+    rows = np.concatenate([normals, tris.reshape(-1, 9)], axis=1)
+    facet = (
+        "  facet normal %.6f %.6f %.6f\n"
+        "    outer loop\n"
+        "      vertex %.6f %.6f %.6f\n"
+        "      vertex %.6f %.6f %.6f\n"
+        "      vertex %.6f %.6f %.6f\n"
+        "    endloop\n"
+        "  endfacet"
+    )
+
+    raw = HashingWriter(path)
+    with io.TextIOWrapper(io.BufferedWriter(raw), encoding="ascii") as fh:
+        fh.write(f"solid {name}\n")
+        if len(rows):
+            np.savetxt(fh, rows, fmt=facet)
+        fh.write(f"endsolid {name}\n")
+    return raw.digest
+
+
+def write_stl(
+    path: Path,
+    vertices: np.ndarray,
+    faces: np.ndarray,
+    *,
+    ascii: bool = False,
+    name: str = "relief",
+) -> FileDigest:
+    """Write a mesh as binary STL (default) or ASCII STL; returns the sha256/size computed while writing."""
+    if ascii:
+        return write_ascii_stl(path, vertices, faces, name=name)
+    return write_binary_stl(path, vertices, faces, name=name)
+
+
+__all__ = [
+    "STL_RECORD_DTYPE",
+    "STL_HEADER_BYTES",
+    "face_normals",
+    "stl_records",
+    "write_binary_stl",
+    "write_ascii_stl",
+    "write_stl",
+]
@@ -2,19 +2,47 @@ from __future__ import annotations
 
 import json
 import os
-import time
+import secrets
+import sys
+import threading
 import traceback
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from pathlib import Path
-from typing import List, Optional, Tuple
+from typing import Dict, Iterable, List, Optional, Tuple
 
 from hse.contracts.envelopes import now_iso
-from hse.fs.paths import assets_root, assert_valid_job_id, sanitize_subfolder
+from hse.fs.claims import ClaimKeeper, claim_owner, claim_path, release_claim, try_claim
+from hse.fs.index import JobIndex, ensure_backfilled, job_index, record_job
+from hse.fs.paths import assets_root, assert_valid_job_id, job_json_path, sanitize_subfolder
+from hse.fs.status import infer_status_from_files
+from hse.fs.watch import JobWatcher
 from hse.fs.writer import write_manifest, write_surface_job_json
-from hse.routes.jobs import infer_status_from_files
-from hse.workers.surface_worker import _read_job_state, run_surface_job
+from hse.metrics import (
+    DOWNLOAD_BYTES,
+    JOB_FAILURES,
+    JOB_PEAK_RSS,
+    JOB_SECONDS,
+    JOBS_FINISHED,
+    JOBS_IN_FLIGHT,
+    STAGE_CPU_SECONDS,
+    STAGE_SECONDS,
+    WORKER_METRICS_PORT,
+    start_metrics_server,
+)
+from hse.utils.notify import NOTIFY_ENABLED, NotifyListener
+from hse.workers.surface_worker import JobReport, _read_job_state, run_surface_job
 
 
 POLL_SECONDS = float(os.getenv("HSE_WORKER_POLL_INTERVAL", "2"))
+# Number of job processes; 1 keeps the original in-process sequential loop.
+WORKER_PROCESSES = max(1, int(os.getenv("HSE_WORKER_PROCESSES", "1")))
+# Recycle a job process after this many jobs (0 = never).
+WORKER_MAX_JOBS = max(0, int(os.getenv("HSE_WORKER_MAX_JOBS", "0")))
+
+JobKey = Tuple[str, Optional[str]]
+# _process_job's status plus the run's report (None when skipped or run_surface_job raised).
+JobResult = Tuple[str, Optional[JobReport]]
 
 
 def _heartbeat_path() -> Path:
@@ -31,13 +59,18 @@ def _touch_heartbeat() -> None:
     hb.write_text(now_iso(), encoding="utf-8")
 
 
-def _read_status(job_json: Path) -> str:
+def _read_job_doc(job_json: Path) -> Optional[Dict[str, object]]:
     try:
         doc = json.loads(job_json.read_text(encoding="utf-8"))
-        status = str(doc.get("status") or "").strip().lower()
-        return status or "queued"
     except Exception:
-        return "queued"
+        return None
+    return doc if isinstance(doc, dict) else None
+
+
+def _read_status(job_json: Path) -> str:
+    doc = _read_job_doc(job_json)
+    status = str((doc or {}).get("status") or "").strip().lower()
+    return status or "queued"
 
 
 def _job_from_path(job_json: Path, root: Path) -> Tuple[str, Optional[str]]:
@@ -52,46 +85,98 @@ def _job_from_path(job_json: Path, root: Path) -> Tuple[str, Optional[str]]:
     return job_id, subfolder
 
 
-def _discover_queued_jobs() -> List[Tuple[str, Optional[str]]]:
-    """Find Surface jobs that are still queued."""
-    root = assets_root()
-    root.mkdir(parents=True, exist_ok=True)
+def _queued_key(job_json: Path, root: Path) -> Optional[JobKey]:
+    """(job_id, subfolder) when job.json says queued and no outputs contradict it."""
+    try:
+        job_id, subfolder = _job_from_path(job_json, root)
+    except ValueError:
+        return None
+    doc = _read_job_doc(job_json)
+    status = str((doc or {}).get("status") or "").strip().lower() or "queued"
+    if status != "queued":
+        return None
+    if infer_status_from_files(job_id, subfolder=subfolder, doc=doc) != "queued":
+        return None
+    return job_id, subfolder
 
-    jobs: List[Tuple[str, Optional[str]]] = []
-    seen: set[Tuple[str, Optional[str]]] = set()
 
-    # direct jobs: /surface/<job_id>/job.json
-    for job_json in root.glob("*/job.json"):
-        job_id, subfolder = _job_from_path(job_json, root)
-        status = _read_status(job_json)
-        if status != "queued":
+def _discover_indexed(idx: JobIndex, root: Path) -> List[JobKey]:
+    """Queued jobs from the index, confirmed against job.json (stale rows are corrected)."""
+    jobs: List[JobKey] = []
+    for rec in idx.by_status("queued"):
+        job_json = job_json_path(rec.job_id, subfolder=rec.subfolder)
+        if not job_json.is_file():
+            idx.delete(rec.job_id, rec.subfolder)
             continue
-        if infer_status_from_files(job_id, subfolder=subfolder) != "queued":
+        doc = _read_job_doc(job_json)
+        status = infer_status_from_files(rec.job_id, subfolder=rec.subfolder, doc=doc)
+        if status == "queued":
+            jobs.append((rec.job_id, rec.subfolder))
             continue
-        key = (job_id, subfolder)
-        if key not in seen:
-            seen.add(key)
-            jobs.append(key)
+        record_job(
+            job_id=rec.job_id,
+            subfolder=rec.subfolder,
+            status=status,
+            target=rec.target,
+            created_at=rec.created_at,
+            updated_at=str((doc or {}).get("updated_at") or rec.updated_at),
+        )
+    return jobs
+
+
+def _discover_queued_jobs(*, walk: bool = True) -> List[JobKey]:
+    """
+    Find Surface jobs that are still queued. `walk=False` may answer from the
+    index; walking the tree also finds jobs whose index upsert failed.
+    """
+    root = assets_root()
+    root.mkdir(parents=True, exist_ok=True)
+
+    idx = job_index()
+    if idx is not None and not walk:
+        return _discover_indexed(idx, root)
+
+    jobs: List[JobKey] = []
+    seen: set[JobKey] = set()
 
+    # direct jobs: /surface/<job_id>/job.json
     # subfolder jobs: /surface/<subfolder>/<job_id>/job.json
-    for job_json in root.glob("*/*/job.json"):
-        job_id, subfolder = _job_from_path(job_json, root)
-        status = _read_status(job_json)
-        if status != "queued":
-            continue
-        if infer_status_from_files(job_id, subfolder=subfolder) != "queued":
+    for pattern in ("*/job.json", "*/*/job.json"):
+        for job_json in root.glob(pattern):
+            key = _queued_key(job_json, root)
+            if key is not None and key not in seen:
+                seen.add(key)
+                jobs.append(key)
+
+    return jobs
+
+
+def _discover_changed_jobs(job_dirs: Iterable[Path]) -> List[JobKey]:
+    """Evaluate only the job folders the watcher reported."""
+    root = assets_root()
+    jobs: List[JobKey] = []
+    for path in sorted(job_dirs):
+        job_json = path / "job.json"
+        if not job_json.is_file():
             continue
-        key = (job_id, subfolder)
-        if key not in seen:
-            seen.add(key)
+        key = _queued_key(job_json, root)
+        if key is not None and key not in jobs:
             jobs.append(key)
-
     return jobs
 
 
+def _next_queued(watcher: JobWatcher, timeout: float) -> List[JobKey]:
+    changed = watcher.poll(timeout)
+    if changed is None:
+        return _discover_queued_jobs(walk=watcher.full_scan)
+    return _discover_changed_jobs(changed)
+
+
 def _mark_failed(job_id: str, subfolder: Optional[str], err: Exception) -> None:
     created_at, params, artifacts = _read_job_state(job_id, subfolder)
     now = now_iso()
+    # The job contract requires started_at on failed jobs.
+    started_at = str((_read_job_doc(job_json_path(job_id, subfolder=subfolder)) or {}).get("started_at") or now)
     target = (params or {}).get("target") or "tile"
     target = "pi4b_case" if str(target).strip().lower() == "pi4b_case" else "tile"
     emboss_mode = (params or {}).get("emboss_mode") or "tile"
@@ -101,6 +186,7 @@ def _mark_failed(job_id: str, subfolder: Optional[str], err: Exception) -> None:
         status="failed",
         created_at=created_at,
         updated_at=now,
+        started_at=started_at,
         finished_at=now,
         params=params,
         artifacts=artifacts,
@@ -116,24 +202,183 @@ def _mark_failed(job_id: str, subfolder: Optional[str], err: Exception) -> None:
     traceback.print_exc()
 
 
-def run_worker_forever() -> None:
-    print("[worker] Surface worker started. Polling for queued jobs...")
+def _process_job(job_id: str, subfolder: Optional[str], tag: Optional[str] = None) -> JobResult:
+    """
+    Claim and run one job; status is "complete", "failed" or "skipped" (claimed elsewhere).
+    `tag` marks the claim so the pool can tell jobs it started from ones claimed elsewhere.
+    """
+    claim = try_claim(job_id, subfolder=subfolder, tag=tag)
+    if claim is None:
+        return "skipped", None
+    with ClaimKeeper(claim):
+        # Re-check under the claim: another worker may have finished it since discovery.
+        if _read_status(job_json_path(job_id, subfolder=subfolder)) != "queued":
+            return "skipped", None
+        try:
+            print(f"[worker] processing job {job_id} (subfolder={subfolder or 'root'}, pid={os.getpid()})")
+            report = run_surface_job(job_id, subfolder=subfolder)
+            if report.status == "complete":
+                print(f"[worker] completed job {job_id} in {report.wall_s:.2f}s")
+            else:
+                print(f"[worker] job {job_id} failed ({report.error_code}) after {report.wall_s:.2f}s")
+            return report.status, report
+        except Exception as exc:  # pragma: no cover - best effort logging
+            _mark_failed(job_id, subfolder, exc)
+            return "failed", None
+
+
+def _record_metrics(status: str, report: Optional[JobReport]) -> None:
+    """Fold a finished job into the worker's /metrics (pool results arrive here pickled)."""
+    if status == "skipped":
+        return
+    if report is None:
+        # run_surface_job raised or its process died; _mark_failed wrote worker_exception.
+        JOBS_FINISHED.inc(target="unknown", emboss_mode="unknown", status="failed")
+        JOB_FAILURES.inc(code="worker_exception")
+        return
+    labels = {"target": report.target, "emboss_mode": report.emboss_mode}
+    JOBS_FINISHED.inc(status=report.status, **labels)
+    JOB_SECONDS.observe(report.wall_s, status=report.status, **labels)
+    if report.status == "failed":
+        JOB_FAILURES.inc(code=report.error_code or "job_failed")
+    for stage in report.stages:
+        STAGE_SECONDS.observe(stage["wall_s"], stage=stage["stage"], **labels)
+        STAGE_CPU_SECONDS.observe(stage["cpu_s"], stage=stage["stage"], **labels)
+    if report.peak_rss_bytes is not None:
+        JOB_PEAK_RSS.observe(report.peak_rss_bytes, **labels)
+    if report.download_bytes:
+        DOWNLOAD_BYTES.inc(report.download_bytes)
+
+
+def _run_sequential(watcher: JobWatcher) -> None:
     while True:
-        queued = _discover_queued_jobs()
-        if not queued:
+        for job_id, subfolder in _next_queued(watcher, POLL_SECONDS):
+            JOBS_IN_FLIGHT.set(1)
+            try:
+                _record_metrics(*_process_job(job_id, subfolder))
+            finally:
+                JOBS_IN_FLIGHT.set(0)
+        _touch_heartbeat()
+
+
+def _new_pool() -> ProcessPoolExecutor:
+    kwargs: Dict[str, object] = {"max_workers": WORKER_PROCESSES}
+    if WORKER_MAX_JOBS and sys.version_info >= (3, 11):
+        kwargs["max_tasks_per_child"] = WORKER_MAX_JOBS
+    return ProcessPoolExecutor(**kwargs)
+
+
+def _run_pool(watcher: JobWatcher) -> None:
+    in_flight: Dict[JobKey, Future] = {}
+    # Discovered but not yet submitted (all slots busy); the watcher only reports each job once.
+    pending: Dict[JobKey, None] = {}
+    # Jobs a broken pool never started; merged back into `pending` by the loop (guarded by `lock`).
+    requeue: Dict[JobKey, None] = {}
+    lock = threading.Lock()
+    broken = threading.Event()
+    pool = _new_pool()
+
+    def _finished(key: JobKey, tag: str, fut: Future) -> None:
+        with lock:
+            # After a pool rebuild the key may already belong to a resubmitted future.
+            if in_flight.get(key) is fut:
+                del in_flight[key]
+            JOBS_IN_FLIGHT.set(len(in_flight))
+        exc = None if fut.cancelled() else fut.exception()
+        if fut.cancelled() or isinstance(exc, BrokenProcessPool):
+            if exc is not None:
+                broken.set()
+            job_id, subfolder = key
+            claim = claim_path(job_id, subfolder=subfolder)
+            # The child claims inside the pool, so only a claim carrying this submission's tag
+            # proves the job started here; anything else may be live on another worker.
+            started_here = (claim_owner(claim) or {}).get("tag") == tag
+            status = _read_status(job_json_path(job_id, subfolder=subfolder))
+            if started_here:
+                release_claim(claim)
+                if status == "running":
+                    _mark_failed(job_id, subfolder, RuntimeError("worker process died"))
+                    _record_metrics("failed", None)
+            # Jobs that never got going are retried on the new pool.
+            if status == "queued":
+                with lock:
+                    requeue[key] = None
+        elif exc is not None:
+            print(f"[worker] job {key[0]} crashed in pool: {exc}")
+        else:
+            _record_metrics(*fut.result())
+        watcher.wake()
+
+    try:
+        while True:
+            for key in _next_queued(watcher, POLL_SECONDS):
+                pending.setdefault(key)
+            with lock:
+                for key in requeue:
+                    pending.setdefault(key)
+                requeue.clear()
+            for key in list(pending):
+                with lock:
+                    if key in in_flight:
+                        pending.pop(key)
+                        continue
+                    if len(in_flight) >= WORKER_PROCESSES:
+                        break
+                tag = secrets.token_hex(8)
+                try:
+                    fut = pool.submit(_process_job, *key, tag)
+                except BrokenProcessPool:
+                    broken.set()
+                    break
+                pending.pop(key)
+                with lock:
+                    in_flight[key] = fut
+                    JOBS_IN_FLIGHT.set(len(in_flight))
+                fut.add_done_callback(lambda f, key=key, tag=tag: _finished(key, tag, f))
+
+            if broken.is_set():
+                # A job process died hard (OOM, signal). Its claim expires via TTL; rebuild the pool.
+                print("[worker] job process pool broken; restarting")
+                pool.shutdown(wait=False, cancel_futures=True)
+                with lock:
+                    in_flight.clear()
+                    JOBS_IN_FLIGHT.set(0)
+                broken.clear()
+                pool = _new_pool()
+                continue
+
             _touch_heartbeat()
-            time.sleep(POLL_SECONDS)
-            continue
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
 
-        for job_id, subfolder in queued:
-            try:
-                print(f"[worker] processing job {job_id} (subfolder={subfolder or 'root'})")
-                run_surface_job(job_id, subfolder=subfolder)
-                print(f"[worker] completed job {job_id}")
-            except Exception as exc:  # pragma: no cover - best effort logging
-                _mark_failed(job_id, subfolder, exc)
 
-        _touch_heartbeat()
+def run_worker_forever() -> None:
+    listener: Optional[NotifyListener] = None
+    if NOTIFY_ENABLED:
+        try:
+            listener = NotifyListener()
+        except OSError as exc:
+            print(f"[worker] notify socket unavailable ({exc}); relying on watch/poll")
+    watcher = JobWatcher(assets_root(), listener=listener)
+    metrics_server = start_metrics_server()
+    if metrics_server is not None:
+        print(f"[worker] metrics on :{WORKER_METRICS_PORT}/metrics")
+    try:
+        # Trees that predate the job index are indexed once before the first discovery. The watcher
+        # and listener are armed first, so jobs created during a long backfill are still reported.
+        ensure_backfilled()
+        if WORKER_PROCESSES > 1:
+            print(f"[worker] Surface worker started with {WORKER_PROCESSES} job processes. Watching for queued jobs ({watcher.mode})...")
+            _run_pool(watcher)
+        else:
+            print(f"[worker] Surface worker started. Watching for queued jobs ({watcher.mode})...")
+            _run_sequential(watcher)
+    finally:
+        watcher.close()
+        if listener is not None:
+            listener.close()
+        if metrics_server is not None:
+            metrics_server.shutdown()
 
 
 if __name__ == "__main__":
@@ -1,27 +1,44 @@
-import hashlib
 import json
-import math
 import os
-import urllib.request
+import time
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import Any, Dict, List, Optional, Tuple
 
 import numpy as np
 import trimesh
 
 from hse.contracts.envelopes import now_iso
+from hse.fs.hashing import FileDigest, HashingWriter, dedup_scope, hash_files
 from hse.fs.paths import assert_valid_job_id, job_dir, job_json_path, public_root, sanitize_subfolder
-from hse.fs.writer import build_outputs, write_manifest, write_surface_job_json
-from hse.utils.geometry import evaluate_geometry, parse_stl_metadata, sample_heightmap_range
-from hse.utils.render import render_hero_from_stl
+from hse.fs.progress import progress_scope, report_stage, write_timings
+from hse.fs.writer import build_outputs, link_or_copy, write_manifest, write_surface_job_json
+from hse.utils.case_shells import CaseShells, board_shells
+from hse.utils.download import fetch_to_file, received_bytes
+from hse.utils.geometry import evaluate_geometry
+from hse.utils.heightmap import HeightmapContext
+from hse.utils.heightmap_cache import HeightmapCache, is_cacheable
+from hse.utils.mesh import MeshData, heightfield_mesh
+from hse.utils.render import render_views
+from hse.utils.result_cache import CACHE_ENABLED as RESULT_CACHE_ENABLED, ResultCache, result_key
+from hse.utils.stl import write_stl
 from hse.utils.boards import default_board_case_id, load_board_def
-from PIL import Image, ImageOps
+from PIL import ImageOps
 
 
 MIN_DISPLACEMENT_MM = float(os.getenv("GLYPHENGINE_MIN_DISPLACEMENT_MM", "0.2"))
 NON_UNIFORM_THRESHOLD = float(os.getenv("GLYPHENGINE_NONUNIFORM_HEIGHTMAP", "1.0"))
 DISPLACEMENT_SCALE_MM = float(os.getenv("GLYPHENGINE_DISPLACEMENT_SCALE_MM", "2.5"))
+# Tile relief: samples per side and physical edge length (64 samples at 1 mm pitch by default).
+TILE_RESOLUTION = max(2, int(os.getenv("GLYPHENGINE_TILE_RESOLUTION", "64")))
+TILE_SIZE_MM = float(os.getenv("GLYPHENGINE_TILE_SIZE_MM", "63.0"))
+# Adaptive meshing: max vertical deviation (mm) from the sampled heightmap; 0 keeps the full grid.
+MESH_MAX_ERROR_MM = max(0.0, float(os.getenv("GLYPHENGINE_MESH_MAX_ERROR_MM", "0.05")))
+CASE_RELIEF_RESOLUTION = 80
+STL_ASCII = os.getenv("GLYPHENGINE_STL_ASCII", "0") not in {"", "0", "false", "False", "FALSE"}
 DEBUG = os.getenv("GLYPHENGINE_DEBUG", "0") not in {"", "0", "false", "False", "FALSE", None}
+# Bump whenever mesh/preview generation changes output bytes, so memoized results are not reused.
+RESULT_CACHE_VERSION = 3
 
 
 def _debug(msg: str, **kwargs: object) -> None:
@@ -75,142 +92,99 @@ def _read_job_state(job_id: str, subfolder: Optional[str]) -> Tuple[str, Dict, D
     return now_iso(), {}, {}
 
 
-def _write_colorized_heightmap(heightmap: Path, preview_path: Path, texture_path: Path) -> None:
-    img = Image.open(heightmap).convert("L")
-    colored = ImageOps.colorize(img, black="#162032", white="#8fd3ff")
-    colored.save(preview_path)
-    colored.save(texture_path)
+def _write_colorized_heightmap(heightmap: HeightmapContext, texture_path: Path) -> FileDigest:
+    colored = ImageOps.colorize(heightmap.image, black="#162032", white="#8fd3ff")
+    with HashingWriter(texture_path) as fh:
+        colored.save(fh, format="PNG")
+    return fh.digest
 
 
-def _sha256_file(path: Path) -> str:
-    h = hashlib.sha256()
-    with path.open("rb") as fh:
-        for chunk in iter(lambda: fh.read(8192), b""):
-            h.update(chunk)
-    return h.hexdigest()
-
-
-def _download_heightmap(url: str, dest_inputs: Path, dest_texture: Path) -> Dict[str, object]:
+def _download_heightmap(url: str, dest_inputs: Path, dest_texture: Path) -> Tuple[Dict[str, object], HeightmapContext]:
     if not url:
         raise RuntimeError("missing heightmap_url")
 
     dest_inputs.parent.mkdir(parents=True, exist_ok=True)
     dest_texture.parent.mkdir(parents=True, exist_ok=True)
 
-    with urllib.request.urlopen(url) as resp:
-        data = resp.read()
-    if not data:
-        raise RuntimeError("empty heightmap download")
-
-    dest_inputs.write_bytes(data)
-    dest_texture.write_bytes(data)
+    if is_cacheable(url):
+        # Both job paths share the cached inode: no transfer and no re-write on repeats.
+        cached = HeightmapCache().fetch(url, dest=dest_inputs)
+        checksum = cached.sha256
+        _debug("heightmap_cache", url=url, source=cached.source, sha256=cached.sha256)
+    else:
+        # One streamed write, hashed inline; the texture copy is a hardlink of it.
+        checksum = str(fetch_to_file(url, dest_inputs).sha256)
+    link_or_copy(dest_inputs, dest_texture)
 
-    img = Image.open(dest_inputs).convert("L")
-    width, height = img.size
-    checksum = _sha256_file(dest_inputs)
+    # Only the header is read here; pixels are decoded on first use by a later stage.
+    heightmap = HeightmapContext(dest_inputs)
 
     return {
         "checksum": checksum,
-        "width": width,
-        "height": height,
+        "width": heightmap.width,
+        "height": heightmap.height,
         "source_url": url,
-    }
+    }, heightmap
+
 
+def _relief_heights(heightmap: HeightmapContext, resolution: int) -> np.ndarray:
+    """Normalised [0, 1] heights on the relief sample grid (shared, read-only)."""
+    return heightmap.resized(resolution)
 
-def _compute_normal(a: Tuple[float, float, float], b: Tuple[float, float, float], c: Tuple[float, float, float]) -> Tuple[float, float, float]:
-    ux, uy, uz = b[0] - a[0], b[1] - a[1], b[2] - a[2]
-    vx, vy, vz = c[0] - a[0], c[1] - a[1], c[2] - a[2]
-    nx = uy * vz - uz * vy
-    ny = uz * vx - ux * vz
-    nz = ux * vy - uy * vx
-    length = math.sqrt(nx * nx + ny * ny + nz * nz) or 1.0
-    return nx / length, ny / length, nz / length
-
-
-def _write_relief_stl(heightmap: Path, stl_path: Path, *, scale_mm: float = DISPLACEMENT_SCALE_MM) -> None:
-    img = Image.open(heightmap).convert("L").resize((64, 64))
-    pixels = list(img.getdata())
-    w, h = img.size
-    heights: List[List[float]] = []
-    for y in range(h):
-        row = []
-        for x in range(w):
-            val = pixels[y * w + x] / 255.0
-            row.append(val * scale_mm)
-        heights.append(row)
-
-    stl_path.parent.mkdir(parents=True, exist_ok=True)
-    with stl_path.open("w", encoding="ascii") as fh:
-        fh.write("solid relief\n")
-        pitch = 1.0
-        for y in range(h - 1):
-            for x in range(w - 1):
-                p00 = (x * pitch, y * pitch, heights[y][x])
-                p10 = ((x + 1) * pitch, y * pitch, heights[y][x + 1])
-                p01 = (x * pitch, (y + 1) * pitch, heights[y + 1][x])
-                p11 = ((x + 1) * pitch, (y + 1) * pitch, heights[y + 1][x + 1])
-
-                for tri in ((p00, p10, p11), (p00, p11, p01)):
-                    n = _compute_normal(*tri)
-                    fh.write(f"  facet normal {n[0]:.6f} {n[1]:.6f} {n[2]:.6f}\n")
-                    fh.write("    outer loop\n")
-                    for vx, vy, vz in tri:
-                        fh.write(f"      vertex {vx:.6f} {vy:.6f} {vz:.6f}\n")
-                    fh.write("    endloop\n  endfacet\n")
-        fh.write("endsolid relief\n")
-
-
-def _ensure_mesh_nonflat(path: Path, *, epsilon: float = 0.05, label: str = "mesh") -> None:
-    if not path.exists() or path.stat().st_size == 0:
-        raise RuntimeError(f"{label}_missing_or_empty: {path}")
-    meta = parse_stl_metadata(path)
+
+def _write_relief_stl(
+    heights: np.ndarray,
+    stl_path: Path,
+    *,
+    scale_mm: float = DISPLACEMENT_SCALE_MM,
+    size_mm: float = TILE_SIZE_MM,
+    max_error: float = MESH_MAX_ERROR_MM,
+    ascii: bool = STL_ASCII,
+) -> MeshData:
+    vertices, faces = heightfield_mesh(heights * scale_mm, max_error=max_error)
+    vertices[:, :2] *= size_mm
+    report_stage("export")
+    digest = write_stl(stl_path, vertices, faces, ascii=ascii, name="relief")
+    return MeshData(vertices, faces, stl_path, checksum=digest.sha256)
+
+
+def _ensure_mesh_nonflat(mesh: MeshData, *, epsilon: float = 0.05, label: str = "mesh") -> None:
+    if len(mesh.faces) == 0:
+        raise RuntimeError(f"{label}_missing_or_empty: {mesh.path}")
+    meta = mesh.metadata
     if meta.z_range_mm <= epsilon:
         raise RuntimeError(f"{label}_flat: z_range_mm={meta.z_range_mm:.4f}")
 
 
-def _box_mesh(extents: Tuple[float, float, float], center: Tuple[float, float, float]) -> trimesh.Trimesh:
-    mesh = trimesh.creation.box(extents=extents)
-    mesh.apply_translation(center)
-    return mesh
+def _export_mesh(mesh: trimesh.Trimesh, path: Path) -> MeshData:
+    with HashingWriter(path) as fh:
+        mesh.export(file_obj=fh, file_type="stl")
+    return MeshData(np.asarray(mesh.vertices), np.asarray(mesh.faces), path, checksum=fh.digest.sha256)
 
 
 def _heightmap_mesh(
-    heightmap: Path,
+    heights: np.ndarray,
     size_x: float,
     size_y: float,
     *,
     scale_mm: float,
     base: float,
     axis: str = "z",
+    max_error: float = MESH_MAX_ERROR_MM,
 ) -> trimesh.Trimesh:
-    """Create a simple displaced mesh from the heightmap on either the Z or Y axis."""
-    img = Image.open(heightmap).convert("L").resize((80, 80))
-    arr = np.asarray(img, dtype=np.float32) / 255.0
-    h, w = arr.shape
-    step_x = size_x / max(w - 1, 1)
-    step_y = size_y / max(h - 1, 1)
-
-    vertices: List[Tuple[float, float, float]] = []
-    for j in range(h):
-        for i in range(w):
-            x = -size_x / 2.0 + i * step_x
-            span = -size_y / 2.0 + j * step_y
-            delta = float(arr[j, i] * scale_mm)
-            if axis == "y":
-                vertices.append((x, base + delta, span))
-            else:
-                vertices.append((x, span, base + delta))
-
-    faces: List[Tuple[int, int, int]] = []
-    for j in range(h - 1):
-        for i in range(w - 1):
-            idx = j * w + i
-            faces.append((idx, idx + 1, idx + w + 1))
-            faces.append((idx, idx + w + 1, idx + w))
+    """Create a displaced mesh from normalised heights on either the Z or Y axis."""
+    grid, faces = heightfield_mesh(heights * scale_mm, max_error=max_error)
+    x = -size_x / 2.0 + grid[:, 0] * size_x
+    span = -size_y / 2.0 + grid[:, 1] * size_y
+    height = base + grid[:, 2]
+    if axis == "y":
+        vertices = np.column_stack([x, height, span])
+    else:
+        vertices = np.column_stack([x, span, height])
 
     return trimesh.Trimesh(
-        vertices=np.asarray(vertices, dtype=np.float32),
-        faces=np.asarray(faces, dtype=np.int64),
+        vertices=vertices.astype(np.float32),
+        faces=faces,
         process=False,
     )
 
@@ -224,118 +198,223 @@ def _merge_meshes(meshes: List[trimesh.Trimesh]) -> trimesh.Trimesh:
     return trimesh.util.concatenate(usable)
 
 
-def _generate_pi4b_case(heightmap: Path, root: Path, emboss_mode: str) -> Tuple[Dict[str, Optional[Path]], Path, Dict[str, Dict[str, object]]]:
-    # Simple printable case with rails for a sliding panel
-    outer_x, outer_y, base_height = 96.0, 66.0, 24.0
-    wall_th = 2.2
-    floor_th = 2.4
-    lid_th = 2.6
-    lid_gap = 0.4  # clearance between base and lid
-
-    inner_x = outer_x - 2 * wall_th
-    inner_y = outer_y - 2 * wall_th
-
-    rail_len = inner_x - 6.0
-    rail_width = 1.6
-    rail_height = 12.0
-    rail_base_z = floor_th + 3.0
-
-    panel_th = 2.2
-    panel_clearance = 0.35
-    panel_width = rail_len - 6.0
-    panel_height = rail_height - 2.0
-    slot_width = panel_th + 2 * panel_clearance
-    slot_half = slot_width / 2.0
-    rail_y1 = -(slot_half + rail_width / 2.0)
-    rail_y2 = slot_half + rail_width / 2.0
-    end_stop = wall_th * 1.3
-    end_stop_center_x = rail_len / 2.0 - end_stop / 2.0
-
-    meshes_base = [
-        _box_mesh((inner_x, inner_y, floor_th), (0.0, 0.0, floor_th / 2.0)),
-        _box_mesh((outer_x, wall_th, base_height), (0.0, -(outer_y / 2.0 - wall_th / 2.0), base_height / 2.0)),
-        _box_mesh((outer_x, wall_th, base_height), (0.0, outer_y / 2.0 - wall_th / 2.0, base_height / 2.0)),
-        _box_mesh((wall_th, inner_y, base_height), (-(outer_x / 2.0 - wall_th / 2.0), 0.0, base_height / 2.0)),
-        _box_mesh((wall_th, inner_y, base_height), ((outer_x / 2.0 - wall_th / 2.0), 0.0, base_height / 2.0)),
-        _box_mesh((rail_len, rail_width, rail_height), (0.0, rail_y1, rail_base_z + rail_height / 2.0)),
-        _box_mesh((rail_len, rail_width, rail_height), (0.0, rail_y2, rail_base_z + rail_height / 2.0)),
-        _box_mesh((end_stop, slot_width, rail_height), (end_stop_center_x, 0.0, rail_base_z + rail_height / 2.0)),
-    ]
-    base_mesh = _merge_meshes(meshes_base)
-    base_path = root / "pi4b_case_base.stl"
-    base_path.parent.mkdir(parents=True, exist_ok=True)
-    base_mesh.export(base_path)
+def _generate_case(heights: np.ndarray, root: Path, emboss_mode: str, shells: CaseShells) -> Tuple[Dict[str, Optional[MeshData]], Dict[str, Dict[str, object]]]:
+    """Printable case with rails for a sliding panel; only the reliefs are built per job."""
+    layout = shells.layout
 
-    lid_z0 = base_height + lid_gap
-    lid_meshes = [
-        _box_mesh((outer_x, outer_y, lid_th), (0.0, 0.0, lid_z0 + lid_th / 2.0)),
-    ]
+    # The base never depends on the heightmap: share the cached STL instead of re-exporting it.
+    base_path = root / "pi4b_case_base.stl"
+    try:
+        link_or_copy(shells.base_stl, base_path)
+    except FileNotFoundError:
+        # The memoized cache entry was removed by another process: reload or rebuild it once.
+        shells = board_shells(shells.board_def, refresh=True)
+        link_or_copy(shells.base_stl, base_path)
+    base_mesh = shells.base
+    base = MeshData(np.asarray(base_mesh.vertices), np.asarray(base_mesh.faces), base_path, checksum=shells.base_sha256)
+
+    lid_meshes = [shells.lid_slab]
     if emboss_mode in {"lid", "both"}:
         relief = _heightmap_mesh(
-            heightmap,
-            size_x=outer_x - 6.0,
-            size_y=outer_y - 6.0,
+            heights,
+            size_x=layout.outer_x - 6.0,
+            size_y=layout.outer_y - 6.0,
             scale_mm=DISPLACEMENT_SCALE_MM,
-            base=lid_z0 + lid_th,
+            base=layout.lid_z0 + layout.lid_th,
             axis="z",
         )
         lid_meshes.append(relief)
     lid_mesh = _merge_meshes(lid_meshes)
-    lid_path = root / "pi4b_case_lid.stl"
-    lid_mesh.export(lid_path)
 
-    panel_path: Optional[Path] = None
     panel_mesh: Optional[trimesh.Trimesh] = None
     if emboss_mode in {"panel", "both"}:
-        panel_center_x = -rail_len / 2.0 + 4.0  # leave room for the end stop
-        panel_center_z = rail_base_z + panel_height / 2.0
-        panel_mesh_parts = [
-            _box_mesh((panel_width, panel_th, panel_height), (panel_center_x, 0.0, panel_center_z)),
-        ]
+        panel_center_x, panel_center_z = layout.panel_center
         relief_panel = _heightmap_mesh(
-            heightmap,
-            size_x=panel_width - 4.0,
-            size_y=panel_height - 2.0,
+            heights,
+            size_x=layout.panel_width - 4.0,
+            size_y=layout.panel_height - 2.0,
             scale_mm=DISPLACEMENT_SCALE_MM * 0.8,
-            base=panel_th / 2.0,
+            base=layout.panel_th / 2.0,
             axis="y",
         )
-        relief_panel.apply_translation((panel_center_x, panel_th / 2.0, panel_center_z))
-        panel_mesh_parts.append(relief_panel)
-        panel_mesh = _merge_meshes(panel_mesh_parts)
-        panel_path = root / "pi4b_case_panel.stl"
-        panel_mesh.export(panel_path)
+        relief_panel.apply_translation((panel_center_x, layout.panel_th / 2.0, panel_center_z))
+        panel_mesh = _merge_meshes([shells.panel_blank, relief_panel])
 
     assembly_parts = [base_mesh, lid_mesh]
     if panel_mesh is not None:
         assembly_parts.append(panel_mesh)
     assembly_mesh = _merge_meshes(assembly_parts)
-    assembly_path = root / "pi4b_case_assembly.stl"
-    assembly_mesh.export(assembly_path)
+
+    report_stage("export")
+    lid = _export_mesh(lid_mesh, root / "pi4b_case_lid.stl")
+    panel: Optional[MeshData] = None
+    if panel_mesh is not None:
+        panel = _export_mesh(panel_mesh, root / "pi4b_case_panel.stl")
+    assembly = _export_mesh(assembly_mesh, root / "pi4b_case_assembly.stl")
 
     overrides: Dict[str, Dict[str, object]] = {
-        "pi4b_case_base.stl": {"checksum": _sha256_file(base_path)},
-        "pi4b_case_lid.stl": {"checksum": _sha256_file(lid_path)},
+        "pi4b_case_base.stl": {"checksum": base.checksum},
+        "pi4b_case_lid.stl": {"checksum": lid.checksum},
     }
-    if panel_path:
-        overrides["pi4b_case_panel.stl"] = {"checksum": _sha256_file(panel_path)}
+    if panel is not None:
+        overrides["pi4b_case_panel.stl"] = {"checksum": panel.checksum}
+
+    return {
+        "base": base,
+        "lid": lid,
+        "panel": panel,
+        "assembly": assembly,
+    }, overrides
+
+
+def _generate_board_case(heights: np.ndarray, root: Path, emboss_mode: str, board_id: str) -> Tuple[Dict[str, Optional[MeshData]], Dict[str, Dict[str, object]]]:
+    return _generate_case(heights, root, emboss_mode, board_shells(load_board_def(board_id)))
+
+
+def _fill_missing_checksums(root: Path, overrides: Dict[str, Dict[str, object]]) -> None:
+    """Hash, in parallel, any output whose writer did not report a checksum."""
+    missing = [rel for rel, meta in overrides.items() if not meta.get("checksum") and (root / rel).is_file()]
+    if not missing:
+        return
+    digests = hash_files([root / rel for rel in missing])
+    for rel in missing:
+        overrides[rel]["checksum"] = digests[root / rel]
 
+
+def _generated_outputs(target: str, emboss_mode: str) -> List[str]:
+    """Job files derived from the heightmap (memoizable); inputs and job docs are excluded."""
+    rels = [f"previews/{name}.png" for name in ("hero", "iso", "top", "side")]
+    rels.append("textures/texture.png")
+    if target in {"pi4b_case", "board_case"}:
+        rels += ["pi4b_case_base.stl", "pi4b_case_lid.stl", "pi4b_case_assembly.stl"]
+        if emboss_mode in {"panel", "both"}:
+            rels.append("pi4b_case_panel.stl")
+    else:
+        rels.append("enclosure/enclosure.stl")
+    return rels
+
+
+def _result_cache_params(target: str, emboss_mode: str, board_id: Optional[str]) -> Dict[str, object]:
+    """Everything besides the heightmap bytes that decides the generated outputs."""
+    is_case = target in {"pi4b_case", "board_case"}
     return {
-        "base": base_path,
-        "lid": lid_path,
-        "panel": panel_path,
-        "assembly": assembly_path,
-    }, assembly_path, overrides
+        "version": RESULT_CACHE_VERSION,
+        "target": target,
+        "emboss_mode": emboss_mode,
+        "board": load_board_def(board_id or "pi4b") if is_case else None,
+        "displacement_scale_mm": DISPLACEMENT_SCALE_MM,
+        "relief_resolution": CASE_RELIEF_RESOLUTION if is_case else TILE_RESOLUTION,
+        "tile_size_mm": TILE_SIZE_MM,
+        "mesh_max_error_mm": MESH_MAX_ERROR_MM,
+        "stl_ascii": STL_ASCII,
+        "min_displacement_mm": MIN_DISPLACEMENT_MM,
+        "non_uniform_threshold": NON_UNIFORM_THRESHOLD,
+    }
 
 
-def _generate_board_case(heightmap: Path, root: Path, emboss_mode: str, board_id: str) -> Tuple[Dict[str, Optional[Path]], Path, Dict[str, Dict[str, object]]]:
-    board_def = load_board_def(board_id)
-    if board_def.get("id") in {"pi4b", "pi5"}:
-        return _generate_pi4b_case(heightmap, root, emboss_mode)
-    raise RuntimeError(f"board_case_unsupported:{board_def.get('id')}")
+def _result_cache_bypassed(params: Dict) -> bool:
+    value = (params or {}).get("no_cache")
+    if isinstance(value, str):
+        return value.strip().lower() in {"1", "true", "yes", "on"}
+    return bool(value)
 
 
-def run_surface_job(job_id: str, subfolder: Optional[str] = None) -> None:
+def _write_complete(
+    *,
+    job_id: str,
+    subfolder: Optional[str],
+    root: Path,
+    pub_root: str,
+    created_at: str,
+    started_at: str,
+    params: Dict,
+    artifacts: Optional[Dict],
+    target: str,
+    emboss_mode: str,
+    board_id: Optional[str],
+    geometry_result: Dict[str, object],
+    outputs_overrides: Dict[str, Dict[str, object]],
+    checksum: Optional[object],
+) -> None:
+    """Final manifest + complete job.json; only called once every output is in place."""
+    report_stage("complete")
+    finished_at = now_iso()
+    write_manifest(
+        job_id=job_id,
+        subfolder=subfolder,
+        created_at=created_at,
+        started_at=started_at,
+        finished_at=finished_at,
+        updated_at=finished_at,
+        geometry_check=geometry_result,
+        outputs=build_outputs(root, pub_root, outputs_overrides, target=target, emboss_mode=emboss_mode),
+        target=target,
+        emboss_mode=emboss_mode,
+        board_id=board_id,
+    )
+    write_surface_job_json(
+        job_id=job_id,
+        subfolder=subfolder,
+        status="complete",
+        created_at=created_at,
+        updated_at=finished_at,
+        started_at=started_at,
+        finished_at=finished_at,
+        params=params,
+        artifacts=artifacts,
+        checksum=checksum,
+    )
+
+
+@dataclass
+class JobReport:
+    """Outcome and resource use of one run, returned to the worker for its metrics (picklable)."""
+
+    job_id: str
+    subfolder: Optional[str]
+    target: str
+    emboss_mode: str
+    status: str = "failed"
+    error_code: Optional[str] = None
+    wall_s: float = 0.0
+    cpu_s: float = 0.0
+    peak_rss_bytes: Optional[int] = None
+    download_bytes: int = 0
+    stages: List[Dict[str, Any]] = field(default_factory=list)
+
+    def timings(self) -> Dict[str, Any]:
+        """The <job>/timings.json document."""
+        return {
+            "job_id": self.job_id,
+            "target": self.target,
+            "emboss_mode": self.emboss_mode,
+            "status": self.status,
+            "wall_s": self.wall_s,
+            "cpu_s": self.cpu_s,
+            "peak_rss_bytes": self.peak_rss_bytes,
+            "download_bytes": self.download_bytes,
+            "stages": self.stages,
+        }
+
+
+def run_surface_job(job_id: str, subfolder: Optional[str] = None) -> JobReport:
+    root = job_dir(assert_valid_job_id(job_id), subfolder=sanitize_subfolder(subfolder))
+    wall0, cpu0, bytes0 = time.perf_counter(), time.process_time(), received_bytes()
+    # Artifacts that come out byte-identical within the job are hardlinked, not written twice;
+    # stage boundaries are reported to <job>/progress.json.
+    with dedup_scope(), progress_scope(root) as progress:
+        report = _run_surface_job(job_id, subfolder)
+    report.stages = progress.finish()
+    report.wall_s = round(time.perf_counter() - wall0, 6)
+    report.cpu_s = round(time.process_time() - cpu0, 6)
+    peaks = [s["peak_rss_bytes"] for s in report.stages if s["peak_rss_bytes"] is not None]
+    report.peak_rss_bytes = max(peaks) if peaks else None
+    report.download_bytes = received_bytes() - bytes0
+    write_timings(root, report.timings())
+    return report
+
+
+def _run_surface_job(job_id: str, subfolder: Optional[str] = None) -> JobReport:
     """
     Minimal worker loop:
     - preserves created_at
@@ -353,11 +432,14 @@ def run_surface_job(job_id: str, subfolder: Optional[str] = None) -> None:
     emboss_mode = _normalized_emboss_mode((params or {}).get("emboss_mode"), target=target)
     board_id = _normalized_board_id((params or {}).get("board")) if target == "board_case" else None
     artifacts = artifacts or None
+    report = JobReport(job_id=job_id, subfolder=subfolder, target=target, emboss_mode=emboss_mode)
 
     started_at = now_iso()
     pub_root = public_root(job_id, subfolder=subfolder)
     _debug("job_paths", assets_root=str(root.parent), job_root=str(root), pub_root=pub_root)
 
+    # Progress first, so a re-run never shows the previous run's stage as current.
+    report_stage("download")
     # Mark running and publish draft manifest immediately
     write_surface_job_json(
         job_id=job_id,
@@ -403,7 +485,7 @@ def run_surface_job(job_id: str, subfolder: Optional[str] = None) -> None:
 
         heightmap_path = root / "textures" / "heightmap.png"
         try:
-            download_meta = _download_heightmap(
+            download_meta, heightmap = _download_heightmap(
                 params_heightmap_url,
                 root / "inputs" / "input_heightmap.png",
                 heightmap_path,
@@ -411,13 +493,14 @@ def run_surface_job(job_id: str, subfolder: Optional[str] = None) -> None:
         except Exception:
             failure_reason = "heightmap_download_failed"
             raise
-        _debug("heightmap_downloaded", url=params_heightmap_url, bytes=heightmap_path.stat().st_size, path=str(heightmap_path))
-
-        _write_colorized_heightmap(
-            heightmap_path,
-            root / "previews" / "iso.png",
-            root / "textures" / "texture.png",
+        _debug(
+            "heightmap_downloaded",
+            url=params_heightmap_url,
+            bytes=heightmap_path.stat().st_size,
+            size=heightmap.size,
+            path=str(heightmap_path),
         )
+
         outputs_overrides["inputs/input_heightmap.png"] = {
             "checksum": download_meta.get("checksum"),
             "width": download_meta.get("width"),
@@ -430,72 +513,116 @@ def run_surface_job(job_id: str, subfolder: Optional[str] = None) -> None:
             "height": download_meta.get("height"),
         }
 
-        generated_paths: Dict[str, Optional[Path]] = {}
-        hero_input_stl: Path
-        geometry_target: Path
-
-        if target in {"pi4b_case", "board_case"}:
-            generated_paths, assembly_path, case_overrides = _generate_board_case(heightmap_path, root, emboss_mode, board_id or "pi4b")
+        cache_key: Optional[str] = None
+        if RESULT_CACHE_ENABLED and not _result_cache_bypassed(params):
+            cache_key = result_key(str(download_meta["checksum"]), _result_cache_params(target, emboss_mode, board_id))
             try:
-                base_path = generated_paths.get("base")
-                lid_path = generated_paths.get("lid")
-                panel_path = generated_paths.get("panel")
-                if base_path is None or lid_path is None:
+                cached = ResultCache().materialize(cache_key, root)
+            except OSError as exc:
+                print(f"[worker] result cache lookup failed for {job_id}: {exc}")
+                cached = None
+            if cached is not None:
+                _debug("result_cache_hit", job_id=job_id, key=cache_key)
+                outputs_overrides.update(cached.overrides)
+                geometry_result = cached.geometry_check
+                _write_complete(
+                    job_id=job_id,
+                    subfolder=subfolder,
+                    root=root,
+                    pub_root=pub_root,
+                    created_at=created_at,
+                    started_at=started_at,
+                    params=params,
+                    artifacts=artifacts,
+                    target=target,
+                    emboss_mode=emboss_mode,
+                    board_id=board_id,
+                    geometry_result=geometry_result,
+                    outputs_overrides=outputs_overrides,
+                    checksum=download_meta.get("checksum"),
+                )
+                report.status = "complete"
+                return report
+
+        # A re-run may find hardlinks shared with the result cache; never write through them.
+        for rel in _generated_outputs(target, emboss_mode):
+            (root / rel).unlink(missing_ok=True)
+
+        report_stage("decode")
+        texture_digest = _write_colorized_heightmap(heightmap, root / "textures" / "texture.png")
+
+        is_case = target in {"pi4b_case", "board_case"}
+        relief = _relief_heights(heightmap, CASE_RELIEF_RESOLUTION if is_case else TILE_RESOLUTION)
+        generated: Dict[str, Optional[MeshData]] = {}
+        hero_input: MeshData
+        geometry_target: MeshData
+
+        report_stage("mesh")
+        if is_case:
+            generated, case_overrides = _generate_board_case(relief, root, emboss_mode, board_id or "pi4b")
+            try:
+                base_mesh = generated.get("base")
+                lid_mesh = generated.get("lid")
+                panel_mesh = generated.get("panel")
+                assembly_mesh = generated.get("assembly")
+                if base_mesh is None or lid_mesh is None or assembly_mesh is None:
                     raise RuntimeError("board_case base or lid missing")
-                _ensure_mesh_nonflat(base_path, label="base_stl")
-                _ensure_mesh_nonflat(lid_path, label="lid_stl")
+                _ensure_mesh_nonflat(base_mesh, label="base_stl")
+                _ensure_mesh_nonflat(lid_mesh, label="lid_stl")
                 if emboss_mode in {"panel", "both"}:
-                    if panel_path is None:
+                    if panel_mesh is None:
                         raise RuntimeError("panel_missing")
-                    _ensure_mesh_nonflat(panel_path, label="panel_stl")
-                _ensure_mesh_nonflat(assembly_path, label="assembly_stl")
+                    _ensure_mesh_nonflat(panel_mesh, label="panel_stl")
+                _ensure_mesh_nonflat(assembly_mesh, label="assembly_stl")
             except Exception:
                 failure_reason = "board_case_mesh_invalid"
                 raise
 
-            hero_input_stl = assembly_path
-            geometry_target = (generated_paths.get("lid") or generated_paths.get("base") or assembly_path)
+            hero_input = assembly_mesh
+            geometry_target = lid_mesh
             outputs_overrides.update(case_overrides)
             _debug(
                 "board_case_generated",
-                base=str(generated_paths.get("base")),
-                lid=str(generated_paths.get("lid")),
-                panel=str(generated_paths.get("panel")),
-                assembly=str(assembly_path),
+                base=str(base_mesh.path),
+                lid=str(lid_mesh.path),
+                panel=str(panel_mesh.path if panel_mesh else None),
+                assembly=str(assembly_mesh.path),
                 board=board_id or "pi4b",
             )
         else:
             stl_path = root / "enclosure" / "enclosure.stl"
-            generated_paths = {"stl": stl_path}
-            _write_relief_stl(heightmap_path, stl_path, scale_mm=DISPLACEMENT_SCALE_MM)
+            tile_mesh = _write_relief_stl(relief, stl_path, scale_mm=DISPLACEMENT_SCALE_MM)
+            generated = {"stl": tile_mesh}
             try:
-                _ensure_mesh_nonflat(stl_path, label="enclosure_stl")
+                _ensure_mesh_nonflat(tile_mesh, label="enclosure_stl")
             except Exception:
                 failure_reason = "enclosure_mesh_invalid"
                 raise
             _debug("stl_written", path=str(stl_path), bytes=stl_path.stat().st_size)
-            hero_input_stl = stl_path
-            geometry_target = stl_path
+            hero_input = tile_mesh
+            geometry_target = tile_mesh
             outputs_overrides["enclosure/enclosure.stl"] = {
-                "checksum": _sha256_file(stl_path),
+                "checksum": tile_mesh.checksum,
             }
 
         hero = root / "previews" / "hero.png"
+        preview_paths = {name: root / "previews" / f"{name}.png" for name in ("hero", "iso", "top", "side")}
+        report_stage("render")
         try:
-            hero_stats = render_hero_from_stl(hero_input_stl, hero)
+            preview_stats = render_views(hero_input.vertices, hero_input.faces, preview_paths)
         except Exception:
             failure_reason = "hero_render_failed"
             raise
-        outputs_overrides["previews/hero.png"] = {
-            "checksum": _sha256_file(hero),
-        }
+        hero_stats = preview_stats["hero"]
+        for name in preview_paths:
+            outputs_overrides[f"previews/{name}.png"] = {
+                "checksum": preview_stats[name].get("checksum"),
+            }
         outputs_overrides["textures/texture.png"] = {
-            "checksum": _sha256_file(root / "textures" / "texture.png"),
+            "checksum": texture_digest.sha256,
         }
-
-        for name in ("iso", "top", "side"):
-            preview_target = root / "previews" / f"{name}.png"
-            preview_target.write_bytes(hero.read_bytes())
+        report_stage("hash")
+        _fill_missing_checksums(root, outputs_overrides)
 
         required = {
             "previews/hero.png": hero,
@@ -506,21 +633,24 @@ def run_surface_job(job_id: str, subfolder: Optional[str] = None) -> None:
             "textures/heightmap.png": heightmap_path,
             "inputs/input_heightmap.png": root / "inputs" / "input_heightmap.png",
         }
-        if target in {"pi4b_case", "board_case"}:
-            required["pi4b_case_base.stl"] = generated_paths.get("base") or (root / "pi4b_case_base.stl")
-            required["pi4b_case_lid.stl"] = generated_paths.get("lid") or (root / "pi4b_case_lid.stl")
+        if is_case:
+            required["pi4b_case_base.stl"] = root / "pi4b_case_base.stl"
+            required["pi4b_case_lid.stl"] = root / "pi4b_case_lid.stl"
             if emboss_mode in {"panel", "both"}:
-                required["pi4b_case_panel.stl"] = generated_paths.get("panel") or (root / "pi4b_case_panel.stl")
+                required["pi4b_case_panel.stl"] = root / "pi4b_case_panel.stl"
         else:
-            required["enclosure/enclosure.stl"] = generated_paths["stl"]
+            required["enclosure/enclosure.stl"] = stl_path
         for rel_path, path in required.items():
             if not path.exists() or path.stat().st_size == 0:
                 missing_outputs.append(rel_path)
 
-        heightmap_range = sample_heightmap_range(heightmap_path)
+        # Expected displacement comes straight from the in-memory heights; no STL re-read.
+        report_stage("geometry_check")
+        relief_min, relief_max = float(relief.min()), float(relief.max())
         geometry_result = evaluate_geometry(
-            stl_path=geometry_target,
-            heightmap_range=heightmap_range,
+            metadata=geometry_target.metadata,
+            heightmap_range=(relief_min * 255.0, relief_max * 255.0),
+            expected_z_range_mm=(relief_max - relief_min) * DISPLACEMENT_SCALE_MM,
             min_displacement_mm=MIN_DISPLACEMENT_MM,
             non_uniform_threshold=NON_UNIFORM_THRESHOLD,
         )
@@ -535,42 +665,44 @@ def run_surface_job(job_id: str, subfolder: Optional[str] = None) -> None:
             failure_reason = reason
             raise RuntimeError(f"{reason}: z_range_mm={geometry_result.get('z_range_mm')}")
 
-        finished_at = now_iso()
-
-        # Final status write AFTER assets and checks succeed
-        write_manifest(
+        _write_complete(
             job_id=job_id,
             subfolder=subfolder,
+            root=root,
+            pub_root=pub_root,
             created_at=created_at,
             started_at=started_at,
-            finished_at=finished_at,
-            updated_at=finished_at,
-            geometry_check=geometry_result,
-            outputs=build_outputs(root, pub_root, outputs_overrides, target=target, emboss_mode=emboss_mode),
+            params=params,
+            artifacts=artifacts,
             target=target,
             emboss_mode=emboss_mode,
             board_id=board_id,
+            geometry_result=geometry_result,
+            outputs_overrides=outputs_overrides,
+            checksum=download_meta.get("checksum"),
         )
 
-        write_surface_job_json(
-            job_id=job_id,
-            subfolder=subfolder,
-            status="complete",
-            created_at=created_at,
-            updated_at=finished_at,
-            started_at=started_at,
-            finished_at=finished_at,
-            params=params,
-            artifacts=artifacts,
-        )
+        if cache_key is not None:
+            try:
+                ResultCache().store(
+                    cache_key,
+                    root,
+                    _generated_outputs(target, emboss_mode),
+                    overrides=outputs_overrides,
+                    geometry_check=geometry_result,
+                )
+            except Exception as exc:
+                # Memoization is an optimization; the job itself already completed.
+                print(f"[worker] result cache store failed for {job_id}: {exc}")
 
         _debug(
             "job complete",
             job_id=job_id,
-            stl=str(hero_input_stl),
+            stl=str(hero_input.path),
             hero=str(hero),
             z_range=geometry_result.get("z_range_mm"),
         )
+        report.status = "complete"
 
     except Exception as exc:
         finished_at = now_iso()
@@ -597,6 +729,7 @@ def run_surface_job(job_id: str, subfolder: Optional[str] = None) -> None:
             params=params,
             artifacts=artifacts,
             error=error_payload,
+            checksum=(download_meta or {}).get("checksum"),
         )
 
         write_manifest(
@@ -615,3 +748,5 @@ def run_surface_job(job_id: str, subfolder: Optional[str] = None) -> None:
 
         _debug("job failed", job_id=job_id, reason=reason, missing=missing_outputs)
         # Do not re-raise; the job json now reflects failure.
+        report.status, report.error_code = "failed", reason
+    return report
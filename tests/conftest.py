@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Callable, Optional
+
+import pytest
+from fastapi.testclient import TestClient
+
+from hse.contracts.envelopes import now_iso
+from hse.fs.paths import job_dir
+from hse.fs.writer import write_surface_job_json
+from hse.main import app
+
+_TILE_OUTPUTS = ("previews/hero.png", "textures/texture.png", "textures/heightmap.png", "enclosure/enclosure.stl")
+
+
+@pytest.fixture(autouse=True)
+def surface_env(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    """Every test gets its own asset root and state dir (the index path follows HSE_STATE_DIR)."""
+    assets = tmp_path / "surface"
+    assets.mkdir()
+    monkeypatch.setenv("SURFACE_OUTPUT_DIR", str(assets))
+    monkeypatch.setenv("HSE_STATE_DIR", str(tmp_path / "state"))
+    monkeypatch.delenv("HSE_JOB_INDEX_PATH", raising=False)
+    return assets
+
+
+@pytest.fixture
+def client() -> TestClient:
+    """The API with paths relative to ROOT_PATH (e.g. client.get("/jobs"))."""
+    return TestClient(app, base_url="http://testserver/api/surface")
+
+
+@pytest.fixture
+def make_job() -> Callable[..., Path]:
+    """Write a tile job's job.json (and, for complete jobs, its required outputs) without running it."""
+
+    def _make(
+        job_id: str,
+        *,
+        status: str = "queued",
+        subfolder: Optional[str] = None,
+        created_at: Optional[str] = None,
+        index: bool = True,
+    ) -> Path:
+        created_at = created_at or now_iso()
+        extra = {}
+        if status in {"running", "complete", "failed"}:
+            extra["started_at"] = created_at
+        if status in {"complete", "failed"}:
+            extra["finished_at"] = created_at
+        if status == "complete":
+            root = job_dir(job_id, subfolder=subfolder)
+            for rel in _TILE_OUTPUTS:
+                (root / rel).parent.mkdir(parents=True, exist_ok=True)
+                (root / rel).write_bytes(b"x")
+        return write_surface_job_json(
+            job_id=job_id,
+            subfolder=subfolder,
+            status=status,
+            created_at=created_at,
+            updated_at=created_at,
+            params={"heightmap_url": "http://example.invalid/hm.png", "target": "tile"},
+            error={"code": "test", "message": "failed"} if status == "failed" else None,
+            index=index,
+            **extra,
+        )
+
+    return _make
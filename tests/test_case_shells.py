@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+import shutil
+
+import pytest
+
+import hse.utils.case_shells as case_shells
+from hse.utils.boards import default_board_case_id, load_board_def
+from hse.utils.case_shells import board_shells, cache_root, shell_key
+
+
+@pytest.fixture
+def board(monkeypatch):
+    monkeypatch.setattr(case_shells, "_memo", {})
+    return load_board_def(default_board_case_id())
+
+
+def _entry(board):
+    return cache_root() / shell_key(board)
+
+
+def test_entry_published_after_a_miss_is_kept(board, monkeypatch):
+    board_shells(board)
+    entry_ino = _entry(board).stat().st_ino
+    monkeypatch.setattr(case_shells, "_memo", {})
+
+    # Our first read misses; another process publishes the entry before we act on it.
+    real_load = case_shells._load
+    reads = []
+
+    def late_publish(*args):
+        reads.append(args[0])
+        return None if len(reads) == 1 else real_load(*args)
+
+    def no_build(*args):
+        raise AssertionError("a published entry must be reused, not rebuilt")
+
+    monkeypatch.setattr(case_shells, "_load", late_publish)
+    monkeypatch.setattr(case_shells, "_build", no_build)
+    shells = board_shells(board)
+
+    assert _entry(board).stat().st_ino == entry_ino
+    assert shells.base_stl.is_file()
+
+
+def test_unreadable_entry_is_rebuilt(board):
+    entry = _entry(board)
+    entry.mkdir(parents=True)
+    (entry / "meta.json").write_text("{not json", encoding="utf-8")
+
+    shells = board_shells(board)
+    assert shells.base_stl.is_file()
+    assert shells.base_sha256
+
+
+def test_refresh_replaces_a_memo_whose_files_are_gone(board):
+    stale = board_shells(board)
+    shutil.rmtree(_entry(board))
+    assert board_shells(board) is stale  # memo hit, files gone
+
+    fresh = board_shells(board, refresh=True)
+    assert fresh.base_stl.is_file()
+    assert fresh.base_sha256 == stale.base_sha256
+    assert board_shells(board) is fresh
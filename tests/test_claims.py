@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+import hse.fs.claims as claims
+from hse.fs.claims import ClaimKeeper, claim_path, release_claim, try_claim
+
+
+def _age(path, seconds: float) -> None:
+    past = time.time() - seconds
+    os.utime(path, (past, past))
+
+
+def test_claim_is_exclusive_until_released():
+    first = try_claim("job123", subfolder="batch")
+    assert first == claim_path("job123", subfolder="batch")
+    assert try_claim("job123", subfolder="batch") is None
+
+    release_claim(first)
+    assert try_claim("job123", subfolder="batch") == first
+
+
+def test_root_and_subfolder_jobs_do_not_collide():
+    assert try_claim("job123") is not None
+    assert try_claim("job123", subfolder="batch") is not None
+
+
+def test_concurrent_claims_have_one_winner():
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        results = list(pool.map(lambda _: try_claim("race01"), range(64)))
+    assert sum(r is not None for r in results) == 1
+
+
+def test_stale_claim_is_stolen_once():
+    held = try_claim("stale1")
+    _age(held, 120)
+
+    assert try_claim("stale1", ttl=600) is None  # still fresh under a longer TTL
+    assert try_claim("stale1", ttl=60) == held
+    # The thief's claim is fresh again, so nobody else can take it.
+    assert try_claim("stale1", ttl=60) is None
+
+
+def test_claim_keeper_refreshes_and_releases():
+    path = try_claim("keep01")
+    _age(path, 120)
+    with ClaimKeeper(path, interval=0.05):
+        time.sleep(0.2)
+        assert time.time() - path.stat().st_mtime < 60
+        assert try_claim("keep01", ttl=60) is None
+    assert not path.exists()
+
+
+def test_interleaved_stealers_do_not_both_win(monkeypatch):
+    held = try_claim("stale2")
+    _age(held, 120)
+
+    real_lock = claims._steal_lock
+    stealers = []
+
+    @contextmanager
+    def racing_lock(bucket):
+        # Stealer A has seen the stale claim; stealer B steals and re-claims before A locks.
+        stealers.append(bucket)
+        if len(stealers) == 1:
+            assert try_claim("stale2", ttl=60) == held
+        with real_lock(bucket):
+            yield
+
+    monkeypatch.setattr(claims, "_steal_lock", racing_lock)
+    assert try_claim("stale2", ttl=60) is None
+    assert len(stealers) == 2
+    # B's fresh claim survived A's takeover attempt.
+    assert time.time() - held.stat().st_mtime < 60
@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+import functools
+import hashlib
+import threading
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import hse.utils.heightmap_cache as heightmap_cache
+from hse.utils.heightmap_cache import HeightmapCache
+
+_BYTES = b"\x89PNG fake heightmap " * 64
+
+
+class _QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def heightmap_url(tmp_path, monkeypatch):
+    for name in ("http_proxy", "HTTP_PROXY", "https_proxy", "HTTPS_PROXY", "all_proxy", "ALL_PROXY"):
+        monkeypatch.delenv(name, raising=False)
+    served = tmp_path / "served"
+    served.mkdir()
+    (served / "hm.png").write_bytes(_BYTES)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), functools.partial(_QuietHandler, directory=str(served)))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/hm.png"
+    server.shutdown()
+    server.server_close()
+
+
+def test_fetch_links_object_into_job(tmp_path, heightmap_url):
+    cache = HeightmapCache()
+    dest = tmp_path / "job" / "inputs" / "input_heightmap.png"
+
+    first = cache.fetch(heightmap_url, dest=dest)
+    assert first.source == "downloaded"
+    assert first.sha256 == hashlib.sha256(_BYTES).hexdigest()
+    assert dest.read_bytes() == _BYTES
+    assert dest.stat().st_ino == first.path.stat().st_ino
+
+    # Second job: conditional request, same object.
+    again = cache.fetch(heightmap_url, dest=tmp_path / "job2" / "hm.png")
+    assert again.source == "revalidated"
+    assert again.path == first.path
+
+
+def test_object_evicted_before_link_is_refetched(tmp_path, heightmap_url, monkeypatch):
+    cache = HeightmapCache()
+    cache.fetch(heightmap_url)
+
+    real_link = heightmap_cache.link_or_copy
+    evictions = []
+
+    def evicted_first(src, dest):
+        # Another process's eviction unlinks the object between lookup and link.
+        if not evictions:
+            evictions.append(src)
+            src.unlink()
+        return real_link(src, dest)
+
+    monkeypatch.setattr(heightmap_cache, "link_or_copy", evicted_first)
+    dest = tmp_path / "job" / "hm.png"
+    entry = cache.fetch(heightmap_url, dest=dest)
+
+    assert len(evictions) == 1
+    assert entry.source == "downloaded"
+    assert dest.read_bytes() == _BYTES
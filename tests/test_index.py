@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import shutil
+
+import hse.fs.index as index_mod
+from hse.contracts.envelopes import now_iso
+from hse.fs.index import JobRecord, backfill, job_index, record_job
+from hse.fs.paths import job_dir
+from hse.worker_service import _discover_queued_jobs
+
+OLD = "2020-01-01T00:00:00+00:00"
+NEW = "2020-01-02T00:00:00+00:00"
+
+
+def _record(job_id, status, updated_at, subfolder=None):
+    return JobRecord(
+        job_id=job_id,
+        subfolder=subfolder,
+        status=status,
+        target="tile",
+        created_at=OLD,
+        updated_at=updated_at,
+    )
+
+
+def test_upsert_never_goes_back_in_time():
+    idx = job_index()
+    idx.upsert_many([_record("job001", "complete", NEW)])
+    idx.upsert_many([_record("job001", "queued", OLD)])
+    assert idx.get("job001").status == "complete"
+
+    idx.upsert_many([_record("job001", "failed", NEW)])
+    assert idx.get("job001").status == "failed"
+
+
+def test_backfill_indexes_tree_with_inferred_status(make_job):
+    make_job("tile01", status="queued", index=False)
+    make_job("tile02", status="complete", subfolder="batch", index=False)
+    make_job("tile03", status="queued", index=False)
+    (job_dir("tile03") / "textures").mkdir()  # work visibly started
+
+    stats = backfill()
+
+    idx = job_index()
+    assert stats["indexed"] == 3
+    assert idx.get("tile01").status == "queued"
+    assert idx.get("tile02", "batch").status == "complete"
+    assert idx.get("tile03").status == "running"
+    assert idx.counts_by_status() == {"queued": 1, "complete": 1, "running": 1}
+    assert idx.get_meta("backfilled_at")
+
+
+def test_backfill_prunes_only_rows_older_than_the_walk(make_job, monkeypatch):
+    make_job("keep01", index=False)
+    make_job("gone01", created_at=OLD)
+    shutil.rmtree(job_dir("gone01"))
+
+    # A job submitted while the walk is in progress is indexed but not seen by it.
+    walk = index_mod._iter_job_jsons
+
+    def racing_walk(root):
+        yield from walk(root)
+        record_job(job_id="late01", subfolder=None, status="queued", target="tile", created_at=now_iso(), updated_at=now_iso())
+
+    monkeypatch.setattr(index_mod, "_iter_job_jsons", racing_walk)
+    stats = backfill()
+
+    idx = job_index()
+    assert stats["pruned"] == 1
+    assert idx.get("gone01") is None
+    assert idx.get("keep01") is not None
+    assert idx.get("late01") is not None
+
+
+def test_full_scan_finds_jobs_missing_from_the_index(make_job):
+    make_job("indexed1")
+    make_job("orphan01", index=False)
+
+    assert _discover_queued_jobs(walk=False) == [("indexed1", None)]
+    assert sorted(_discover_queued_jobs(walk=True)) == [("indexed1", None), ("orphan01", None)]
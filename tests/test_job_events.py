@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import json
+import threading
+import time
+
+import pytest
+
+
+def _later(delay: float, *steps):
+    """Run each step `delay` seconds after the previous one, off the request thread."""
+
+    def run():
+        for step in steps:
+            time.sleep(delay)
+            step()
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    return thread
+
+
+def _events(body: str):
+    frames = [frame for frame in body.split("\n\n") if frame.strip()]
+    events = []
+    for frame in frames:
+        fields = dict(line.split(": ", 1) for line in frame.splitlines() if not line.startswith(":"))
+        if fields:
+            events.append(fields)
+    return events
+
+
+def test_get_sets_etag_that_tracks_the_envelope(client, make_job):
+    make_job("job001")
+    first = client.get("/jobs/job001")
+    assert first.status_code == 200
+    assert first.headers["ETag"] == client.get("/jobs/job001").headers["ETag"]
+
+    make_job("job001", status="running")
+    assert client.get("/jobs/job001").headers["ETag"] != first.headers["ETag"]
+
+
+def test_long_poll_returns_at_once_for_finished_jobs(client, make_job):
+    make_job("job001", status="complete")
+    started = time.monotonic()
+    res = client.get("/jobs/job001", params={"wait": 30})
+    assert res.status_code == 200
+    assert res.json()["status"] == "complete"
+    assert time.monotonic() - started < 5
+
+
+def test_long_poll_wakes_on_change(client, make_job):
+    make_job("job001")
+    etag = client.get("/jobs/job001").headers["ETag"]
+    _later(0.3, lambda: make_job("job001", status="running"))
+
+    started = time.monotonic()
+    res = client.get("/jobs/job001", params={"wait": 20}, headers={"If-None-Match": etag})
+    assert res.json()["status"] == "running"
+    assert res.headers["ETag"] != etag
+    assert time.monotonic() - started < 10
+
+
+def test_long_poll_times_out_unchanged(client, make_job):
+    make_job("job001")
+    etag = client.get("/jobs/job001").headers["ETag"]
+    res = client.get("/jobs/job001", params={"wait": 0.3}, headers={"If-None-Match": etag})
+    assert res.status_code == 200
+    assert res.headers["ETag"] == etag
+
+
+def test_events_for_finished_job_send_one_frame_and_close(client, make_job):
+    make_job("job001", status="complete")
+    res = client.get("/jobs/job001/events")
+    assert res.status_code == 200
+    assert res.headers["content-type"].startswith("text/event-stream")
+
+    events = _events(res.text)
+    assert len(events) == 1
+    assert events[0]["event"] == "status"
+    assert json.loads(events[0]["data"])["status"] == "complete"
+    assert events[0]["id"] == client.get("/jobs/job001").headers["ETag"]
+
+    # Reconnecting with the last id it saw: nothing new, so the stream just closes.
+    again = client.get("/jobs/job001/events", headers={"Last-Event-ID": events[0]["id"]})
+    assert _events(again.text) == []
+
+
+def test_events_follow_job_to_completion(client, make_job):
+    make_job("job001")
+    _later(
+        0.3,
+        lambda: make_job("job001", status="running"),
+        lambda: make_job("job001", status="complete"),
+    )
+    res = client.get("/jobs/job001/events")
+    statuses = [json.loads(event["data"])["status"] for event in _events(res.text)]
+    assert statuses == ["queued", "running", "complete"]
+
+
+@pytest.mark.parametrize("path", ["/jobs/nojob1", "/jobs/nojob1/events"])
+def test_unknown_job_is_404(client, path):
+    assert client.get(path).status_code == 404
+    assert client.get(path, params={"wait": 1}).status_code == 404
+
+
+def test_invalid_job_id_is_400(client):
+    assert client.get("/jobs/x!/events").status_code == 400
@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import pytest
+
+import hse.routes.jobs as jobs_routes
+
+# job-b and job-c share a created_at, so the subfolder tie-break ('' < 'batch') is exercised.
+_JOBS = [
+    ("job-a", None, "queued", "2026-01-01T00:00:00+00:00"),
+    ("job-b", None, "complete", "2026-01-01T00:00:01+00:00"),
+    ("job-c", "batch", "complete", "2026-01-01T00:00:01+00:00"),
+    ("job-d", "batch", "queued", "2026-01-01T00:00:02+00:00"),
+    ("job-e", None, "failed", "2026-01-01T00:00:03+00:00"),
+    ("job-f", "batch", "queued", "2026-01-01T00:00:04+00:00"),
+    ("job-g", None, "queued", "2026-01-01T00:00:05+00:00"),
+]
+
+
+@pytest.fixture
+def listed(make_job):
+    for job_id, subfolder, status, created_at in _JOBS:
+        make_job(job_id, subfolder=subfolder, status=status, created_at=created_at)
+    return [job_id for job_id, *_ in _JOBS]
+
+
+def _walk(client, **params):
+    ids, cursor, pages = [], None, 0
+    while True:
+        query = dict(params, **({"cursor": cursor} if cursor else {}))
+        res = client.get("/jobs", params=query)
+        assert res.status_code == 200, res.text
+        body = res.json()
+        ids += [job["job_id"] for job in body["jobs"]]
+        pages += 1
+        cursor = body["next_cursor"]
+        if cursor is None:
+            return ids, pages
+
+
+@pytest.mark.parametrize("order", ["asc", "desc"])
+def test_cursor_pages_cover_every_job_once(client, listed, order):
+    ids, pages = _walk(client, limit=3, order=order)
+    assert ids == (listed if order == "asc" else listed[::-1])
+    assert pages == 3
+
+
+def test_exact_final_page_has_no_cursor(client, listed):
+    res = client.get("/jobs", params={"limit": len(listed)}).json()
+    assert len(res["jobs"]) == len(listed)
+    assert res["next_cursor"] is None
+
+
+def test_filters_combine_with_pagination(client, listed):
+    assert _walk(client, status="queued", limit=1)[0] == ["job-a", "job-d", "job-f", "job-g"]
+    assert _walk(client, subfolder="batch", limit=2)[0] == ["job-c", "job-d", "job-f"]
+    assert _walk(client, since="2026-01-01T00:00:03Z")[0] == ["job-e", "job-f", "job-g"]
+    assert _walk(client, subfolder="batch", status="queued", order="desc")[0] == ["job-f", "job-d"]
+
+
+def test_listed_job_shape(client, listed):
+    job = client.get("/jobs", params={"limit": 1}).json()["jobs"][0]
+    assert job["job_id"] == "job-a"
+    assert job["status"] == "queued"
+    assert job["target"] == "tile"
+    assert job["public_root"].endswith("/job-a")
+
+
+def test_limit_is_capped(client, listed, monkeypatch):
+    monkeypatch.setattr(jobs_routes, "LIST_MAX_LIMIT", 2)
+    body = client.get("/jobs", params={"limit": 1000}).json()
+    assert len(body["jobs"]) == 2
+    assert body["next_cursor"] is not None
+
+
+@pytest.mark.parametrize(
+    "params",
+    [
+        {"cursor": "not-a-cursor"},
+        {"status": "done"},
+        {"order": "sideways"},
+        {"since": "yesterday"},
+        {"subfolder": "../etc"},
+    ],
+)
+def test_bad_query_is_400(client, listed, params):
+    assert client.get("/jobs", params=params).status_code == 400
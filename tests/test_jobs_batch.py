@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+import pytest
+
+import hse.routes.jobs as jobs_routes
+from hse.fs.index import job_index
+from hse.fs.paths import job_json_path
+
+_TILE = {"heightmap_url": "http://example.invalid/hm.png", "target": "tile"}
+
+
+def _no_jobs_written(surface_env):
+    return not any(surface_env.rglob("job.json")) and job_index().count() == 0
+
+
+def test_batch_creates_jobs_in_order(client):
+    bodies = [dict(_TILE, subfolder="batch"), dict(_TILE), dict(_TILE, subfolder="batch")]
+    res = client.post("/jobs:batch", json=bodies)
+    assert res.status_code == 200, res.text
+
+    envelopes = res.json()
+    assert [env["status"] for env in envelopes] == ["queued"] * 3
+    assert len({env["job_id"] for env in envelopes}) == 3
+    idx = job_index()
+    for env, body in zip(envelopes, bodies):
+        subfolder = body.get("subfolder")
+        assert job_json_path(env["job_id"], subfolder=subfolder).is_file()
+        assert idx.get(env["job_id"], subfolder).status == "queued"
+
+
+def test_empty_batch_is_ok(client):
+    res = client.post("/jobs:batch", json=[])
+    assert res.status_code == 200
+    assert res.json() == []
+
+
+@pytest.mark.parametrize("body", [{"jobs": []}, "tile", 3])
+def test_non_array_body_is_400(client, surface_env, body):
+    assert client.post("/jobs:batch", json=body).status_code == 400
+    assert _no_jobs_written(surface_env)
+
+
+def test_oversized_batch_is_413(client, surface_env, monkeypatch):
+    monkeypatch.setattr(jobs_routes, "BATCH_MAX_JOBS", 2)
+    assert client.post("/jobs:batch", json=[_TILE] * 2).status_code == 200
+
+    res = client.post("/jobs:batch", json=[_TILE] * 3)
+    assert res.status_code == 413
+    assert "limit is 2" in res.json()["detail"]
+    assert job_index().count() == 2
+
+
+@pytest.mark.parametrize(
+    "bad,detail",
+    [
+        ("tile", "jobs[1] must be a JSON object"),
+        ({"target": "board_case", "board": "no-such-board"}, "jobs[1]:"),
+    ],
+)
+def test_bad_entry_rejects_whole_batch(client, surface_env, bad, detail):
+    res = client.post("/jobs:batch", json=[_TILE, bad, _TILE])
+    assert res.status_code == 400
+    assert res.json()["detail"].startswith(detail)
+    assert _no_jobs_written(surface_env)
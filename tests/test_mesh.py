@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from hse.utils.mesh import adaptive_heightfield, grid_heightfield, heightfield_mesh
+
+
+def _disc(n: int) -> np.ndarray:
+    x = np.linspace(0.0, 1.0, n)
+    return np.where((x[:, None] - 0.5) ** 2 + (x[None, :] - 0.5) ** 2 < 0.1, 1.0, 0.0)
+
+
+def _cases():
+    rng = np.random.default_rng(0)
+    return [
+        pytest.param(_disc(80), 0.05, id="glyph-80"),
+        pytest.param(rng.random((64, 64)), 0.05, id="noise-64"),
+        pytest.param(rng.random((37, 80)) * 0.01, 0.05, id="near-flat-37x80"),
+        pytest.param(np.outer(np.linspace(0.0, 1.0, 50), np.ones(70)), 0.001, id="ramp-50x70"),
+        pytest.param(
+            np.sin(np.linspace(0, 6, 100))[:, None] * np.cos(np.linspace(0, 4, 33))[None, :], 0.02, id="wave-100x33"
+        ),
+        pytest.param(np.zeros((65, 65)), 0.05, id="flat-65"),
+    ]
+
+
+def _grid_xy(vertices: np.ndarray, shape) -> np.ndarray:
+    h, w = shape
+    return np.column_stack([vertices[:, 0] * (w - 1), vertices[:, 1] * (h - 1)])
+
+
+def _surface_on_samples(heights: np.ndarray, vertices: np.ndarray, faces: np.ndarray) -> np.ndarray:
+    """The mesh's height at every sample point (NaN where no triangle covers it)."""
+    xy = _grid_xy(vertices, heights.shape)
+    z = np.full(heights.shape, np.nan)
+    for tri in faces:
+        x, y = xy[tri, 0], xy[tri, 1]
+        gx, gy = np.meshgrid(
+            np.arange(int(np.floor(x.min())), int(np.ceil(x.max())) + 1),
+            np.arange(int(np.floor(y.min())), int(np.ceil(y.max())) + 1),
+        )
+        d = (y[1] - y[2]) * (x[0] - x[2]) + (x[2] - x[1]) * (y[0] - y[2])
+        l0 = ((y[1] - y[2]) * (gx - x[2]) + (x[2] - x[1]) * (gy - y[2])) / d
+        l1 = ((y[2] - y[0]) * (gx - x[2]) + (x[0] - x[2]) * (gy - y[2])) / d
+        l2 = 1.0 - l0 - l1
+        inside = (l0 >= -1e-9) & (l1 >= -1e-9) & (l2 >= -1e-9)
+        z[gy[inside], gx[inside]] = (l0 * vertices[tri[0], 2] + l1 * vertices[tri[1], 2] + l2 * vertices[tri[2], 2])[inside]
+    return z
+
+
+@pytest.mark.parametrize("heights,max_error", _cases())
+def test_adaptive_mesh_covers_grid_without_cracks(heights, max_error):
+    vertices, faces = adaptive_heightfield(heights, max_error=max_error)
+    h, w = heights.shape
+
+    tris = _grid_xy(vertices, heights.shape)[faces]
+    signed = 0.5 * (
+        (tris[:, 1, 0] - tris[:, 0, 0]) * (tris[:, 2, 1] - tris[:, 0, 1])
+        - (tris[:, 2, 0] - tris[:, 0, 0]) * (tris[:, 1, 1] - tris[:, 0, 1])
+    )
+    # Same CCW winding as the regular grid, and the triangles tile the domain exactly.
+    assert (signed > 0).all()
+    assert signed.sum() == pytest.approx((h - 1) * (w - 1))
+
+    # Crack-free: no edge is shared by more than two faces, and unshared edges only lie on the border.
+    edges = np.sort(np.concatenate([faces[:, [0, 1]], faces[:, [1, 2]], faces[:, [2, 0]]]), axis=1)
+    unique, counts = np.unique(edges, axis=0, return_counts=True)
+    assert counts.max() == 2
+    border = vertices[unique[counts == 1].ravel()][:, :2]
+    on_border = np.isclose(border, 0.0) | np.isclose(border, 1.0)
+    assert on_border.any(axis=1).all()
+
+
+@pytest.mark.parametrize("heights,max_error", _cases())
+def test_adaptive_mesh_stays_within_error_budget(heights, max_error):
+    vertices, faces = adaptive_heightfield(heights, max_error=max_error)
+    surface = _surface_on_samples(heights, vertices, faces)
+
+    assert not np.isnan(surface).any()
+    assert np.abs(surface - heights).max() <= max_error + 1e-9
+
+
+def test_adaptive_mesh_uses_native_grid_coordinates():
+    heights = _disc(80)
+    vertices, _ = adaptive_heightfield(heights, max_error=0.05)
+    # Samples and fan centres sit on the 80-sample grid or halfway between (no resampling to 129).
+    half_steps = vertices[:, :2] * 79 * 2
+    assert np.allclose(half_steps, np.round(half_steps))
+    assert vertices[:, :2].min() == 0.0 and vertices[:, :2].max() == 1.0
+
+
+def test_flat_regions_collapse():
+    vertices, faces = adaptive_heightfield(np.zeros((65, 65)), max_error=0.05)
+    assert len(faces) == 2 and len(vertices) == 4
+
+
+def test_zero_error_budget_is_the_regular_grid():
+    heights = np.random.default_rng(2).random((12, 9))
+    v_grid, f_grid = grid_heightfield(heights)
+    v, f = heightfield_mesh(heights, max_error=0.0)
+    np.testing.assert_array_equal(v, v_grid)
+    np.testing.assert_array_equal(f, f_grid)
@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+import re
+import socket
+import urllib.request
+
+import pytest
+
+from hse.metrics import CONTENT_TYPE, JOBS_CREATED, Counter, Gauge, Histogram, Registry, start_metrics_server
+
+
+def _sample(text: str, series: str) -> float:
+    match = re.search(rf"^{re.escape(series)} (\S+)$", text, re.MULTILINE)
+    assert match, f"{series} not in exposition"
+    return float(match.group(1))
+
+
+def test_counter_renders_help_type_and_escaped_labels():
+    counter = Counter("t_failures_total", "Failures.", ("code",))
+    counter.inc(code='bad "quote"\\')
+    counter.inc(2, code="line\nbreak")
+    counter.inc(0.5, code='bad "quote"\\')
+
+    assert counter.render().splitlines() == [
+        "# HELP t_failures_total Failures.",
+        "# TYPE t_failures_total counter",
+        't_failures_total{code="bad \\"quote\\"\\\\"} 1.5',
+        't_failures_total{code="line\\nbreak"} 2',
+    ]
+
+
+def test_counter_rejects_decrements_and_wrong_labels():
+    counter = Counter("t_total", "Total.", ("code",))
+    with pytest.raises(ValueError):
+        counter.inc(-1, code="x")
+    with pytest.raises(ValueError):
+        counter.inc(status="x")
+
+
+def test_gauge_set_inc_dec_and_collect():
+    gauge = Gauge("t_in_flight", "In flight.")
+    gauge.set(3)
+    gauge.inc()
+    gauge.dec(2)
+    assert gauge.samples() == ["t_in_flight 2"]
+
+    collected = Gauge("t_jobs", "Jobs.", ("status",), collect=lambda: {("queued",): 4.0, ("failed",): 1.0})
+    assert collected.samples() == ['t_jobs{status="failed"} 1', 't_jobs{status="queued"} 4']
+
+
+def test_histogram_buckets_are_cumulative():
+    hist = Histogram("t_seconds", "Seconds.", ("stage",), buckets=(1, 0.5))
+    for value in (0.2, 0.5, 0.7, 3):
+        hist.observe(value, stage="mesh")
+
+    assert hist.samples() == [
+        't_seconds_bucket{stage="mesh",le="0.5"} 2',
+        't_seconds_bucket{stage="mesh",le="1"} 3',
+        't_seconds_bucket{stage="mesh",le="+Inf"} 4',
+        't_seconds_sum{stage="mesh"} 4.4',
+        't_seconds_count{stage="mesh"} 4',
+    ]
+
+
+def test_registry_rejects_duplicates_and_ends_with_newline():
+    registry = Registry()
+    registry.register(Counter("t_total", "Total."))
+    with pytest.raises(ValueError):
+        registry.register(Gauge("t_total", "Again."))
+    text = registry.render()
+    assert text.endswith("\n")
+    assert "# TYPE t_total counter" in text
+
+
+def test_api_metrics_exposition(client):
+    before = JOBS_CREATED.samples()
+    created_before = float(before[0].split()[1]) if before else 0.0
+    tile = {"heightmap_url": "http://example.invalid/hm.png", "target": "tile"}
+    client.post("/jobs:batch", json=[tile, tile])
+    client.post("/jobs", json=tile)
+
+    res = client.get("/metrics")
+    assert res.status_code == 200
+    assert res.headers["content-type"] == CONTENT_TYPE
+    assert _sample(res.text, "hse_jobs_created_total") == created_before + 3
+    assert _sample(res.text, 'hse_jobs{status="queued"}') == 3
+    assert _sample(res.text, "hse_job_queue_depth") == 3
+    assert "# TYPE hse_job_duration_seconds histogram" in res.text
+
+
+def test_worker_metrics_server():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    server = start_metrics_server(port, host="127.0.0.1")
+    assert server is not None
+    try:
+        direct = urllib.request.build_opener(urllib.request.ProxyHandler({}))
+        with direct.open(f"http://127.0.0.1:{port}/metrics", timeout=5) as res:
+            assert res.headers["Content-Type"] == CONTENT_TYPE
+            assert "# TYPE hse_worker_jobs_in_flight gauge" in res.read().decode("utf-8")
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    assert start_metrics_server(0) is None
@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+import hashlib
+
+import numpy as np
+import pytest
+
+from hse.utils.geometry import mesh_metadata, parse_stl_metadata
+from hse.utils.mesh import grid_heightfield
+from hse.utils.stl import STL_HEADER_BYTES, STL_RECORD_DTYPE, write_stl
+
+
+@pytest.fixture
+def relief():
+    rng = np.random.default_rng(1)
+    vertices, faces = grid_heightfield(rng.random((9, 7)))
+    return vertices * np.array([63.0, 63.0, 2.5]), faces
+
+
+def test_binary_stl_round_trip(tmp_path, relief):
+    vertices, faces = relief
+    path = tmp_path / "relief.stl"
+    digest = write_stl(path, vertices, faces)
+
+    data = path.read_bytes()
+    assert digest.size == len(data)
+    assert digest.sha256 == hashlib.sha256(data).hexdigest()
+    assert len(data) == STL_HEADER_BYTES + 4 + len(faces) * STL_RECORD_DTYPE.itemsize
+
+    count = int(np.frombuffer(data[STL_HEADER_BYTES:STL_HEADER_BYTES + 4], dtype="<u4")[0])
+    records = np.frombuffer(data[STL_HEADER_BYTES + 4:], dtype=STL_RECORD_DTYPE)
+    assert count == len(faces)
+    np.testing.assert_allclose(records["vertices"], vertices[faces].astype(np.float32))
+    # Normals are unit length and follow the CCW winding (+z for a heightfield seen from above).
+    np.testing.assert_allclose(np.linalg.norm(records["normal"], axis=1), 1.0, rtol=1e-5)
+    assert (records["normal"][:, 2] > 0).all()
+
+
+@pytest.mark.parametrize("ascii", [False, True])
+def test_parsed_metadata_matches_in_memory(tmp_path, relief, ascii):
+    vertices, faces = relief
+    path = tmp_path / "relief.stl"
+    write_stl(path, vertices, faces, ascii=ascii)
+
+    parsed = parse_stl_metadata(path)
+    expected = mesh_metadata(vertices, faces)
+    assert parsed.triangles == expected.triangles == len(faces)
+    np.testing.assert_allclose(parsed.bbox_min, expected.bbox_min, atol=1e-5)
+    np.testing.assert_allclose(parsed.bbox_max, expected.bbox_max, atol=1e-5)
+
+
+def test_truncated_binary_stl_counts_whole_records(tmp_path, relief):
+    vertices, faces = relief
+    path = tmp_path / "relief.stl"
+    write_stl(path, vertices, faces)
+    path.write_bytes(path.read_bytes()[:-STL_RECORD_DTYPE.itemsize - 7])
+
+    assert parse_stl_metadata(path).triangles == len(faces) - 2
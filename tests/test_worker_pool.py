@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+import json
+import os
+import time
+
+import pytest
+
+import hse.worker_service as worker
+from hse.fs.claims import claim_owner, claim_path, try_claim
+from hse.fs.paths import job_json_path
+
+
+class _Stop(Exception):
+    pass
+
+
+class _Watcher:
+    def wake(self) -> None:
+        pass
+
+
+def _dying_job(job_id, subfolder, tag=None):
+    """Pool child: "victim" claims, starts and dies hard; the others are killed before they claim."""
+    if job_id != "victim":
+        time.sleep(2)
+        (job_json_path(job_id).parent / "resubmitted").touch()
+        return "skipped", None
+    try_claim(job_id, subfolder=subfolder, tag=tag)
+    doc = json.loads(job_json_path(job_id).read_text(encoding="utf-8"))
+    doc.update(status="running", started_at=doc["created_at"])
+    job_json_path(job_id).write_text(json.dumps(doc), encoding="utf-8")
+    os._exit(1)
+
+
+def _status(job_id):
+    return json.loads(job_json_path(job_id).read_text(encoding="utf-8"))["status"]
+
+
+def test_broken_pool_fails_only_jobs_it_started(make_job, monkeypatch):
+    make_job("victim")
+    make_job("elsewhere")
+    make_job("waiting")
+
+    calls = []
+
+    def next_queued(watcher, timeout):
+        calls.append(timeout)
+        if len(calls) == 1:
+            # Discovered while queued; another worker claims and starts it before our child does.
+            try_claim("elsewhere")
+            make_job("elsewhere", status="running")
+            return [("victim", None), ("elsewhere", None), ("waiting", None)]
+        if len(calls) < 4:
+            time.sleep(1.0)
+            return []
+        raise _Stop
+
+    monkeypatch.setattr(worker, "WORKER_PROCESSES", 3)
+    monkeypatch.setattr(worker, "_next_queued", next_queued)
+    monkeypatch.setattr(worker, "_process_job", _dying_job)
+    with pytest.raises(_Stop):
+        worker._run_pool(_Watcher())
+
+    assert _status("victim") == "failed"
+    assert not claim_path("victim").exists()
+    # The other worker's live job and claim are untouched.
+    assert _status("elsewhere") == "running"
+    assert claim_owner(claim_path("elsewhere"))["pid"] == os.getpid()
+    assert "tag" not in claim_owner(claim_path("elsewhere"))
+    # Unstarted jobs go back on the queue and reach the rebuilt pool.
+    assert _status("waiting") == "queued"
+    assert (job_json_path("waiting").parent / "resubmitted").exists()
+    assert not (job_json_path("elsewhere").parent / "resubmitted").exists()